@@ -0,0 +1,295 @@
+"""
+Basic strategy tables.
+
+A table is solved once per rule set (deck count and Rules) with
+Analysis.ExpectedValue against a full shoe (after the dealer has checked
+for blackjack), saved to disk, and loaded as a flat array of action codes
+with one entry per (row, upcard).
+Rows are:
+ 0-21   hard totals (by score)
+ 22-31  soft totals 12-21
+ 32-41  pairs, by Card.rank_index (1 = split, 0 = play as a total)
+Entries are indexed row * 10 + Card.rank_index of the dealer's upcard.
+
+BasicStrategy exposes the table as Engine callbacks (split, double, hit),
+so each decision is a single index lookup. Surrender tables (1 = surrender)
+use the same layout and are solved the first time they are needed.
+
+Run from the project directory to solve and print a table:
+ python3 -m Analysis.BasicStrategy [n_decks] [rule options, see Rules.add_rule_arguments]
+"""
+import argparse
+from array import array
+import os
+
+from Analysis.DealerOutcome import full_shoe
+from Analysis.ExpectedValue import composition_values
+from Game.Rules import DEFAULT_RULES, EARLY, LATE, add_rule_arguments, rules_from_arguments
+
+# Action codes
+HIT = 0
+STAND = 1
+DOUBLE = 2           # Double down if allowed, otherwise hit.
+DOUBLE_STAND = 3     # Double down if allowed, otherwise stand.
+ACTION_NAMES = ['H', 'S', 'D', 'Ds']
+
+SOFT = 22 - 12       # Row of soft score s is SOFT + s
+PAIR = 32            # Row of a pair of rank r is PAIR + r
+N_ROWS = 42
+
+TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+# Part of every table's file name. Bump it when the solver changes so
+# tables saved by an older version are solved again.
+TABLE_VERSION = 3
+
+
+def rules_key(n_decks, rules=DEFAULT_RULES):
+    """
+    Name of the rule set a table is solved for, e.g. '6d-s17-das-rsa-sp4-bj3_2'
+    (Rules.key with ':' replaced, so it can be used in file names).
+    Args:
+     :Int n_decks: Number of decks in the shoe.
+     :Rules rules: House rules.
+    """
+    return str(n_decks) + 'd-' + rules.key().replace(':', '_')
+
+
+def representative(row):
+    """
+    Two card hand (as rank indices) used to solve a row, or None if the
+    row needs no decision.
+    """
+    if row < SOFT + 12:
+        # Hard totals 5-20. Use a non-pair hand where one exists.
+        score = row
+        if score < 5 or score > 20:
+            return None
+        if score <= 11:
+            return [1, score - 3]          # 2 and (score - 2)
+        return [9, score - 11]             # 10 and (score - 10)
+    if row < PAIR:
+        # Soft totals 12-20: Ace and (score - 11). Soft 12 is a pair of
+        # Aces, played as a total when it can't be split.
+        score = row - SOFT
+        if score > 20:
+            return None
+        return [0, score - 12]
+    rank = row - PAIR
+    return [rank, rank]
+
+
+def solve(n_decks, rules=DEFAULT_RULES):
+    """
+    Solve the basic strategy table for a full n_decks shoe.
+    Return the table as an array of action codes.
+    """
+    shoe = full_shoe(n_decks)
+    table = array('B', [STAND]) * (N_ROWS * 10)
+    for row in range(N_ROWS):
+        # Hard totals below 12 with no decision default to hitting.
+        if row < 12:
+            for upcard in range(10):
+                table[row * 10 + upcard] = HIT
+        ranks = representative(row)
+        if ranks is None:
+            continue
+        for upcard in range(10):
+            composition = list(shoe)
+            for rank in ranks + [upcard]:
+                composition[rank] -= 1
+            values = composition_values(ranks, upcard, tuple(composition), peek=True,
+                                        rules=rules)
+            split = values.pop('split', None)
+            if row >= PAIR:
+                table[row * 10 + upcard] = int(split is not None and split > max(values.values()))
+                continue
+            hit_or_stand = HIT if values['hit'] > values['stand'] else STAND
+            if 'double' in values and values['double'] > max(values['hit'], values['stand']):
+                action = DOUBLE if hit_or_stand == HIT else DOUBLE_STAND
+            else:
+                action = hit_or_stand
+            table[row * 10 + upcard] = action
+    return table
+
+
+def solve_surrender(n_decks, early=False, rules=DEFAULT_RULES):
+    """
+    Solve the surrender table for a full n_decks shoe: surrender a two card
+    hard total or pair whenever its best play is worth less than losing
+    half the bet. Late surrender is decided after the dealer has checked
+    for blackjack, early surrender before. Soft hands never surrender.
+    Return the table as an array of 0s and 1s.
+    """
+    shoe = full_shoe(n_decks)
+    table = array('B', [0]) * (N_ROWS * 10)
+    for row in list(range(5, 21)) + list(range(PAIR, N_ROWS)):
+        ranks = representative(row)
+        for upcard in range(10):
+            composition = list(shoe)
+            for rank in ranks + [upcard]:
+                composition[rank] -= 1
+            values = composition_values(ranks, upcard, tuple(composition), peek=not early,
+                                        rules=rules)
+            table[row * 10 + upcard] = int(max(values.values()) < -0.5)
+    return table
+
+
+def table_path(n_decks, surrender=None, rules=DEFAULT_RULES):
+    """
+    File a table for n_decks is stored in.
+    Args:
+     :Int n_decks: Number of decks in the shoe.
+     :String surrender: Rules.LATE or Rules.EARLY for a surrender table.
+     :Rules rules: House rules the table is solved for.
+    """
+    suffix = '-' + surrender + '-surrender' if surrender else ''
+    return os.path.join(TABLE_DIR, '%s%s.v%d.bin' % (rules_key(n_decks, rules), suffix,
+                                                      TABLE_VERSION))
+
+
+def load_table(n_decks, surrender=None, rules=DEFAULT_RULES):
+    """
+    Load the table for n_decks from disk, solving and saving it first if
+    it doesn't exist yet.
+    Args:
+     :Int n_decks: Number of decks in the shoe.
+     :String surrender: Rules.LATE or Rules.EARLY to load a surrender table.
+     :Rules rules: House rules the table is solved for.
+    """
+    path = table_path(n_decks, surrender, rules)
+    if not os.path.exists(path):
+        if surrender:
+            table = solve_surrender(n_decks, early=surrender == EARLY, rules=rules)
+        else:
+            table = solve(n_decks, rules)
+        os.makedirs(TABLE_DIR, exist_ok=True)
+        with open(path, 'wb') as f:
+            table.tofile(f)
+        return table
+    table = array('B')
+    with open(path, 'rb') as f:
+        table.fromfile(f, N_ROWS * 10)
+    return table
+
+
+def row_index(hand):
+    """
+    Table row for a hand's current total (ignoring pairs).
+    """
+    score = hand.score_hand()
+    if hand.is_soft():
+        return SOFT + score
+    return score
+
+
+class BasicStrategy:
+    def __init__(self, n_decks, table=None, rules=DEFAULT_RULES):
+        """
+        Load the basic strategy for n_decks.
+        Args:
+         :Int n_decks: Number of decks in the shoe.
+         :array table: Preloaded table (otherwise loaded with load_table).
+         :Rules rules: House rules the strategy is solved for.
+        """
+        self.n_decks = n_decks
+        self.rules = rules
+        self.table = table if table is not None else load_table(n_decks, rules=rules)
+        self.surrender_tables = {}      # Loaded on first use, by Rules surrender option
+
+    def action(self, hand, upcard):
+        """
+        Action code for a hand's total against an upcard.
+        """
+        return self.table[row_index(hand) * 10 + upcard.rank_index()]
+
+    def split(self, hand, upcard):
+        """
+        Engine split callback. The hand is a pair.
+        """
+        return self.table[(PAIR + hand.get_first().rank_index()) * 10 + upcard.rank_index()] == 1
+
+    def double(self, hand, upcard):
+        """
+        Engine double down callback.
+        """
+        return self.action(hand, upcard) >= DOUBLE
+
+    def hit(self, hand, upcard):
+        """
+        Engine hit callback. Doubles that aren't allowed fall back to
+        hitting or standing.
+        """
+        action = self.action(hand, upcard)
+        return action == HIT or action == DOUBLE
+
+    def surrender_table(self, surrender=None):
+        """
+        Return the surrender table, loading it (or solving it) the first
+        time it is needed.
+        Args:
+         :String surrender: Rules.LATE or Rules.EARLY. Defaults to the
+            rules' surrender option (LATE if they don't offer surrender).
+        """
+        if surrender is None:
+            surrender = self.rules.surrender or LATE
+        table = self.surrender_tables.get(surrender)
+        if table is None:
+            table = self.surrender_tables[surrender] = load_table(self.n_decks, surrender,
+                                                                  self.rules)
+        return table
+
+    def surrender(self, hand, upcard, surrender=None):
+        """
+        Engine surrender callback. The hand has its first two cards.
+        Args:
+         :String surrender: Rules.LATE or Rules.EARLY. Defaults to the
+            rules' surrender option (LATE if they don't offer surrender).
+        """
+        table = self.surrender_table(surrender)
+        if hand.get_first().rank_index() == hand.get_second().rank_index():
+            row = PAIR + hand.get_first().rank_index()
+        elif hand.is_soft():
+            return False
+        else:
+            row = hand.score_hand()
+        return table[row * 10 + upcard.rank_index()] == 1
+
+    def print_table(self):
+        """
+        Print the table as hard, soft and pair charts.
+        """
+        header = '      ' + ' '.join('%3s' % up for up in ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'A'])
+        upcards = list(range(1, 10)) + [0]
+        sections = [('Hard', range(5, 21), lambda s: s),
+                    ('Soft', range(12, 21), lambda s: SOFT + s),
+                    ('Pair', range(10), lambda r: PAIR + r)]
+        for name, keys, to_row in sections:
+            print(name)
+            print(header)
+            for key in keys:
+                row = to_row(key)
+                label = key if name != 'Pair' else ('A' if key == 0 else key + 1)
+                cells = []
+                for up in upcards:
+                    code = self.table[row * 10 + up]
+                    if name == 'Pair':
+                        cells.append('%3s' % ('P' if code else '-'))
+                    else:
+                        cells.append('%3s' % ACTION_NAMES[code])
+                print('%5s ' % label + ' '.join(cells))
+            print('')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve and print a basic strategy table.')
+    parser.add_argument('n_decks', type=int, nargs='?', default=8)
+    add_rule_arguments(parser)
+    args = parser.parse_args()
+    n_decks = args.n_decks
+    strategy = BasicStrategy(n_decks, rules=rules_from_arguments(args))
+    print('Basic strategy for', rules_key(n_decks, strategy.rules))
+    strategy.print_table()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Exact distribution of the dealer's final total.
+
+Plays out every possible sequence of dealer draws from a shoe composition
+under a Rules object's dealer_table (S17 or H17), weighting each card by
+how many of its rank remain. Compositions are tuples of 10 counts indexed by
+Card.rank_index (Aces, 2-9, then all ten valued cards), as returned by
+Deck.get_composition.
+
+Results are tuples of probabilities ordered as OUTCOMES: a final score of
+17, 18, 19, 20, 21, or a bust.
+
+Run from the project directory to compare against a brute-force simulation:
+ python3 -m Analysis.DealerOutcome [upcard rank index] [n_decks] [n_trials] [s17|h17]
+"""
+from functools import lru_cache
+import random
+import sys
+
+from Deck.BlackjackDeck import BlackjackDeck
+from Game.Hand import Hand
+from Game.Rules import DEFAULT_RULES, H17_RULES
+
+OUTCOMES = (17, 18, 19, 20, 21, 'Bust')
+BUST = 5
+
+# Bounds on the number of cached results.
+TABLE_CACHE_SIZE = 4096
+STATE_CACHE_SIZE = 1 << 18
+
+
+def full_shoe(n_decks):
+    """
+    Composition of n_decks full decks.
+    """
+    return (4 * n_decks,) * 9 + (16 * n_decks,)
+
+
+def dealer_probabilities(upcard, composition, peek=False, rules=DEFAULT_RULES):
+    """
+    Probability of each dealer outcome.
+    Args:
+     :Int upcard: Card.rank_index of the dealer's visible card.
+     :Tuple composition: Cards remaining in the shoe, excluding the upcard.
+        The hole card is drawn from these.
+     :Bool peek: The dealer has already checked the hole card and doesn't
+        have blackjack, so an Ace upcard can't have a ten valued hole card
+        and a ten valued upcard can't have an Ace.
+     :Rules rules: House rules the dealer plays by.
+
+    Return:
+     :Tuple: Probabilities ordered as OUTCOMES.
+    """
+    return _dealer_probabilities(upcard, composition, peek, rules.dealer_table)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def _dealer_probabilities(upcard, composition, peek, dealer_table):
+    """
+    dealer_probabilities for a compiled Rules.dealer_table.
+    """
+    if not peek or upcard not in (0, 9):
+        return _play(upcard + 1, upcard == 0, composition, dealer_table)
+
+    # Draw the hole card from every rank except the one that makes blackjack.
+    blackjack_rank = 9 if upcard == 0 else 0
+    n_cards = sum(composition) - composition[blackjack_rank]
+    result = [0.0] * 6
+    counts = list(composition)
+    for rank, count in enumerate(composition):
+        if count == 0 or rank == blackjack_rank:
+            continue
+        counts[rank] = count - 1
+        sub = _play(upcard + rank + 2, upcard == 0 or rank == 0, tuple(counts), dealer_table)
+        counts[rank] = count
+        p = count / n_cards
+        for i in range(6):
+            result[i] += p * sub[i]
+    return tuple(result)
+
+
+@lru_cache(maxsize=STATE_CACHE_SIZE)
+def _play(hard_total, has_ace, composition, dealer_table):
+    """
+    Outcome distribution for a dealer hand with the given hard total
+    (Aces as 1) drawing from composition.
+    """
+    soft = has_ace and hard_total <= 11
+    score = hard_total + 10 if soft else hard_total
+
+    result = [0.0] * 6
+    if score > 21:
+        result[BUST] = 1.0
+        return tuple(result)
+    if not dealer_table[score * 2 + soft]:
+        result[score - 17] = 1.0
+        return tuple(result)
+
+    n_cards = sum(composition)
+    # The shoe ran out with the dealer still drawing. This is vanishingly
+    # rare for real shoes, so count it as a bust rather than reshuffle.
+    if n_cards == 0:
+        result[BUST] = 1.0
+        return tuple(result)
+
+    counts = list(composition)
+    for rank, count in enumerate(composition):
+        if count == 0:
+            continue
+        counts[rank] = count - 1
+        sub = _play(hard_total + rank + 1, has_ace or rank == 0, tuple(counts), dealer_table)
+        counts[rank] = count
+        p = count / n_cards
+        for i in range(6):
+            result[i] += p * sub[i]
+    return tuple(result)
+
+
+def dealer_probabilities_for_deck(upcard, deck, rules=DEFAULT_RULES):
+    """
+    Outcome distribution for an upcard given a Deck's remaining cards.
+    Args:
+     :Card upcard: The dealer's visible card (already removed from deck).
+     :Deck deck: Deck or shoe with a get_composition method.
+     :Rules rules: House rules the dealer plays by.
+    """
+    return dealer_probabilities(upcard.rank_index(), deck.get_composition(), rules=rules)
+
+
+def simulate(upcard, n_decks, n_trials, rng, rules=DEFAULT_RULES):
+    """
+    Brute-force estimate: deal the dealer's hand out of a shuffled shoe
+    n_trials times, following Game.play_dealer.
+    """
+    deck = BlackjackDeck(n_decks, rng=rng)
+    # Remove the upcard from the shoe.
+    for i in range(len(deck.cards)):
+        if deck.cards[i].rank_index() == upcard:
+            up_card = deck.cards.pop(i)
+            break
+    cards = deck.cards
+
+    counts = [0] * 6
+    for t in range(n_trials):
+        hand = Hand(0)
+        hand.add_card(up_card)
+        # Only shuffle as far as the dealer draws (partial Fisher-Yates).
+        draw = len(cards)
+        while rules.dealer_hits(hand.score_hand(), hand.is_soft()):
+            j = rng.randrange(draw)
+            draw -= 1
+            cards[j], cards[draw] = cards[draw], cards[j]
+            hand.add_card(cards[draw])
+        score = hand.score_hand()
+        counts[BUST if score > 21 else score - 17] += 1
+    return tuple(count / n_trials for count in counts)
+
+
+def main():
+    upcard = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    n_decks = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    n_trials = int(sys.argv[3]) if len(sys.argv) > 3 else 200000
+    rules = H17_RULES if len(sys.argv) > 4 and sys.argv[4] == 'h17' else DEFAULT_RULES
+
+    composition = list(full_shoe(n_decks))
+    composition[upcard] -= 1
+    exact = dealer_probabilities(upcard, tuple(composition), rules=rules)
+    estimate = simulate(upcard, n_decks, n_trials, random.Random(0), rules)
+
+    # Three standard errors of the largest outcome is a generous tolerance.
+    tolerance = 3 * (0.25 / n_trials) ** 0.5
+    print("Outcome   Exact     Simulated")
+    ok = True
+    for name, p, q in zip(OUTCOMES, exact, estimate):
+        print("%-8s  %.5f   %.5f" % (name, p, q))
+        ok = ok and abs(p - q) <= tolerance
+    print("Within tolerance (%.5f):" % tolerance, ok)
+
+
+if __name__ == '__main__':
+    main()
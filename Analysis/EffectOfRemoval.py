@@ -0,0 +1,158 @@
+"""
+Effect of removal of each rank on the player's expectation.
+
+The effect of removal (EOR) of a rank is how much the player's expected
+return off the top of a shoe changes when a single card of that rank is
+taken out. The expected return is found with Analysis.ExpectedValue for
+every two card hand against every upcard, playing each hand its best way
+for the composition under a Rules object, with the dealer checking for
+blackjack under an Ace or ten (surrender and insurance are never taken).
+EORs are solved once per rule set (Rules.key) for a single deck, the
+usual reference and a few seconds of work. They are saved next to the
+basic strategy tables and loaded from disk afterwards.
+
+Removing the cards of a shoe changes the expectation by about
+ 51 * sum over ranks of EOR[rank] * (full density - current density)
+where a density is the fraction of the shoe's cards of a rank, whatever
+the number of decks (see estimated_shift).
+
+Run from the project directory to solve and print the EORs:
+ python3 -m Analysis.EffectOfRemoval [n_decks] [rule options, see Rules.add_rule_arguments]
+"""
+import argparse
+from array import array
+from functools import lru_cache
+import os
+
+from Analysis.BasicStrategy import TABLE_DIR, TABLE_VERSION, rules_key
+from Analysis.DealerOutcome import full_shoe
+from Analysis.ExpectedValue import composition_values
+from Game.Rules import DEFAULT_RULES, add_rule_arguments, rules_from_arguments
+
+
+def expected_value(composition, rules=DEFAULT_RULES):
+    """
+    Player's expected return per unit bet off the top of a shoe, playing
+    every hand its best way (see ExpectedValue.composition_values).
+    Args:
+     :Tuple composition: Cards in the shoe, indexed by Card.rank_index.
+     :Rules rules: House rules the hands are played under.
+    """
+    n_cards = sum(composition)
+    total = 0.0
+    for upcard in range(10):
+        p_upcard = composition[upcard] / n_cards
+        if not p_upcard:
+            continue
+        after_up = list(composition)
+        after_up[upcard] -= 1
+        # Rank the dealer's hole card needs for blackjack.
+        blackjack_rank = {0: 9, 9: 0}.get(upcard)
+        for first in range(10):
+            p_first = after_up[first] / (n_cards - 1)
+            if not p_first:
+                continue
+            after_first = list(after_up)
+            after_first[first] -= 1
+            for second in range(10):
+                p_second = after_first[second] / (n_cards - 2)
+                if not p_second:
+                    continue
+                rest = list(after_first)
+                rest[second] -= 1
+                natural = {first, second} == {0, 9}
+                # Everything but a natural loses the bet to a dealer blackjack.
+                p_dealer_natural = 0.0
+                if blackjack_rank is not None:
+                    p_dealer_natural = rest[blackjack_rank] / (n_cards - 3)
+                values = composition_values([first, second], upcard, tuple(rest), peek=True,
+                                            rules=rules)
+                value = ((1 - p_dealer_natural) * max(values.values())
+                         - (0.0 if natural else p_dealer_natural))
+                total += p_upcard * p_first * p_second * value
+    return total
+
+
+def solve(n_decks=1, rules=DEFAULT_RULES):
+    """
+    Solve the EOR of every rank for a full n_decks shoe under rules.
+    Return an array of 10 EORs (per unit bet) indexed by Card.rank_index.
+    """
+    shoe = full_shoe(n_decks)
+    base = expected_value(shoe, rules)
+    effects = array('d')
+    for rank in range(10):
+        composition = list(shoe)
+        composition[rank] -= 1
+        effects.append(expected_value(tuple(composition), rules) - base)
+    return effects
+
+
+def effects_path(n_decks=1, rules=DEFAULT_RULES):
+    """
+    File the EORs for n_decks and rules are stored in.
+    """
+    return os.path.join(TABLE_DIR, '%s-eor.v%d.bin' % (rules_key(n_decks, rules), TABLE_VERSION))
+
+
+@lru_cache(maxsize=None)
+def load_effects(n_decks=1, rules=DEFAULT_RULES):
+    """
+    Load the EORs for n_decks and rules from disk, solving and saving them
+    first if they don't exist yet.
+    Return a tuple of 10 EORs indexed by Card.rank_index.
+    """
+    path = effects_path(n_decks, rules)
+    if not os.path.exists(path):
+        effects = solve(n_decks, rules)
+        os.makedirs(TABLE_DIR, exist_ok=True)
+        with open(path, 'wb') as f:
+            effects.tofile(f)
+        return tuple(effects)
+    effects = array('d')
+    with open(path, 'rb') as f:
+        effects.fromfile(f, 10)
+    return tuple(effects)
+
+
+def removal_effects(composition, full, effects):
+    """
+    Change in the player's expectation contributed by each rank, for a shoe
+    that started as full and now holds composition.
+    Args:
+     :Tuple composition: Cards left, indexed by Card.rank_index.
+     :Tuple full: The full shoe's composition.
+     :Tuple effects: Single deck EORs (see load_effects).
+    Return a tuple of 10 changes per unit bet.
+    """
+    n_left = sum(composition)
+    n_full = sum(full)
+    if not n_left:
+        return (0.0,) * 10
+    return tuple(51 * effects[rank] * (full[rank] / n_full - composition[rank] / n_left)
+                 for rank in range(10))
+
+
+def estimated_shift(composition, full, effects):
+    """
+    Estimated change in the player's expectation from the full shoe to
+    composition (the sum of removal_effects).
+    """
+    return sum(removal_effects(composition, full, effects))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Solve and print the effect of removal of each rank.')
+    parser.add_argument('n_decks', type=int, nargs='?', default=1)
+    add_rule_arguments(parser)
+    args = parser.parse_args()
+    rules = rules_from_arguments(args)
+    effects = load_effects(args.n_decks, rules)
+    print('Effect of removal (% of a bet) for', rules_key(args.n_decks, rules))
+    print('   ' + ' '.join('%6s' % name for name in ['A'] + [str(r) for r in range(2, 11)]))
+    print('   ' + ' '.join('%+6.3f' % (100 * effect) for effect in effects))
+
+
+if __name__ == '__main__':
+    main()
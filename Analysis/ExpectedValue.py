@@ -0,0 +1,321 @@
+"""
+Composition-dependent expected value of each player action.
+
+Returns the expected return (in units of the hand's bet) of standing,
+hitting, doubling down and splitting for a Hand against a dealer upcard,
+given the cards remaining in the shoe. Payouts and options follow a Rules
+object, as Hand.compute_reward and Player apply them: only a dealt
+blackjack earns the blackjack bonus, the dealer hits or stands on soft 17,
+doubles are limited to the rules' double_totals (and to unsplit hands
+without double after split), pairs are split and resplit up to
+max_split_hands (Aces only once without resplit_aces), and a hand is
+finished once it reaches 21.
+
+The dealer's outcome distribution and the player's draw probabilities are
+taken from the composition at the decision point (after the player's cards
+and the upcard are removed). removal_depth sets how many further player
+draws also remove their card before the next draw. The default of 0 keeps
+every decision within a few milliseconds on an 8-deck shoe (on a multi-deck
+shoe the extra removal changes EVs by well under 0.1%); EXACT tracks every
+draw at a cost of tens of milliseconds for low totals and pairs.
+
+Run from the project directory to time a few decisions:
+ python3 -m Analysis.ExpectedValue [n_decks] [removal_depth]
+"""
+from functools import lru_cache
+import sys
+import time
+
+from Analysis.DealerOutcome import BUST, dealer_probabilities, full_shoe
+from Game.Rules import DEFAULT_RULES
+
+# removal_depth that tracks every player draw (no hand takes more than 21 cards).
+EXACT = 21
+
+TABLE_CACHE_SIZE = 4096
+STATE_CACHE_SIZE = 1 << 18
+
+
+def stand_value(score, dealer):
+    """
+    Expected return of standing on score against a dealer outcome
+    distribution, following Hand.compute_reward.
+    Args:
+     :Int score: The player's score.
+     :Tuple dealer: Probabilities ordered as DealerOutcome.OUTCOMES.
+    """
+    if score > 21:
+        return -1.0
+    win = dealer[BUST]
+    lose = 0.0
+    for i in range(5):
+        dealer_score = 17 + i
+        if dealer_score < score:
+            win += dealer[i]
+        elif dealer_score > score:
+            lose += dealer[i]
+    return win - lose
+
+
+def _score(hard_total, has_ace):
+    """
+    Score of a hand from its hard total, as in Hand.score_hand.
+    """
+    if has_ace and hard_total <= 11:
+        return hard_total + 10
+    return hard_total
+
+
+def _remove(composition, rank):
+    """
+    Return composition with one card of rank removed.
+    """
+    counts = list(composition)
+    counts[rank] -= 1
+    return tuple(counts)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def _fixed_table(dealer, composition):
+    """
+    Expected return of hitting and of playing on optimally (best of hit and
+    stand) for every hand state, drawing every card from composition
+    without removal. Computed bottom-up from hard 21 down.
+
+    Return:
+     (best, hit) - Lists indexed by hard_total * 2 + has_ace.
+    """
+    n_cards = sum(composition)
+    probs = [(rank, count / n_cards) for rank, count in enumerate(composition) if count]
+    best = [0.0] * 44
+    hit = [0.0] * 44
+    for hard_total in range(21, 1, -1):
+        for has_ace in (1, 0):
+            ev = 0.0
+            for rank, p in probs:
+                new_total = hard_total + rank + 1
+                if new_total > 21:
+                    ev -= p
+                else:
+                    ev += p * best[new_total * 2 + (has_ace or rank == 0)]
+            idx = hard_total * 2 + has_ace
+            hit[idx] = ev
+            score = _score(hard_total, has_ace)
+            stand = stand_value(score, dealer)
+            best[idx] = stand if score >= 21 else max(stand, ev)
+    return best, hit
+
+
+@lru_cache(maxsize=STATE_CACHE_SIZE)
+def _hit_or_stand(hard_total, has_ace, dealer, composition, depth):
+    """
+    Expected return of the best of hitting and standing.
+    """
+    score = _score(hard_total, has_ace)
+    stand = stand_value(score, dealer)
+    if score >= 21:
+        return stand
+    return max(stand, _hit(hard_total, has_ace, dealer, composition, depth))
+
+
+def _hit(hard_total, has_ace, dealer, composition, depth):
+    """
+    Expected return of taking exactly one card and then playing on optimally.
+    The next depth draws remove their card from composition.
+    """
+    if depth == 0:
+        return _fixed_table(dealer, composition)[1][hard_total * 2 + has_ace]
+    n_cards = sum(composition)
+    ev = 0.0
+    for rank, count in enumerate(composition):
+        if count == 0:
+            continue
+        ev += count / n_cards * _hit_or_stand(hard_total + rank + 1, has_ace or rank == 0,
+                                              dealer, _remove(composition, rank), depth - 1)
+    return ev
+
+
+def _can_double(hard_total, has_ace, double_table):
+    """
+    Check if a two card hand may double down.
+    Args:
+     :Bytes double_table: Rules.double_table, or None if the hand may not
+        double at all (a split hand without double after split).
+    """
+    return double_table is not None and double_table[_score(hard_total, has_ace)] == 1
+
+
+def _double(hard_total, has_ace, dealer, composition):
+    """
+    Expected return of doubling the bet and taking exactly one card.
+    """
+    n_cards = sum(composition)
+    ev = 0.0
+    for rank, count in enumerate(composition):
+        if count == 0:
+            continue
+        score = _score(hard_total + rank + 1, has_ace or rank == 0)
+        ev += count / n_cards * stand_value(score, dealer)
+    return 2 * ev
+
+
+def _two_card_value(hard_total, has_ace, dealer, composition, depth, double_table):
+    """
+    Expected return of a two card hand played with hit, stand or double
+    (if double_table allows it, see _can_double).
+    """
+    if _score(hard_total, has_ace) == 21:
+        return stand_value(21, dealer)
+    value = _hit_or_stand(hard_total, has_ace, dealer, composition, depth)
+    if _can_double(hard_total, has_ace, double_table):
+        value = max(value, _double(hard_total, has_ace, dealer, composition))
+    return value
+
+
+def _split_options(rank, rules):
+    """
+    Hashable options _split_hand plays a split hand of rank with:
+    (double_table or None without double after split, max_split_hands,
+    share of the cards of rank that make a pair that may be split again).
+    Without split_unlike_tens only a quarter of the ten valued cards match
+    the split card's rank.
+    """
+    if rank == 0 and not rules.resplit_aces:
+        resplit_share = 0.0
+    elif rank == 9 and not rules.split_unlike_tens:
+        resplit_share = 0.25
+    else:
+        resplit_share = 1.0
+    double_table = rules.double_table if rules.double_after_split else None
+    return double_table, rules.max_split_hands, resplit_share
+
+
+@lru_cache(maxsize=STATE_CACHE_SIZE)
+def _split_hand(rank, dealer, composition, n_hands, depth, options):
+    """
+    Expected return of one hand started from a split card of rank:
+    draw its second card, then play it (resplitting a new pair while the
+    total number of hands stays within the options' max_split_hands, see
+    _split_options).
+    """
+    double_table, max_split_hands, resplit_share = options
+    n_cards = sum(composition)
+    ev = 0.0
+    for second, count in enumerate(composition):
+        if count == 0:
+            continue
+        if depth:
+            remaining, next_depth = _remove(composition, second), depth - 1
+        else:
+            remaining, next_depth = composition, 0
+        value = _two_card_value(rank + second + 2, int(rank == 0 or second == 0),
+                                dealer, remaining, next_depth, double_table)
+        if second == rank and resplit_share and n_hands < max_split_hands:
+            resplit = _split(rank, dealer, remaining, n_hands + 1, next_depth, options)
+            value += resplit_share * max(0.0, resplit - value)
+        ev += count / n_cards * value
+    return ev
+
+
+def _split(rank, dealer, composition, n_hands, depth, options):
+    """
+    Expected return of splitting a pair of rank into two hands (the pair
+    cards are already removed from composition).
+    """
+    return 2 * _split_hand(rank, dealer, composition, n_hands, depth, options)
+
+
+def action_values(hand, upcard, deck, removal_depth=0, peek=True, rules=DEFAULT_RULES):
+    """
+    Expected return of every legal action for a hand.
+    Args:
+     :Hand hand: The player's hand (no hidden cards).
+     :Card upcard: The dealer's visible card.
+     :Deck deck: Deck or shoe holding the remaining cards (all cards on the
+        table already drawn from it).
+     :Int removal_depth: Number of later player draws that remove their card
+        from the composition (EXACT for all of them).
+     :Bool peek: The dealer has checked for blackjack and doesn't have it,
+        as in Game.dealer_peek. Pass False to value the hand before the peek.
+     :Rules rules: House rules the hand is played under.
+
+    Return:
+     :Dict: Action name ('stand', 'hit', 'double', 'split') to expected
+        return per unit of the hand's current bet.
+    """
+    return composition_values([card.rank_index() for card in hand.cards],
+                              upcard.rank_index(), deck.get_composition(), removal_depth,
+                              peek=peek, rules=rules)
+
+
+def composition_values(ranks, upcard, composition, removal_depth=0, peek=False,
+                       rules=DEFAULT_RULES):
+    """
+    Expected return of every legal action for a hand given as rank indices.
+    The hand is valued as the player's first hand: it may double if the
+    rules' double_totals allow it, and a pair may be split if the rules
+    allow splitting at all.
+    Args:
+     :List ranks: Card.rank_index of each card in the hand.
+     :Int upcard: Card.rank_index of the dealer's visible card.
+     :Tuple composition: Remaining shoe, excluding the hand and upcard.
+     :Int removal_depth: See action_values.
+     :Bool peek: The dealer has checked for blackjack and doesn't have it
+        (see DealerOutcome.dealer_probabilities).
+     :Rules rules: House rules the hand is played under.
+    """
+    hard_total = sum(ranks) + len(ranks)
+    has_ace = int(0 in ranks)
+    score = _score(hard_total, has_ace)
+    if len(ranks) == 2 and score == 21:
+        # A natural. It is paid at once unless the dealer also has one.
+        blackjack_rank = {0: 9, 9: 0}.get(upcard)
+        if peek or blackjack_rank is None:
+            return {'stand': rules.blackjack_pays}
+        return {'stand': rules.blackjack_pays * (1 - composition[blackjack_rank] / sum(composition))}
+
+    dealer = dealer_probabilities(upcard, composition, peek, rules)
+
+    values = {'stand': stand_value(score, dealer)}
+    if score >= 21:
+        return values
+    values['hit'] = _hit(hard_total, has_ace, dealer, composition, removal_depth)
+    if len(ranks) == 2:
+        if _can_double(hard_total, has_ace, rules.double_table):
+            values['double'] = _double(hard_total, has_ace, dealer, composition)
+        if ranks[0] == ranks[1] and rules.max_split_hands > 1:
+            # The pair cards stay on the table, so composition is unchanged.
+            values['split'] = _split(ranks[0], dealer, composition, 2, removal_depth,
+                                     _split_options(ranks[0], rules))
+    return values
+
+
+def best_action(values):
+    """
+    Return the name of the action with the highest expected return.
+    """
+    return max(values, key=values.get)
+
+
+def main():
+    n_decks = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    removal_depth = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    shoe = full_shoe(n_decks)
+
+    # (player ranks, upcard) pairs using Card.rank_index
+    cases = [([9, 5], 9), ([9, 1], 5), ([0, 6], 8), ([5, 4], 4), ([7, 7], 9), ([1, 1], 5), ([0, 0], 9)]
+    print("Hand            Up   ms     Best    Values")
+    for ranks, upcard in cases:
+        composition = shoe
+        for rank in ranks + [upcard]:
+            composition = _remove(composition, rank)
+        start = time.perf_counter()
+        values = composition_values(ranks, upcard, composition, removal_depth, peek=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        names = [str(rank + 1) for rank in ranks]
+        print("%-15s %-4d %-6.2f %-7s %s" % (",".join(names), upcard + 1, elapsed, best_action(values),
+              " ".join("%s=%.4f" % item for item in sorted(values.items()))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Throughput benchmark for the headless Engine.
+
+Plays rounds with the default callbacks on one core and reports
+rounds per minute. Exits with a non-zero status if the target is missed.
+
+Run from the project directory:
+ python3 -m Benchmarks.engine_benchmark [n_rounds] [n_decks]
+"""
+import random
+import sys
+import time
+
+from Simulation.Engine import Engine
+
+TARGET_ROUNDS_PER_MIN = 1000000
+
+
+def main():
+    n_rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    n_decks = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    random.seed(0)
+    engine = Engine(1, n_decks, bankroll=10**12)
+
+    start = time.perf_counter()
+    engine.run(n_rounds)
+    elapsed = time.perf_counter() - start
+
+    rate = n_rounds / elapsed * 60
+    print("Rounds:", n_rounds, "Decks:", n_decks)
+    print("Elapsed: %.3f s" % elapsed)
+    print("Throughput: %.0f rounds/min (target %d)" % (rate, TARGET_ROUNDS_PER_MIN))
+    print("House edge: %.4f" % engine.house_edge())
+
+    if rate < TARGET_ROUNDS_PER_MIN:
+        print("FAIL: below target")
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == '__main__':
+    main()
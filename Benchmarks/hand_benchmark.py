@@ -0,0 +1,70 @@
+"""
+Micro-benchmark for Hand scoring.
+
+Builds hands of increasing size one card at a time, scoring after every
+card as Player.play_hand does, and compares Hand.score_hand (running
+totals) with the previous implementation that rescored every card.
+
+Run from the project directory:
+ python3 -m Benchmarks.hand_benchmark [n_repeats]
+"""
+import sys
+import time
+
+from Deck.Card import Card
+from Game.Hand import Hand
+
+
+def rescore(cards):
+    """
+    Previous Hand.score_hand: walk every card, then reduce Aces as needed.
+    """
+    score = 0
+    for card in cards:
+        value = card.value
+        if value.isdigit():
+            score += int(value)
+        elif value == 'Ace':
+            score += 11
+        else:
+            score += 10
+    for card in cards:
+        if score <= 21:
+            break
+        if card.value == 'Ace':
+            score -= 10
+    return score
+
+
+def main():
+    n_repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    # Long multi-hit hands: Aces and small cards.
+    values = ['Ace', '2', 'Ace', '3', 'Ace', '2', 'Ace', '2', '3', '2', '2']
+    cards = [Card('Spades', value) for value in values]
+
+    print("Cards  rescore (us/hand)  incremental (us/hand)  speedup")
+    for n_cards in (2, 4, 6, 8, 11):
+        hand_cards = cards[:n_cards]
+
+        start = time.perf_counter()
+        for i in range(n_repeats):
+            dealt = []
+            for card in hand_cards:
+                dealt.append(card)
+                rescore(dealt)
+        old = (time.perf_counter() - start) / n_repeats * 1e6
+
+        start = time.perf_counter()
+        for i in range(n_repeats):
+            hand = Hand(0)
+            for card in hand_cards:
+                hand.add_card(card)
+                hand.score_hand()
+        new = (time.perf_counter() - start) / n_repeats * 1e6
+
+        print("%5d  %18.2f  %21.2f  %6.1fx" % (n_cards, old, new, old / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Round wall time with slow players, asking for bets and continue answers
+one seat at a time versus all seats at once (Game's prompt_executor).
+
+Every simulated player takes delay seconds to answer each prompt, bets
+$10, stands, and plays n_rounds rounds.
+
+Run from the project directory:
+ python3 -m Benchmarks.prompt_benchmark [n_seats] [n_rounds] [delay]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+import io
+import sys
+import time
+
+from Game.Game import Game
+
+
+def slow_player(delay, n_rounds):
+    """
+    Input source for a player who takes delay seconds per answer.
+    """
+    rounds = [0]
+
+    def answer(prompt=''):
+        time.sleep(delay)
+        if 'initial bet' in prompt:
+            return '10'
+        if 'keep playing' in prompt:
+            rounds[0] += 1
+            return 'y' if rounds[0] < n_rounds else 'n'
+        if prompt.startswith('Bet $'):
+            return 'y'
+        if 'stay (S) or hit (H)' in prompt:
+            return 's'
+        return 'n'
+    return answer
+
+
+def play(n_seats, n_rounds, delay, prompt_executor):
+    """
+    Play a seeded game and return the wall time per round and final money.
+    """
+    names = ['Player ' + str(i + 1) for i in range(n_seats)]
+    game = Game(names, 6, seed=0, start=False, prompt_executor=prompt_executor)
+    for player in game.players:
+        player.input = slow_player(delay, n_rounds)
+    players = list(game.players)
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        game.run_game()
+    return (time.perf_counter() - start) / n_rounds, [player.money for player in players]
+
+
+def main():
+    n_seats = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    n_rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0.02
+
+    sequential, money = play(n_seats, n_rounds, delay, None)
+    with ThreadPoolExecutor(max_workers=n_seats) as executor:
+        concurrent, concurrent_money = play(n_seats, n_rounds, delay, executor)
+
+    print("Seats:", n_seats, "Rounds:", n_rounds, "Answer delay: %.0f ms" % (delay * 1000))
+    print("One at a time: %.0f ms per round" % (sequential * 1000))
+    print("All at once:   %.0f ms per round" % (concurrent * 1000))
+    print("Same results:", money == concurrent_money)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Load test for Server.TableServer.
+
+Starts a server on a Unix socket in a separate process and connects many
+simulated players at once. Each player bets $10, hits or stands at random,
+and leaves after a few rounds. Decision latency is the time from sending
+an answer to receiving the server's next line.
+
+Run from the project directory:
+ python3 -m Benchmarks.server_benchmark [n_connections] [n_rounds]
+"""
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from Server.TableServer import PROMPT
+
+
+async def play(path, seat, n_rounds, latencies):
+    """
+    Play as one simulated player until the server closes the connection.
+    """
+    rng = random.Random(seat)
+    reader, writer = await asyncio.open_unix_connection(path, limit=1 << 16)
+    rounds = 0
+    sent_at = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if sent_at is not None:
+            latencies.append(time.perf_counter() - sent_at)
+            sent_at = None
+        if not line.startswith(PROMPT.encode()):
+            continue
+        # "? #id question": answers are tagged with the question's id.
+        tag, _, prompt = line.decode()[len(PROMPT):].partition(' ')
+        if 'your name' in prompt:
+            answer = 'Player' + str(seat)
+        elif 'initial bet' in prompt:
+            answer = '10'
+        elif 'keep playing' in prompt:
+            rounds += 1
+            answer = 'y' if rounds < n_rounds else 'n'
+        elif 'stay (S) or hit (H)' in prompt:
+            answer = rng.choice('sh')
+        elif prompt.startswith('Bet $'):
+            answer = 'y'
+        else:
+            answer = 'n'
+        writer.write((tag + ' ' + answer + '\n').encode())
+        sent_at = time.perf_counter()
+    writer.close()
+
+
+async def load_test(path, n_connections, n_rounds):
+    latencies = []
+    players = [play(path, seat, n_rounds, latencies) for seat in range(n_connections)]
+    await asyncio.gather(*players)
+    return latencies
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    n_connections = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n_rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    path = os.path.join(tempfile.mkdtemp(), 'blackjack.sock')
+    server = subprocess.Popen([sys.executable, '-m', 'Server.TableServer', '--unix', path,
+                               '--lobby-wait', '0.2'], stdout=subprocess.DEVNULL)
+    try:
+        while not os.path.exists(path):
+            time.sleep(0.05)
+        start = time.perf_counter()
+        latencies = asyncio.run(load_test(path, n_connections, n_rounds))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    print("Connections:", n_connections, "Rounds per player:", n_rounds)
+    print("Decisions: %d in %.1fs" % (len(latencies), elapsed))
+    print("Decision latency p50: %.2f ms  p99: %.2f ms"
+          % (percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare BlackjackDeck with CompactShoe.
+
+Times reshuffling and dealing out a full shoe, the work done once per shoe
+in a long simulation.
+
+Run from the project directory:
+ python3 -m Benchmarks.shoe_benchmark [n_shoes] [n_decks]
+"""
+import random
+import sys
+import time
+
+from Deck.BlackjackDeck import BlackjackDeck
+from Deck.CompactShoe import CompactShoe
+
+
+def time_shoes(deck, n_shoes, draw):
+    """
+    Reset the deck and draw every card n_shoes times.
+    Return the elapsed time in seconds.
+    """
+    n_cards = deck.n_decks * 52
+    start = time.perf_counter()
+    for i in range(n_shoes):
+        deck.reset_deck()
+        for j in range(n_cards):
+            draw()
+    return time.perf_counter() - start
+
+
+def main():
+    n_shoes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_decks = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    random.seed(0)
+
+    print("Shoes:", n_shoes, "Decks:", n_decks)
+
+    deck = BlackjackDeck(n_decks)
+    # reset_deck adds a full shoe, so start from an empty deck.
+    deck.cards = []
+    def draw_list():
+        deck.cards.pop()
+    elapsed = time_shoes(deck, n_shoes, draw_list)
+    print("BlackjackDeck reset + draw:  %.2f ms/shoe" % (elapsed / n_shoes * 1000))
+
+    shoe = CompactShoe(n_decks)
+    elapsed = time_shoes(shoe, n_shoes, shoe.draw_code)
+    print("CompactShoe reset + draw_code: %.2f ms/shoe" % (elapsed / n_shoes * 1000))
+
+    elapsed = time_shoes(shoe, n_shoes, shoe.draw)
+    print("CompactShoe reset + draw:      %.2f ms/shoe" % (elapsed / n_shoes * 1000))
+
+
+if __name__ == '__main__':
+    main()
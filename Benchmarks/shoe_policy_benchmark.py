@@ -0,0 +1,48 @@
+"""
+Compare shoe policies: dealing to the end of the shoe, a cut card at
+several penetrations, and a continuous shuffling machine.
+
+Plays basic strategy through the Engine with both shoe implementations and
+reports throughput and house edge for each policy.
+
+Run from the project directory:
+ python3 -m Benchmarks.shoe_policy_benchmark [n_rounds] [n_decks]
+"""
+import random
+import sys
+import time
+
+from Analysis.BasicStrategy import BasicStrategy
+from Deck.BlackjackDeck import BlackjackDeck
+from Deck.CompactShoe import CompactShoe
+from Simulation.Engine import Engine
+
+POLICIES = [
+    ('Deal to empty', {}),
+    ('Cut card 75%', {'penetration': 0.75}),
+    ('Cut card 50%', {'penetration': 0.5}),
+    ('Continuous', {'continuous': True}),
+]
+
+
+def main():
+    n_rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    n_decks = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    strategy = BasicStrategy(n_decks)
+
+    print("Rounds:", n_rounds, "Decks:", n_decks)
+    print("%-14s %-14s %12s %11s" % ("Shoe", "Policy", "rounds/s", "House edge"))
+    for shoe_class in (CompactShoe, BlackjackDeck):
+        for name, options in POLICIES:
+            deck = shoe_class(n_decks, rng=random.Random(0), **options)
+            deck.shuffle()
+            engine = Engine(1, n_decks, split=strategy.split, double=strategy.double,
+                            hit=strategy.hit, bankroll=float('inf'), deck=deck)
+            start = time.perf_counter()
+            engine.run(n_rounds)
+            rate = n_rounds / (time.perf_counter() - start)
+            print("%-14s %-14s %12.0f %11.4f" % (shoe_class.__name__, name, rate, engine.house_edge()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Cold start time of the main.py entry point.
+
+Starts main.py in a fresh interpreter, answers the setup questions (one
+player and n_decks decks) as soon as they appear, and times how long it
+takes to reach the first prompt and the first bet prompt of the game. The
+best of several runs is reported, since the first runs also pay for a
+cold disk cache. Also times building a Game in process, which is what
+every restart through main.py's loop pays.
+
+Exits with a non-zero status if the first bet prompt takes longer than
+BUDGET_MS.
+
+Run from the project directory:
+ python3 -m Benchmarks.startup_benchmark [n_runs] [n_decks]
+"""
+import os
+import subprocess
+import sys
+import time
+
+BUDGET_MS = 50
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+
+def read_until(stream, text):
+    """
+    Read stream one byte at a time until text has been seen (prompts
+    aren't followed by a newline).
+    """
+    seen = b''
+    target = text.encode()
+    while not seen.endswith(target):
+        byte = stream.read(1)
+        if not byte:
+            raise RuntimeError('main.py exited before printing ' + repr(text))
+        seen += byte
+
+
+def time_startup(n_decks):
+    """
+    Start main.py and return the seconds to its first prompt and to the
+    first bet prompt.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, MAIN], stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, bufsize=0)
+    try:
+        read_until(process.stdout, 'How many people are playing?')
+        first_prompt = time.perf_counter() - start
+        process.stdin.write(b'1\nPlayer 1\n' + str(n_decks).encode() + b'\n')
+        read_until(process.stdout, 'what is your initial bet')
+        first_bet = time.perf_counter() - start
+    finally:
+        process.kill()
+        process.wait()
+    return first_prompt, first_bet
+
+
+def time_restart(n_decks, n_games=100):
+    """
+    Return the seconds to build a Game in a warm interpreter.
+    """
+    from Game.Game import Game
+    start = time.perf_counter()
+    for i in range(n_games):
+        Game(['Player 1'], n_decks, start=False)
+    return (time.perf_counter() - start) / n_games
+
+
+def main():
+    n_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    n_decks = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    runs = [time_startup(n_decks) for i in range(n_runs)]
+    first_prompt = min(run[0] for run in runs)
+    first_bet = min(run[1] for run in runs)
+    restart = time_restart(n_decks)
+
+    print("First prompt:     %.1f ms" % (first_prompt * 1000))
+    print("First bet prompt: %.1f ms (budget %d ms)" % (first_bet * 1000, BUDGET_MS))
+    print("New game (%d decks, warm): %.2f ms" % (n_decks, restart * 1000))
+    if first_bet * 1000 > BUDGET_MS:
+        print("FAIL")
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""
+Benchmark suite for the deck, hand scoring and full rounds.
+
+Every benchmark is seeded, warmed up once, then timed over several
+repeats of a fixed number of operations. Results (median, min and
+standard deviation of the time per operation) are saved as JSON, and
+compare reports the change between two result files, flagging any
+benchmark that got slower by more than a threshold.
+
+Timings only compare on the same machine and Python, so no baseline is
+committed. Record one locally from the commit to compare against, then
+run the suite again on the change:
+ git stash
+ python3 -m Benchmarks.suite run -o Benchmarks/baselines/local.json
+ git stash pop
+ python3 -m Benchmarks.suite run -o results.json
+ python3 -m Benchmarks.suite compare Benchmarks/baselines/local.json results.json
+Benchmarks/baselines is ignored by git. compare exits with status 1 if
+anything regressed, and warns when the two files come from different
+machines or Python versions.
+
+Run from the project directory:
+ python3 -m Benchmarks.suite run [-o results.json] [-k filter] [--repeats 7]
+ python3 -m Benchmarks.suite compare baseline.json results.json [--threshold 0.1]
+"""
+import argparse
+from contextlib import redirect_stdout
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from Deck.BlackjackDeck import BlackjackDeck
+from Deck.Card import Card
+from Game.Game import Game
+from Game.Hand import Hand
+
+SEED = 0
+
+
+def scripted_answers(prompt=''):
+    """
+    Input source for benchmark players: bet $10, stand, keep playing.
+    """
+    if 'what is your initial bet' in prompt:
+        return '10'
+    if prompt.startswith('Bet $') or 'keep playing' in prompt:
+        return 'y'
+    if 'stay (S) or hit (H)' in prompt:
+        return 's'
+    return 'n'
+
+
+# Each benchmark takes the number of operations to run and returns the
+# function that runs them. Setup happens before the function is returned.
+
+def bench_deck_construct(n):
+    def run():
+        for i in range(n):
+            BlackjackDeck(8)
+    return run
+
+
+def bench_reset_deck(n):
+    deck = BlackjackDeck(8, rng=random.Random(SEED))
+
+    def run():
+        for i in range(n):
+            deck.cards = []
+            deck.discards = []
+            deck.remaining = [0] * 10
+            deck.reset_deck()
+    return run
+
+
+def bench_shuffle(n):
+    deck = BlackjackDeck(8, rng=random.Random(SEED))
+
+    def run():
+        for i in range(n):
+            deck.shuffle()
+    return run
+
+
+def bench_draw(n):
+    deck = BlackjackDeck(8, rng=random.Random(SEED))
+    deck.shuffle()
+    cards = list(deck.cards)
+    remaining = list(deck.remaining)
+
+    def run():
+        # Draw the whole shoe n / len(cards) times.
+        for i in range(n // len(cards)):
+            deck.cards = list(cards)
+            deck.remaining = list(remaining)
+            draw = deck.draw
+            for j in range(len(cards)):
+                draw()
+    return run
+
+
+def bench_score_hand(n_cards, n_aces):
+    values = ['Ace'] * n_aces + ['2', '3', '2', '2', '3', '2', '2', '3'][:n_cards - n_aces]
+    hand = Hand(10)
+    for value in values:
+        hand.add_card(Card('Spades', value))
+
+    def bench(n):
+        def run():
+            score = hand.score_hand
+            for i in range(n):
+                score()
+        return run
+    return bench
+
+
+def bench_compute_reward(n):
+    rng = random.Random(SEED)
+    pairs = []
+    for i in range(64):
+        hand = Hand(10)
+        for j in range(rng.randint(2, 4)):
+            hand.add_card(Card('Hearts', rng.choice(['2', '5', '7', '9', 'King', 'Ace'])))
+        pairs.append((hand, rng.randint(17, 26)))
+
+    def run():
+        for i in range(n // len(pairs)):
+            for hand, dealer_score in pairs:
+                hand.compute_reward(dealer_score)
+    return run
+
+
+def bench_game_round(n_seats):
+    def bench(n):
+        random.seed(SEED)
+        game = Game(['Player ' + str(i + 1) for i in range(n_seats)], 6, penetration=0.75,
+                    seed=SEED, start=False)
+        for player in game.players:
+            player.input = scripted_answers
+            player.money = 10**12
+        with redirect_stdout(io.StringIO()):
+            game.deck.shuffle()
+
+        def run():
+            out = io.StringIO()
+            with redirect_stdout(out):
+                for i in range(n):
+                    game.play_round()
+                    out.seek(0)
+                    out.truncate()
+        return run
+    return bench
+
+
+# (name, benchmark, operations per repeat)
+BENCHMARKS = [
+    ('deck_construct_8', bench_deck_construct, 200),
+    ('deck_reset_8', bench_reset_deck, 200),
+    ('deck_shuffle_8', bench_shuffle, 200),
+    ('deck_draw', bench_draw, 416 * 20),
+]
+for _n_cards, _n_aces in [(2, 0), (2, 1), (4, 0), (4, 2), (6, 3), (8, 0), (8, 4)]:
+    BENCHMARKS.append(('score_hand_%dc_%da' % (_n_cards, _n_aces),
+                       bench_score_hand(_n_cards, _n_aces), 100000))
+BENCHMARKS.append(('compute_reward', bench_compute_reward, 64 * 1000))
+for _n_seats in range(1, 8):
+    BENCHMARKS.append(('game_round_%dseat' % _n_seats, bench_game_round(_n_seats), 1000))
+
+
+def time_benchmark(bench, n_ops, repeats):
+    """
+    Time a benchmark. Return a dict of seconds per operation.
+    """
+    random.seed(SEED)
+    bench(max(1, n_ops // 10))()     # Warm up
+    times = []
+    for i in range(repeats):
+        run = bench(n_ops)
+        start = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - start) / n_ops)
+    return {'median': statistics.median(times), 'min': min(times),
+            'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+            'repeats': repeats, 'ops': n_ops}
+
+
+def run_suite(args):
+    results = {}
+    for name, bench, n_ops in BENCHMARKS:
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = time_benchmark(bench, n_ops, args.repeats)
+        print("%-22s %12.3f us  +- %.3f" % (name, results[name]['median'] * 1e6,
+                                            results[name]['stdev'] * 1e6))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'benchmarks': results}, f, indent=1, sort_keys=True)
+        print("Saved", args.output)
+
+
+def compare(args):
+    """
+    Compare two result files. Return the names of regressed benchmarks.
+    """
+    with open(args.baseline) as f:
+        baseline_file = json.load(f)
+    with open(args.results) as f:
+        results_file = json.load(f)
+    baseline = baseline_file['benchmarks']
+    results = results_file['benchmarks']
+    for key in ('machine', 'python'):
+        if baseline_file.get(key) != results_file.get(key):
+            print("Warning: the files were recorded with different %s (%s, %s), so the "
+                  "timings may not compare." % (key, baseline_file.get(key), results_file.get(key)))
+
+    regressions = []
+    print("%-22s %12s %12s %8s" % ("Benchmark", "baseline us", "current us", "change"))
+    for name in sorted(set(baseline) & set(results)):
+        before = baseline[name]['median']
+        after = results[name]['median']
+        change = after / before - 1
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print("%-22s %12.3f %12.3f %+7.1f%%%s" % (name, before * 1e6, after * 1e6,
+                                                  change * 100, flag))
+    for path, names in ((args.baseline, set(baseline) - set(results)),
+                        (args.results, set(results) - set(baseline))):
+        if names:
+            print(len(names), "benchmarks only in", path)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Blackjack benchmark suite.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='Run the benchmarks.')
+    run_parser.add_argument('-o', '--output', help='Save the results to this JSON file.')
+    run_parser.add_argument('-k', '--filter', help='Only run benchmarks whose name contains this.')
+    run_parser.add_argument('--repeats', type=int, default=7)
+    compare_parser = commands.add_parser('compare', help='Compare two result files.')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='Fractional slowdown reported as a regression.')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run_suite(args)
+    elif compare(args):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
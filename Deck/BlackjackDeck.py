@@ -3,42 +3,259 @@ Alex Kaplan
 1/13/18
 
 Implementation of a Blackjack card deck (multiple standard decks).
+
+Besides the running count, the shoe answers queries about how its
+composition has changed since the last shuffle: cards left of each rank
+(get_composition), rank densities, how far into the shoe the deal is,
+clumping of the dealt cards (serial_correlation) and each rank's share
+of the change in the player's expectation (removal_effects). Every query
+is computed from counters that draw keeps up to date, so none of them
+look at the cards themselves. Simulation.ShoeSeries computes the same
+series for every round of whole shoes at once.
 """
-from Deck.Deck import Deck
+from Deck.CountingSystem import HI_LO
+from Deck.Deck import Deck, DECK_TEMPLATE
+
+# Unshuffled shoes by number of decks, added whenever a shoe is filled.
+_SHOE_TEMPLATES = {}
+
+
+def shoe_template(n_decks):
+    """
+    Return the cards of an unshuffled n_decks shoe (shared, don't modify).
+    """
+    template = _SHOE_TEMPLATES.get(n_decks)
+    if template is None:
+        template = _SHOE_TEMPLATES[n_decks] = DECK_TEMPLATE * n_decks
+    return template
+
 
 class BlackjackDeck(Deck):
-    def __init__(self, n_decks):
+    def __init__(self, n_decks, rng=None, counting_system=HI_LO,
+                 penetration=None, continuous=False):
         """
         Initialize a Deck for blackjack, consisting of cards from
         n_decks standard 52 card Decks.
         
         Args:
          :Int n_decks: Number of decks to include in the blackjack deck
+         :Random rng: Random number generator used to shuffle (see Deck)
+         :CountingSystem counting_system: System used for the running count
+         :Float penetration: Fraction of the shoe dealt before the cut card
+            comes out (e.g. 0.75). The shoe is reshuffled at the start of the
+            next round. None deals until the shoe is empty.
+         :Bool continuous: Continuous shuffling machine. Discards are shuffled
+            back into the shoe at the start of every round.
         """
-        # Initalize a Deck
-        Deck.__init__(self)
+        # Initalize a Deck (fill_deck adds all n_decks decks of cards)
         self.n_decks = n_decks
-        # Extend the blackjack deck to consist of n_decks Decks of cards
-        self._expand_deck()
+        Deck.__init__(self, rng)
+
+        # Running count of the cards dealt since the last shuffle.
+        self.counting_system = counting_system
+        self.count_tags = counting_system.tags
+        self.running = counting_system.initial_count(n_decks)
+        # Sum of the products of the tags of consecutive dealt cards, and
+        # the tag of the last card dealt (see serial_correlation).
+        self.tag_pairs = 0
+        self.last_tag = 0
+
+        # Shoe policy
+        self.penetration = penetration
+        self.continuous = continuous
+        self.discards = []          # Cards played since the last shuffle.
+        # Number of cards left in the shoe when the cut card comes out.
+        if penetration is None:
+            self.cut_card = 0
+        else:
+            self.cut_card = int(round(n_decks * 52 * (1 - penetration)))
 
     
-    def _expand_deck(self):
+    def fill_deck(self):
         """
-        Called on initialization and reset.
-        Extend the deck to include each card n_decks times.
+        Override Deck method.
+
+        Called on initialization and reset. Add n_decks decks of cards
+        (references to the interned cards, see Card).
         """
-        # There is a single deck by default. 
-        # Create new cards n_decks-1 more times
-        for i in range(self.n_decks-1):
-            self.fill_deck()
+        self.cards.extend(shoe_template(self.n_decks))
+        remaining = self.remaining
+        for rank in range(9):
+            remaining[rank] += 4 * self.n_decks
+        remaining[9] += 16 * self.n_decks
     
     def reset_deck(self):
         """
         Override Deck method.
 
-        Called when all cards have been used. 
-        Reset the deck to n_decks * 52 shuffled cards.
+        Called when all cards have been used or the cut card was reached.
+        Shuffle the discards back into the shoe. If no discards were
+        collected, reset the deck to n_decks * 52 shuffled cards.
         """
-        self.fill_deck()
-        self._expand_deck()
+        if self.discards:
+            for card in self.discards:
+                self.remaining[card.rank_index()] += 1
+            self.cards.extend(self.discards)
+            self.discards = []
+        else:
+            self.fill_deck()
         self.shuffle()
+        self.running = self.counting_system.initial_count(self.n_decks)
+        self.tag_pairs = 0
+        self.last_tag = 0
+
+    def discard(self, cards):
+        """
+        Place cards that have been played on the discard pile.
+        Args:
+         :List cards: Card objects to discard.
+        """
+        self.discards.extend(cards)
+
+    def needs_shuffle(self):
+        """
+        Return True if the cut card has come out.
+        """
+        return self.penetration is not None and len(self.cards) <= self.cut_card
+
+    def start_round(self):
+        """
+        Apply the shoe policy at a round boundary. Reshuffles after the cut
+        card has come out, or returns the discards to a continuous shuffler.
+        """
+        if self.continuous:
+            self._reinsert_discards()
+        elif self.needs_shuffle():
+            self.reset_deck()
+
+    def _reinsert_discards(self):
+        """
+        Insert each discard at a uniformly random position in the shoe
+        (inside-out Fisher-Yates), keeping the shoe a uniform shuffle
+        without reshuffling the cards already in it.
+        """
+        cards = self.cards
+        randrange = self.rng.randrange
+        tags = self.count_tags
+        remaining = self.remaining
+        for card in self.discards:
+            rank = card.rank_index()
+            remaining[rank] += 1
+            # The card is back in the shoe, so it no longer counts as dealt.
+            self.running -= tags[rank]
+            j = randrange(len(cards) + 1)
+            cards.append(card)
+            cards[j], cards[-1] = cards[-1], cards[j]
+        self.discards = []
+        # Clumping is measured from here, as after a shuffle.
+        self.tag_pairs = 0
+        self.last_tag = 0
+
+    def draw(self):
+        """
+        Override Deck method.
+
+        Draw a card and add its tag to the running count and the clumping
+        sums. Deck.draw is inlined, as this is called for every card dealt.
+        """
+        if not self.cards:
+            self.reset_deck()
+        card = self.cards.pop()
+        rank = card.rank_index()
+        self.remaining[rank] -= 1
+        tag = self.count_tags[rank]
+        self.running += tag
+        self.tag_pairs += tag * self.last_tag
+        self.last_tag = tag
+        return card
+
+    def running_count(self):
+        """
+        Return the running count.
+        """
+        return self.running
+
+    def decks_remaining(self):
+        """
+        Return the number of decks left to deal (fractional).
+        """
+        return len(self.cards) / 52
+
+    def true_count(self):
+        """
+        Return the running count divided by the number of decks remaining.
+        """
+        decks = len(self.cards) / 52
+        if decks == 0:
+            return float(self.running)
+        return self.running / decks
+
+    def full_composition(self):
+        """
+        Return the composition of the full shoe (see get_composition).
+        """
+        return (4 * self.n_decks,) * 9 + (16 * self.n_decks,)
+
+    def dealt_fraction(self):
+        """
+        Return the fraction of the shoe dealt since the last shuffle (the
+        penetration reached so far).
+        """
+        return 1 - len(self.cards) / (52 * self.n_decks)
+
+    def rank_densities(self):
+        """
+        Return the fraction of the remaining cards of each rank, indexed by
+        Card.rank_index.
+        """
+        n_cards = len(self.cards)
+        if n_cards == 0:
+            return (0.0,) * 10
+        return tuple(count / n_cards for count in self.remaining)
+
+    def serial_correlation(self):
+        """
+        Return the correlation between the counting tags of consecutive
+        cards dealt since the last shuffle, a measure of clumping: near 0
+        for a well shuffled shoe, positive when high and low cards come out
+        in runs. 0.0 until at least three cards have been dealt.
+        """
+        tags = self.count_tags
+        n = total = squares = 0
+        for rank, (full, left) in enumerate(zip(self.full_composition(), self.remaining)):
+            dealt = full - left
+            n += dealt
+            total += dealt * tags[rank]
+            squares += dealt * tags[rank] * tags[rank]
+        if n < 3:
+            return 0.0
+        mean = total / n
+        variance = squares / n - mean * mean
+        if variance <= 0:
+            return 0.0
+        return (self.tag_pairs / (n - 1) - mean * mean) / variance
+
+    def removal_effects(self, effects=None):
+        """
+        Return each rank's share of the estimated change in the player's
+        expectation (per unit bet) caused by the cards dealt since the last
+        shuffle (see Analysis.EffectOfRemoval).
+        Args:
+         :Tuple effects: Single deck effect of removal of each rank.
+            Defaults to the EORs Analysis.EffectOfRemoval solves for the
+            default rules (use load_effects(rules=...) for other tables).
+        """
+        # Imported here, as the Analysis package imports this module.
+        from Analysis.EffectOfRemoval import load_effects, removal_effects
+        if effects is None:
+            effects = load_effects()
+        return removal_effects(self.remaining, self.full_composition(), effects)
+
+    def advantage_shift(self, effects=None):
+        """
+        Return the estimated change in the player's expectation (per unit
+        bet) from the cards dealt since the last shuffle.
+        Args:
+         :Tuple effects: See removal_effects.
+        """
+        return sum(self.removal_effects(effects))
@@ -6,48 +6,103 @@ Representation of a playing card.
 """
 
 
+# Valid suit names
+SUITS = ["Diamonds", "Hearts", "Clubs", "Spades"]
+# Card values, in card code order (see Deck.card_code)
+VALUES = [str(card_val) for card_val in range(2, 11)] + ["Jack", "Queen", "King", "Ace"]
+
+# Text drawn in place of a face down card.
+HIDDEN_CARD = 'Hidden Card'
+
+
 class Card:
-    def __init__(self, suit, value):
+    """
+    Immutable playing card. There is a single Card for each of the 52
+    (suit, value) pairs: Card(suit, value) returns the shared instance, so
+    shoes and hands only hold references to them. Whether a card is face
+    down belongs to the Hand holding it, not the card.
+    """
+    __slots__ = ('suit', 'value', '_int_value', '_rank_index')
+
+    _interned = {}      # (suit, value) -> Card
+
+    def __new__(cls, suit, value):
         """
-        Initialize a card 
+        Return the card
         Args:
          :String suit: Card's suit - Diamonds, Hearts, Spades, Clubs
          :String value: Card value as a String - # 2-10, Jack, Queen, King, Ace
         """
-        self.suit = suit
-        self.value = value
-        self.hidden = False     # Prevents the value form being printed or scored.
+        try:
+            return Card._interned[(suit, value)]
+        except KeyError:
+            raise ValueError('No such card: ' + str(value) + ' of ' + str(suit)) from None
 
-    def print_card(self):
+    @classmethod
+    def _create(cls, suit, value):
         """
-        Print the card
+        Build and intern the card for (suit, value). Only called for the
+        52 cards of a standard deck, when this module is loaded.
         """
-        if self.hidden:
-            print('Hidden Card')
-        else:
-            print(self.value, "of", self.suit)
+        card = object.__new__(cls)
+        int_value = Card._parse_value(value)
+        object.__setattr__(card, 'suit', suit)
+        object.__setattr__(card, 'value', value)
+        object.__setattr__(card, '_int_value', int_value)
+        object.__setattr__(card, '_rank_index', 0 if int_value == 11 else int_value - 1)
+        Card._interned[(suit, value)] = card
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Cards are immutable')
 
-    def hide(self):
+    def __delattr__(self, name):
+        raise AttributeError('Cards are immutable')
+
+    def __reduce__(self):
+        # Unpickles to the interned card.
+        return (Card, (self.suit, self.value))
+
+    @staticmethod
+    def _parse_value(value):
         """
-        Hide the value of a card so that it wont be displyed
+        Blackjack value of a card value string. Aces count as 11.
         """
-        self.hidden = True
-    
-    def show(self):
+        # Number
+        if value.isdigit():
+            return int(value)
+        # Ace
+        elif value == 'Ace':
+            return 11
+        # Face card
+        return 10
+
+    def render(self):
         """
-        Set a card to visible
+        Return the card as text, e.g. 'Ace of Spades'.
         """
-        self.hidden = False
+        return self.value + " of " + self.suit
+
+    def print_card(self):
+        """
+        Print the card
+        """
+        print(self.render())
 
     def int_value(self):
         """
-        Integer value of the card
+        Integer value of the card (parsed once, when the card is interned)
         """
-        # Number
-        if self.value.isdigit():
-            return int(self.value)
-        # Ace
-        elif self.value == 'Ace':
-            return 11
-        # Face card
-        return 10
\ No newline at end of file
+        return self._int_value
+
+    def rank_index(self):
+        """
+        Index of the card's blackjack rank in a shoe composition:
+        0 for Ace, 1-8 for 2-9 and 9 for any ten valued card.
+        """
+        return self._rank_index
+
+
+for _value in VALUES:
+    for _suit in SUITS:
+        Card._create(_suit, _value)
+del _value, _suit
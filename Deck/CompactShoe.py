@@ -0,0 +1,198 @@
+"""
+Compact blackjack shoe for simulation.
+
+Holds n_decks * 52 cards as small integer codes in a single preallocated
+array. A code is the card's position in Deck.fill_deck order, so
+code >> 2 indexes VALUES and code & 3 indexes SUITS.
+Drawing advances a cursor and reshuffling permutes the array in place, so
+the shoe itself holds no Card objects. The interned Card is only looked up
+when one is drawn with draw() or something needs to display the remaining cards.
+"""
+from array import array
+import random
+
+from Deck.CountingSystem import HI_LO
+from Deck.Deck import DECK_TEMPLATE
+
+
+# Card.rank_index for each card code: 2-9, four ten valued cards, then Aces.
+CODE_RANK_INDEX = [min(code >> 2, 8) + 1 for code in range(48)] + [0] * 4
+
+
+def card_from_code(code):
+    """
+    Return the (interned) Card represented by a card code.
+    Args:
+     :Int code: Card code (0-51)
+    """
+    return DECK_TEMPLATE[code]
+
+
+class CompactShoe:
+    def __init__(self, n_decks, rng=None, counting_system=HI_LO,
+                 penetration=None, continuous=False):
+        """
+        Initialize an unshuffled shoe of n_decks standard 52 card decks.
+        Args:
+         :Int n_decks: Number of decks to include in the shoe
+         :Random rng: Random number generator used to shuffle (see Deck)
+         :CountingSystem counting_system: System used for the running count
+         :Float penetration: Cut card position (see BlackjackDeck)
+         :Bool continuous: Continuous shuffling machine (see BlackjackDeck)
+        """
+        self.rng = rng if rng is not None else random
+        self.n_decks = n_decks
+        self.codes = array('B', range(52)) * n_decks
+        self.cursor = 0     # Index of the next card to be drawn.
+
+        # Cards left of each rank and the running count since the last shuffle.
+        self.counting_system = counting_system
+        self.code_tags = [counting_system.tags[rank] for rank in CODE_RANK_INDEX]
+        self._restore_counts()
+
+        # Shoe policy. Dealt cards are implicitly discarded (everything
+        # before the cursor), so reshuffling never needs to collect them.
+        self.penetration = penetration
+        self.continuous = continuous
+        # Cursor position of the cut card.
+        self.cut_card = int(round(len(self.codes) * (penetration or 0)))
+        if continuous:
+            # Every draw picks a random card from the rest of the shoe, so
+            # returning the discards is just moving the cursor back.
+            self.draw_code = self._draw_code_continuous
+
+    def _restore_counts(self):
+        """
+        Reset the per-rank counts and running count to a full shoe.
+        """
+        self.remaining = [4 * self.n_decks] * 9 + [16 * self.n_decks]
+        self.running = self.counting_system.initial_count(self.n_decks)
+
+    @property
+    def cards(self):
+        """
+        Remaining cards as Card objects, in the same order as Deck.cards
+        (the last card is drawn next). Built on demand for display only.
+        """
+        return [card_from_code(code) for code in reversed(self.codes[self.cursor:])]
+
+    def shuffle(self):
+        """
+        Randomize the order of the cards remaining in the shoe (in place).
+        """
+        if self.cursor == 0:
+            self.rng.shuffle(self.codes)
+        else:
+            remaining = self.codes[self.cursor:]
+            self.rng.shuffle(remaining)
+            self.codes[self.cursor:] = remaining
+
+    def reset_deck(self):
+        """
+        Return every card to the shoe and shuffle.
+        """
+        self.cursor = 0
+        self._restore_counts()
+        self.shuffle()
+
+    def draw_code(self):
+        """
+        Draw the next card as a card code. Reshuffles when the shoe is empty.
+        """
+        if self.cursor == len(self.codes):
+            self.reset_deck()
+        code = self.codes[self.cursor]
+        self.cursor += 1
+        self.remaining[CODE_RANK_INDEX[code]] -= 1
+        self.running += self.code_tags[code]
+        return code
+
+    def _draw_code_continuous(self):
+        """
+        draw_code for a continuous shuffler: swap a uniformly random card
+        from the rest of the shoe to the cursor and draw it.
+        """
+        codes = self.codes
+        cursor = self.cursor
+        if cursor == len(codes):
+            self.cursor = cursor = 0
+            self._restore_counts()
+        j = self.rng.randrange(cursor, len(codes))
+        code = codes[j]
+        codes[j] = codes[cursor]
+        codes[cursor] = code
+        self.cursor = cursor + 1
+        self.remaining[CODE_RANK_INDEX[code]] -= 1
+        self.running += self.code_tags[code]
+        return code
+
+    def discard(self, cards):
+        """
+        Cards played from this shoe are already behind the cursor, so there
+        is nothing to collect. Kept for the same interface as BlackjackDeck.
+        """
+        pass
+
+    def needs_shuffle(self):
+        """
+        Return True if the cut card has come out.
+        """
+        return self.penetration is not None and self.cursor >= self.cut_card
+
+    def start_round(self):
+        """
+        Apply the shoe policy at a round boundary. Reshuffles after the cut
+        card has come out, or returns every dealt card to a continuous shuffler.
+        """
+        if self.continuous:
+            self.cursor = 0
+            self._restore_counts()
+        elif self.needs_shuffle():
+            self.reset_deck()
+
+    def draw(self):
+        """
+        Draw the next card as a Card object.
+        """
+        return card_from_code(self.draw_code())
+
+    def get_num_cards(self):
+        """
+        Return number of cards remaining in the shoe.
+        """
+        return len(self.codes) - self.cursor
+
+    def get_composition(self):
+        """
+        Return the remaining cards as a tuple of 10 counts indexed by
+        Card.rank_index (Aces, 2-9, then all ten valued cards).
+        """
+        return tuple(self.remaining)
+
+    def running_count(self):
+        """
+        Return the running count.
+        """
+        return self.running
+
+    def decks_remaining(self):
+        """
+        Return the number of decks left to deal (fractional).
+        """
+        return (len(self.codes) - self.cursor) / 52
+
+    def true_count(self):
+        """
+        Return the running count divided by the number of decks remaining.
+        """
+        decks = (len(self.codes) - self.cursor) / 52
+        if decks == 0:
+            return float(self.running)
+        return self.running / decks
+
+    def print_deck(self):
+        """
+        Print the cards remaining in the shoe.
+        """
+        for card in self.cards:
+            card.print_card()
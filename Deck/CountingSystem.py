@@ -0,0 +1,40 @@
+"""
+Card counting systems.
+
+A system assigns a tag to every blackjack rank (indexed by Card.rank_index:
+Aces, 2-9, then ten valued cards). The running count is the sum of the tags
+of every card dealt since the last shuffle, plus the system's initial
+running count.
+"""
+
+
+class CountingSystem:
+    def __init__(self, name, tags, irc_per_deck=0, irc_offset=0):
+        """
+        Initialize a counting system
+        Args:
+         :String name: Name of the system
+         :Tuple tags: Tag for each rank index.
+         :Int irc_per_deck: Initial running count added per deck
+            (unbalanced systems).
+         :Int irc_offset: Constant part of the initial running count.
+        """
+        self.name = name
+        self.tags = tuple(tags)
+        self.irc_per_deck = irc_per_deck
+        self.irc_offset = irc_offset
+
+    def initial_count(self, n_decks):
+        """
+        Running count at the start of a shoe of n_decks decks.
+        """
+        return self.irc_offset + self.irc_per_deck * n_decks
+
+
+#                    A   2  3  4  5  6  7  8  9  10
+HI_LO = CountingSystem('Hi-Lo', (-1, 1, 1, 1, 1, 1, 0, 0, 0, -1))
+# KO is unbalanced (7s count +1), so it starts at 4 - 4 * n_decks.
+KO = CountingSystem('KO', (-1, 1, 1, 1, 1, 1, 1, 0, 0, -1), irc_per_deck=-4, irc_offset=4)
+OMEGA_II = CountingSystem('Omega II', (0, 1, 1, 2, 2, 2, 1, 0, -1, -2))
+
+SYSTEMS = {system.name: system for system in (HI_LO, KO, OMEGA_II)}
@@ -7,42 +7,53 @@ Implementation of a deck of cards.
 
 import random
 
-from Deck.Card import Card
+from Deck.Card import Card, SUITS, VALUES
+
+# Card code (position in fill_deck order) for each (suit, value)
+CARD_CODES = {(suit, value): v_idx * 4 + s_idx
+              for v_idx, value in enumerate(VALUES) for s_idx, suit in enumerate(SUITS)}
+
+# The 52 interned cards in card code order. fill_deck adds references to
+# them, so filling a deck never creates a Card.
+DECK_TEMPLATE = tuple(Card(suit, value) for value in VALUES for suit in SUITS)
+
+def card_code(card):
+    """
+    Return the card code of a Card (see Deck.CompactShoe).
+    """
+    return CARD_CODES[(card.suit, card.value)]
 
 class Deck:
-    def __init__(self):
+    def __init__(self, rng=None):
         """
         Instantiate a deck of 52 cards (unshuffled).
+        Args:
+         :Random rng: Random number generator used to shuffle. Defaults to
+            the global random module. Pass a seeded random.Random for
+            reproducible shuffles.
         """
+        self.rng = rng if rng is not None else random
         self.cards = []
+        # Cards left of each rank (indexed by Card.rank_index).
+        self.remaining = [0] * 10
         self.fill_deck()
 
     def fill_deck(self):
         """
-        Create all 52 cards present in a standard deck and append them
-        to the internal set.
+        Append all 52 cards present in a standard deck to the internal set.
         """
-        # Valid suit names
-        suits = ["Diamonds", "Hearts", "Clubs", "Spades"]
-
-        # Add a card from each suit for all numbers 2-10
-        for card_val in range(2, 11):
-            for suit in suits:
-                new_card = Card(suit, str(card_val))            
-                self.cards.append(new_card)
-
-        # Add all face cards
-        faces = ["Jack", "Queen", "King", "Ace"]
-        for face in faces:
-            for suit in suits:
-                new_card = Card(suit, face)
-                self.cards.append(new_card)
+        # Add a card from each suit for all numbers 2-10, then all face cards
+        self.cards.extend(DECK_TEMPLATE)
+        remaining = self.remaining
+        for rank in range(9):
+            remaining[rank] += 4
+        remaining[9] += 16
 
     def shuffle(self):
         """
         Randomize the order of the cards in the deck
         """
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
 
     def reset_deck(self):
         """
@@ -61,7 +72,9 @@ class Deck:
             self.reset_deck()
         
         # Return a card from the deck.
-        return self.cards.pop()
+        card = self.cards.pop()
+        self.remaining[card.rank_index()] -= 1
+        return card
 
     def get_num_cards(self):
         """
@@ -69,6 +82,13 @@ class Deck:
         """
         return len(self.cards)
 
+    def get_composition(self):
+        """
+        Return the remaining cards as a tuple of 10 counts indexed by
+        Card.rank_index (Aces, 2-9, then all ten valued cards).
+        """
+        return tuple(self.remaining)
+
     def print_deck(self):
         """
         Print the cards in the deck.
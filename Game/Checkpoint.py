@@ -0,0 +1,281 @@
+"""
+Deterministic replay and checkpointing of a Game session.
+
+A seeded Game is fully determined by its configuration and the answers its
+human players type. CheckpointStore records both: it wraps every human
+player's input source to log their answers round by round, and every
+interval rounds (and once before the first round) takes a snapshot of the
+whole table - the shoe order and discards as card codes (see
+Deck.CompactShoe), the running count, every seat's money and hands, the
+dealer's hand and the state of the game's random number generator.
+
+Snapshots between two reshuffles only store what changed since the last
+full snapshot (how many cards are left and the newly discarded cards),
+since the shoe itself is a prefix of the one already saved.
+
+replay(store, n) rebuilds the game as it stood after round n by restoring
+the nearest snapshot at or before n and playing the remaining rounds (at
+most interval - 1) with the recorded answers. The store can also append
+everything to a file as it goes, so a crashed session can be loaded with
+CheckpointStore.load and resumed.
+"""
+from collections import deque
+import pickle
+
+from Deck.CompactShoe import card_from_code
+from Deck.Deck import card_code
+from Game.Hand import Hand
+from Game.Renderer import QUIET
+
+
+def _hand_state(hand):
+    """
+    Snapshot of a hand: (card codes, hidden flags, bet, actions).
+    """
+    return ([card_code(card) for card in hand.cards],
+            [i in hand.hidden for i in range(len(hand.cards))],
+            hand.get_bet(), hand.actions)
+
+
+def _restore_hand(state, rules):
+    """
+    Build a Hand from a snapshot made by _hand_state.
+    """
+    codes, hidden, bet, actions = state
+    hand = Hand(bet, rules)
+    for code, is_hidden in zip(codes, hidden):
+        hand.add_card(card_from_code(code), is_hidden)
+    hand.actions = actions
+    return hand
+
+
+def _player_state(seat, player):
+    """
+    Snapshot of a seat: (seat, money, initial bet, hands).
+    """
+    return (seat, player.money, player.initial_bet,
+            [_hand_state(hand) for hand in player.hands])
+
+
+class CheckpointStore:
+    def __init__(self, interval=10, path=None):
+        """
+        Initialize an empty store.
+        Args:
+         :Int interval: Rounds between snapshots. Replaying to any round
+            plays at most interval - 1 rounds.
+         :String path: Optional file every snapshot and round of answers
+            is appended to.
+        """
+        self.interval = interval
+        self.path = path
+        self.config = None
+        self.snapshots = {}         # Round number -> snapshot
+        self.inputs = []            # Answers given in each round, as (seat, answer)
+        self.pending = []           # Answers given in the current round
+        self.seats = []             # Players in seat order when the game started
+        self.last_full = None       # Round of the most recent full snapshot
+        self.file = None
+
+    def attach(self, game):
+        """
+        Called by Game once the table is set. Saves the game's configuration
+        and starts recording every human player's answers.
+        """
+        if game.seed is None:
+            game.renderer.print('Warning: an unseeded game cannot be replayed.')
+        self.config = {'player_names': list(game.player_names), 'n_decks': game.n_decks,
+                       'n_strategy_players': game.n_strategy_players,
+                       'penetration': game.penetration, 'seed': game.seed, 'rules': game.rules,
+                       'interval': self.interval}
+        self.seats = list(game.players)
+        for seat, player in enumerate(self.seats):
+            if player.is_human:
+                player.input = self._recorder(seat, player.input)
+        if self.path is not None:
+            self.file = open(self.path, 'wb')
+            self._append('config', self.config)
+
+    def _recorder(self, seat, input_source):
+        """
+        Wrap an input source so every answer is recorded for the seat.
+        """
+        def record(prompt=''):
+            answer = input_source(prompt)
+            self.pending.append((seat, answer))
+            return answer
+        return record
+
+    def after_round(self, game):
+        """
+        Called by Game before the first round and after every round.
+        Stores the round's answers and takes a snapshot every interval rounds.
+        """
+        if game.round_number > 0:
+            self.inputs.append(self.pending)
+            self._append('inputs', self.pending)
+            self.pending = []
+        if game.round_number % self.interval == 0:
+            snapshot = self.take_snapshot(game)
+            self.snapshots[game.round_number] = snapshot
+            self._append('snapshot', (game.round_number, snapshot))
+
+    def take_snapshot(self, game):
+        """
+        Snapshot the table. Returns a delta against the last full snapshot
+        when the shoe hasn't been reshuffled since.
+        """
+        deck = game.deck
+        cards = [card_code(card) for card in deck.cards]
+        discards = [card_code(card) for card in deck.discards]
+        state = {
+            'round': game.round_number,
+            'remaining': list(deck.remaining),
+            'running': deck.running,
+            'tag_pairs': (deck.tag_pairs, deck.last_tag),
+            'rng': game.rng.getstate(),
+            'players': [_player_state(self.seats.index(player), player)
+                        for player in game.players],
+            'dealer': [_hand_state(hand) for hand in game.dealer.hands],
+        }
+
+        # Cards are drawn from the end of the shoe and discards are appended,
+        # so without a reshuffle both extend the last full snapshot.
+        base = self.snapshots.get(self.last_full)
+        if (base is not None and cards == base['cards'][:len(cards)]
+                and discards[:len(base['discards'])] == base['discards']):
+            state['base'] = self.last_full
+            state['n_cards'] = len(cards)
+            state['new_discards'] = discards[len(base['discards']):]
+        else:
+            state['cards'] = cards
+            state['discards'] = discards
+            self.last_full = game.round_number
+        return state
+
+    def shoe(self, snapshot):
+        """
+        Return the (cards, discards) card codes of a snapshot.
+        """
+        if 'base' not in snapshot:
+            return snapshot['cards'], snapshot['discards']
+        base = self.snapshots[snapshot['base']]
+        return (base['cards'][:snapshot['n_cards']],
+                base['discards'] + snapshot['new_discards'])
+
+    def restore(self, game, snapshot):
+        """
+        Put a freshly created game (Game(..., start=False)) in the state
+        of a snapshot.
+        """
+        seated = list(game.players)
+        cards, discards = self.shoe(snapshot)
+        deck = game.deck
+        deck.cards = [card_from_code(code) for code in cards]
+        deck.discards = [card_from_code(code) for code in discards]
+        deck.remaining = list(snapshot['remaining'])
+        deck.running = snapshot['running']
+        deck.tag_pairs, deck.last_tag = snapshot.get('tag_pairs', (0, 0))
+        game.rng.setstate(snapshot['rng'])
+        game.round_number = snapshot['round']
+
+        game.players = []
+        for seat, money, initial_bet, hands in snapshot['players']:
+            player = seated[seat]
+            player.money = money
+            player.initial_bet = initial_bet
+            player.hands = [_restore_hand(hand, player.rules) for hand in hands]
+            game.players.append(player)
+        game.dealer.hands = [_restore_hand(hand, game.rules) for hand in snapshot['dealer']]
+
+    def _append(self, kind, record):
+        """
+        Append a record to the store's file, if it has one.
+        """
+        if self.file is not None:
+            pickle.dump((kind, record), self.file)
+            self.file.flush()
+
+    def close(self):
+        """
+        Close the store's file.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    @staticmethod
+    def load(path):
+        """
+        Load a store from a file written during a session.
+        Return a CheckpointStore holding every record in the file.
+        """
+        store = None
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    kind, record = pickle.load(f)
+                except EOFError:
+                    break
+                if kind == 'config':
+                    store = CheckpointStore(record['interval'])
+                    store.config = record
+                elif kind == 'inputs':
+                    store.inputs.append(record)
+                else:
+                    round_number, snapshot = record
+                    store.snapshots[round_number] = snapshot
+                    if 'base' not in snapshot:
+                        store.last_full = round_number
+        return store
+
+
+def _scripted(answers):
+    """
+    Input source that returns recorded answers in order.
+    """
+    def scripted(prompt=''):
+        return answers.popleft()
+    return scripted
+
+
+def replay(store, round_number, quiet=True):
+    """
+    Rebuild a game as it stood after round_number.
+    Args:
+     :CheckpointStore store: Store recorded during the original session.
+     :Int round_number: Number of rounds to have been played.
+     :Bool quiet: Hide the table talk of the replayed rounds.
+
+    Return:
+     :Game: The game, ready for play_round to continue the session.
+    """
+    # Imported here since Game imports this module's users.
+    from Game.Game import Game
+
+    if round_number > len(store.inputs):
+        raise ValueError('Only ' + str(len(store.inputs)) + ' rounds were recorded.')
+    config = dict(store.config)
+    del config['interval']
+    game = Game(start=False, **config)
+    seated = list(game.players)
+    sources = [player.input for player in seated]
+
+    start = max(n for n in store.snapshots if n <= round_number)
+    store.restore(game, store.snapshots[start])
+
+    level = game.renderer.level
+    if quiet:
+        game.renderer.level = QUIET
+    for round_inputs in store.inputs[start:round_number]:
+        answers = [deque() for player in seated]
+        for seat, answer in round_inputs:
+            answers[seat].append(answer)
+        for player, seat_answers in zip(seated, answers):
+            player.input = _scripted(seat_answers)
+        game.play_round()
+    game.renderer.level = level
+
+    for player, source in zip(seated, sources):
+        player.input = source
+    return game
@@ -3,134 +3,324 @@ Alex Kaplan
 1/13/18
 
 Manager of Blackjack Game. 
-Follows all standard blackjack rules, excluding insurance and surrendering.
+Follows all standard blackjack rules (see Rules for the table variants).
 Allows players to:
+ - Take insurance when the dealer shows an Ace, before the dealer checks
+    for blackjack.
+ - Surrender their first two cards for half their bet, if the rules allow.
  - Double Down on their first hand 
     If the player has enough money to double their bet.
  - Split Hand on first move per hand (potential for recursive splitting of split hands)
     If the hand consists of two cards of the same value.
  - Choose to stay on a hand at any time, or hit until they stay or bust.
+
+The round phases that ask players something are generators of steps (see
+Player.ask). run_game and play_round run them with play, which reads each
+answer from the player's input source; Server.TableServer runs the same
+steps on an asyncio event loop instead.
 """
 
+import random
+
 from Deck.BlackjackDeck import BlackjackDeck
 from Game.Player import Player
+from Game.Renderer import Renderer
+from Game.Rules import DEFAULT_RULES, EARLY
 
 class Game:
-    def __init__(self, player_names, n_decks):
+    def __init__(self, player_names, n_decks, n_strategy_players=0, penetration=None,
+                 round_log=None, seed=None, checkpoints=None, start=True,
+                 prompt_executor=None, rules=DEFAULT_RULES, renderer=None, strategy=None):
         """
         Initialize a blackjack player
         Args:
         :List player_names: Names of participants in the blackjack game.
         :Int n_decks: Number of decks cards are drawn from (Standard 
             games include 1-8 decks).
+        :Int n_strategy_players: Number of computer players seated after
+            the named players. They play basic strategy.
+        :Float penetration: Fraction of the shoe dealt before reshuffling
+            at the next round (None deals until the shoe is empty).
+        :RoundLogWriter round_log: Optional log every settled hand is written to.
+        :Int seed: Seed for the game's random number generator. None seeds
+            from the system.
+        :CheckpointStore checkpoints: Optional store that snapshots the
+            session and records every answer (see Game.Checkpoint).
+        :Bool start: Start playing immediately. Pass False to drive the game
+            with play_round (e.g. when replaying).
+        :Executor prompt_executor: Optional concurrent.futures executor play
+            uses to ask every player for their bet, and whether to keep
+            playing, at the same time. Each player's input source must be
+            safe to call from its threads. None asks one player after another.
+        :Rules rules: House rules for the table.
+        :Renderer renderer: Output shared by the table (e.g. Renderer(QUIET)
+            for simulations). Defaults to a Renderer writing every round.
+        :BasicStrategy strategy: Strategy the computer players follow.
+            Defaults to the one for n_decks and rules, loaded (or solved)
+            when the game is created.
         """
         self.player_names = player_names
-        
+        self.n_decks = n_decks
+        self.n_strategy_players = n_strategy_players
+        self.penetration = penetration
+        self.round_log = round_log
+        self.round_number = 0
+        self.prompt_executor = prompt_executor
+        self.rules = rules
+        self.dealer_natural = False     # The dealer was dealt blackjack this round.
+        # Table talk is collected into frames and written in one go.
+        self.renderer = renderer if renderer is not None else Renderer()
+
+        # Every shuffle draws from this generator, so a seeded game is reproducible.
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        # Dealer hand
+        self.dealer = Player("Dealer", rules=rules, renderer=self.renderer)
+
         # People playing the game
         self.players = []
         self.init_players()
-
-        # Dealer hand
-        self.dealer = Player("Dealer")
+        self.init_strategy_players(n_strategy_players, strategy)
 
         # Initialize a deck containing n_decks standard 52 card decks.
-        self.deck = BlackjackDeck(n_decks)
+        self.deck = BlackjackDeck(n_decks, rng=self.rng, penetration=penetration)
+
+        self.checkpoints = checkpoints
+        if checkpoints is not None:
+            checkpoints.attach(self)
         
         # Start the blackjack game
-        self.run_game()
+        if start:
+            self.run_game()
 
     def init_players(self):
         """
         Create player objects for each player name
         """
         for name in self.player_names:
-            new_player = Player(name)
+            new_player = Player(name, rules=self.rules, renderer=self.renderer)
+            self.players.append(new_player)
+
+    def init_strategy_players(self, n_strategy_players, strategy=None):
+        """
+        Create computer players that follow basic strategy.
+        Args:
+         :Int n_strategy_players: Number of computer players.
+         :BasicStrategy strategy: Strategy they follow (loaded for the
+            table's decks and rules if None).
+        """
+        if n_strategy_players == 0:
+            return
+        # Imported here so the interactive game doesn't load the solver.
+        from Game.StrategyPlayer import StrategyPlayer
+        if strategy is None:
+            from Analysis.BasicStrategy import BasicStrategy
+            strategy = BasicStrategy(self.n_decks, rules=self.rules)
+        for i in range(n_strategy_players):
+            new_player = StrategyPlayer("Computer " + str(i+1), strategy, self.dealer,
+                                        rules=self.rules, renderer=self.renderer)
             self.players.append(new_player)
 
+    def play(self, steps):
+        """
+        Run steps to the end, answering every prompt they yield with the
+        player's input source. Return the steps' result.
+        Args:
+         :Generator steps: Yields (player, prompt) for one answer, or a list
+            of steps to run at once (see ask_players) for a list of results.
+        """
+        answer = None
+        while True:
+            try:
+                request = steps.send(answer)
+            except StopIteration as stop:
+                return stop.value
+            if isinstance(request, list):
+                if self.prompt_executor is None or len(request) < 2:
+                    answer = [self.play(each) for each in request]
+                else:
+                    futures = [self.prompt_executor.submit(self.play, each) for each in request]
+                    answer = [future.result() for future in futures]
+            else:
+                player, prompt = request
+                answer = player.input(prompt)
+
     def run_game(self):
         """
         Run through rounds of blackjack until all players leave or 
         run out of money.
         """
+        self.play(self.game_steps())
+
+    def game_steps(self):
+        """
+        Steps of run_game (see play).
+        """
         # Randomize the card order to start the game.
         self.deck.shuffle()
+        if self.checkpoints is not None:
+            self.checkpoints.after_round(self)
         
         # Continue dealing to the existing players until all players have left.
         while len(self.players) > 0:
-            # Place initial bets and deal two cards to each player
-            self.start_round()
+            yield from self.round_steps()
+        
+        # No players remain - end of game.
+        self.renderer.print('All players have left the table. The game has ended.\n\n\n')
+        self.renderer.flush()
 
-            # Allow players to take more cards until they stay or bust
-            self.play_hands()
+    def play_round(self):
+        """
+        Play a single round from bets through the continue prompt.
+        """
+        self.play(self.round_steps())
 
-            # Play through the dealer's hand
-            self.play_dealer()
-            
-            # Reward winning hands
-            self.reward()
+    def round_steps(self):
+        """
+        Steps of play_round (see play).
+        """
+        # Place initial bets and deal two cards to each player
+        yield from self.start_round()
 
-            # Ask players if they want to play another hand
-            self.prompt_continue()
-        
-        # No players remain - end of game.
-        print('All players have left the table. The game has ended.\n\n\n')
+        # Offer insurance (and early surrender), then check for a dealer blackjack.
+        # Allow players to take more cards until they stay or bust
+        if not (yield from self.dealer_peek()):
+            yield from self.play_hands()
+
+        # Play through the dealer's hand
+        self.play_dealer()
+
+        # Reward winning hands
+        self.reward()
+
+        # Ask players if they want to play another hand
+        yield from self.prompt_continue()
+
+        if self.checkpoints is not None:
+            self.checkpoints.after_round(self)
+
+        # One frame per round, unless a prompt already sent the table talk.
+        self.renderer.flush(force=False)
+
+    def ask_players(self, prompts):
+        """
+        Ask every player their question at once and return the answers in
+        seat order. Whether they really are asked at once is up to the
+        driver (see play), so the phase can take as long as the slowest
+        player rather than the sum.
+        Args:
+         :List prompts: One player's steps (e.g. player.choose_bet()) per player.
+        """
+        return (yield list(prompts))
 
     def start_round(self):
         """
         Start a new round.
         """
+        self.renderer.clear_shown()
+        # Reshuffle between rounds once the cut card has come out.
+        if self.deck.needs_shuffle():
+            self.renderer.print('The cut card came out. Shuffling the shoe...\n')
+        self.deck.start_round()
+
         # Start by prompting each player to make a bet.
-        for player in self.players:
-            player.prompt_initial_bet()
+        bets = yield from self.ask_players([player.choose_bet() for player in self.players])
+        for player, bet_amount in zip(self.players, bets):
+            player.confirm_bet(bet_amount)
             # Clear player's old hand(s)
             player.reset()
         self.dealer.reset()
 
         # Deal two cards to every player
-        print('\nDealing Cards...')
+        self.renderer.print('\nDealing Cards...')
         for i in range(2):
             # All players get a card
             for player in self.players:
                 player.first_deal(self.deck.draw())
 
             # The dealer gets two cards, but the first card is hidden.
-            dealer_card = self.deck.draw()
-            if i == 0:
-                dealer_card.hide()
-            self.dealer.first_deal(dealer_card)
+            self.dealer.first_deal(self.deck.draw(), hidden=(i == 0))
+
+        # Show the table once everyone has their cards.
+        for player in self.players + [self.dealer]:
+            player.print_hands()
+
+        # Naturals are decided once, on the dealt cards.
+        for player in self.players + [self.dealer]:
+            player.mark_natural()
+
+    def dealer_peek(self):
+        """
+        Offer insurance when the dealer shows an Ace and early surrender
+        if the rules allow it, then check the hole card for blackjack when
+        the upcard is an Ace or ten valued.
+        Return True if the dealer has blackjack (no one plays their hand).
+        """
+        hand = self.dealer.hands[0]
+        upcard = hand.get_second()
+        self.dealer_natural = False
+
+        if upcard.int_value() == 11 and self.rules.insurance:
+            insurers = [player for player in self.players if player.can_insure()]
+            answers = yield from self.ask_players([player.prompt_insurance() for player in insurers])
+            for player, insure in zip(insurers, answers):
+                if insure:
+                    player.place_insurance()
+                    self.renderer.print(player.name, 'took insurance for $' + str(player.insurance) + '.')
+
+        if self.rules.surrender == EARLY:
+            offered = [player for player in self.players if player.can_surrender(player.hands[0])]
+            answers = yield from self.ask_players([player.choose_surrender(player.hands[0])
+                                                   for player in offered])
+            for player, surrender in zip(offered, answers):
+                if surrender:
+                    player.surrender_hand(player.hands[0])
+
+        if upcard.int_value() >= 10:
+            self.renderer.print('The dealer checks for blackjack...')
+            if hand.natural:
+                self.renderer.print('The dealer has blackjack!\n')
+                self.dealer_natural = True
+            else:
+                self.renderer.print('The dealer does not have blackjack.\n')
+        return self.dealer_natural
 
     def play_hands(self):
         """
         Prompt each player to play through their hand.
         """
-        print("Now each player will play their hand")
+        self.renderer.print("Now each player will play their hand")
         for player in self.players:
-            player.start_turn(self.deck)
+            yield from player.start_turn(self.deck)
 
     def play_dealer(self):
         """
         Expose the dealer's hidden card and play through the dealer's hand
         House rules are the dealer must:
-            1. Hit until 17
+            1. Hit until 17 (and on soft 17 if the rules say so)
             2. Must stay after 17
         """
-        print('--------------------------------------------------------------')
-        print('All players have played their hands, now the dealer will play.')
+        self.renderer.print('--------------------------------------------------------------')
+        self.renderer.print('All players have played their hands, now the dealer will play.')
         # Reveals the first card (hidden)
         self.dealer.show_hand(0)
         self.dealer.print_hands()
 
-        # The dealer hits until its score exceeds 17
-        while self.dealer.score_first() < 17:
-            print('The Dealer takes another card.\n')
+        # The dealer hits below 17 (and on soft 17 under H17 rules)
+        dealer_table = self.rules.dealer_table
+        hand = self.dealer.hands[0]
+        while dealer_table[hand.score_hand() * 2 + hand.is_soft()]:
+            self.renderer.print('The Dealer takes another card.\n')
             self.dealer.first_deal(self.deck.draw())
+            self.dealer.print_hands()
 
         if self.dealer.score_first() > 21:
-            print('The dealer busted...\n')
+            self.renderer.print('The dealer busted...\n')
         elif self.dealer.score_first() == 21:
-            print('The dealer got blackjack!\n')
+            self.renderer.print('The dealer got blackjack!\n')
         else:
-            print('Dealer\'s final score is:', self.dealer.score_first(), "\n")
+            self.renderer.print('Dealer\'s final score is:', self.dealer.score_first(), "\n")
     
     def reward(self):
         """
@@ -138,10 +328,25 @@ class Game:
         has followed the house rules, winning hands are rewarded.
         """
         dealer_score = self.dealer.score_first()
+
+        if self.round_log is not None:
+            self.round_log.write_round(self.round_number, self.players, self.dealer.hands[0],
+                                       [player.initial_bet for player in self.players])
         
         for player in self.players:
             # Update the player to reflect a win or loss based on the dealer_score
-            player.reward(dealer_score)
+            player.reward(dealer_score, self.dealer_natural)
+
+        self.collect_cards()
+        self.round_number += 1
+
+    def collect_cards(self):
+        """
+        Move every card on the table to the shoe's discard pile.
+        """
+        for player in self.players + [self.dealer]:
+            for hand in player.hands:
+                self.deck.discard(hand.cards)
 
     def prompt_continue(self):
         """
@@ -149,23 +354,23 @@ class Game:
         Ask each player if they want to leave the game or keep playing.
         Player's with no money must leave
         """
+        # Ask everyone with money at once, then apply the answers in seat order.
+        asked = [player for player in self.players if player.get_money() > 0]
+        answers = yield from self.ask_players([player.prompt_continue() for player in asked])
+        answers = dict(zip(asked, answers))
+
         player_exit = []
         for p_idx in range(len(self.players)):
             player = self.players[p_idx]
             # The player has no money. They can't keep playing
             if player.get_money() <= 0:
-                print(player.name, "has no money left, they leave the table.\n")
+                self.renderer.print(player.name, "has no money left, they leave the table.\n")
                 player_exit.append(p_idx)
             else:
-                keep_playing = ''
-                while keep_playing.lower() != 'y' and keep_playing.lower() != 'n':
-                    continue_msg = str(player.name) + ", would you like to keep playing?" 
-                    continue_msg += " You have $" + str(player.get_money()) + ". (Y to play again, N to leave): "
-                    keep_playing = input(continue_msg)
-                if keep_playing.lower() == 'y':
-                    print(player.name, "stayed.\n")
+                if answers[player]:
+                    self.renderer.print(player.name, "stayed.\n")
                 else:
-                    print(player.name, "left with $" + str(player.get_money()) + '.\n')
+                    self.renderer.print(player.name, "left with $" + str(player.get_money()) + '.\n')
                     player_exit.append(p_idx)
         
         # Remove all players that exited.
@@ -175,4 +380,8 @@ class Game:
         for p_idx in player_exit:
             # Removing each p
             self.players.pop(p_idx)
+
+        # Computer players leave with the last person at the table.
+        if not any(player.is_human for player in self.players):
+            self.players = []
         
\ No newline at end of file
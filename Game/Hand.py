@@ -6,26 +6,58 @@ Representation of a hand. Player's can have
 multiple hands following a decision to split
 their initial hand.
 """
-from Deck.Card import Card
+from Deck.Card import HIDDEN_CARD
+from Game.Rules import DEFAULT_RULES, MAX_SCORE, NATURAL, N_STATES
+
+# Codes recorded in Hand.actions
+HIT = 'H'
+STAND = 'S'
+DOUBLE = 'D'
+SPLIT = 'P'
+SURRENDER = 'R'
 
 class Hand:
-    def __init__(self, bet_amount):
+    def __init__(self, bet_amount, rules=DEFAULT_RULES):
         """
         Initialize an empty hand.
         All hands have an associated bet
         Args:
          :Int bet_amount: Amount the player bets on this hand
+         :Rules rules: House rules the hand is paid out under.
         """
         self.cards = []
         self.bet_amount = bet_amount
+        self.rules = rules
+
+        # Running totals updated as cards are added, so scoring is O(1).
+        self.hard_total = 0     # Score with every Ace counted as 1.
+        self.n_aces = 0         # Number of Aces in the hand.
+        # Positions in cards of the face down cards (Cards are shared, so
+        # the hand keeps track of which ones are hidden).
+        self.hidden = set()
 
-    def add_card(self, card):
+        # Decisions made on this hand, in order (HIT, STAND, DOUBLE, SPLIT, SURRENDER).
+        self.actions = ''
+        self.surrendered = False    # Half the bet is returned, whatever the dealer has.
+        self.natural = False        # Dealt blackjack (set once, after the initial deal).
+
+    def add_card(self, card, hidden=False):
         """
-        Add a card to the hand
+        Add a card to the hand.
         Args:
          :Card card: The Card object to be added
+         :Bool hidden: Deal the card face down, so it isn't displayed or
+            scored until show_cards is called.
         """
         self.cards.append(card)
+        value = card.int_value()
+        if value == 11:
+            self.n_aces += 1
+            self.hard_total += 1
+        else:
+            self.hard_total += value
+        if hidden:
+            self.hidden.add(len(self.cards) - 1)
 
     def get_bet(self):
         """
@@ -58,92 +90,83 @@ class Hand:
             print('Error: Not enough cards!')
         return self.cards[1]
 
-    def print_hand(self):
+    def render(self):
         """
-        Print the cards in the hand.
+        Return the hand as text: a line per card, then the score (left out
+        while a card is hidden).
         """
-        for card in self.cards:
-            card.print_card()
-        
+        hidden = self.hidden
+        lines = [HIDDEN_CARD if i in hidden else card.render()
+                 for i, card in enumerate(self.cards)]
         # Score the hand. Hands with hidden cards will return -1
         hand_score = self.score_hand()
-        
-        # Only print the score for hands with no hidden cards.
         if hand_score > 0:
-            print("Score: ", hand_score)
+            lines.append("Score:  " + str(hand_score))
+        return '\n'.join(lines) + '\n\n\n'
 
-        print("\n")
+    def print_hand(self):
+        """
+        Print the cards in the hand.
+        """
+        print(self.render(), end='')
     
     def show_cards(self):
         """
         Ensures no cards are hidden
         """
-        for card in self.cards:
-            card.show()
+        self.hidden = set()
 
     def score_hand(self):
         """
         Compute the score of the player's hand
         Return the player's score, -1 if any cards are hidden.
         """
-        score = 0
-        for card in self.cards:
-            if card.hidden:
-                return -1
-            score += card.int_value()
-
-        # Go back through and reduce Ace values as needed
-        for card in self.cards:
-            if score <= 21:
-                break
-            # Reduce the Ace value to 1 to lower high score
-            if card.value == 'Ace':
-                score -= 10
-        
-        return score
+        if self.hidden:
+            return -1
+        # At most one Ace can count as 11 without busting.
+        if self.n_aces and self.hard_total <= 11:
+            return self.hard_total + 10
+        return self.hard_total
+
+    def is_natural(self):
+        """
+        Return True if the hand is an Ace and a ten valued card (counted
+        even while a card is hidden, so the dealer can peek).
+        """
+        return len(self.cards) == 2 and self.n_aces == 1 and self.hard_total == 11
+
+    def outcome_state(self):
+        """
+        Return the hand's state for settlement: NATURAL for a dealt
+        blackjack, otherwise its score. Every bust settles alike, so scores
+        past the payout table (only made up hands reach them) are capped.
+        """
+        if self.natural:
+            return NATURAL
+        return min(self.score_hand(), MAX_SCORE - 1)
+
+    def is_soft(self):
+        """
+        Return True if an Ace in the hand is currently counted as 11.
+        """
+        return self.n_aces > 0 and self.hard_total <= 11
     
-    def compute_reward(self, dealer_score):
+    def compute_reward(self, dealer_state):
         """
-        Compute the player's winnings given the dealer's score
+        Compute the player's winnings given the dealer's outcome
         Args:
-         :Int dealer_score: The score of the dealer's hand.
+         :Int dealer_state: The dealer's score, or Rules.NATURAL if the
+            dealer has blackjack.
         
         Return: 
          :Int Earnings multiplier:
             0 for loss
+            0.5 for a surrendered hand
             1 for tie
             2 for win
-            2.5 for blackjack
+            1 + Rules.blackjack_pays for a natural blackjack (2.5 at 3:2)
         """
-        hand_score = self.score_hand()
-
-        # Amount the bet is multiplied by. Defaults to 0 for a loss
-        multiplier = 0
-        
-        # Player always loses if its score exceeds 21 (even if the dealer busts)
-        if hand_score > 21:
-            multiplier = 0
-        
-        # Dealer busts, so the player wins
-        elif dealer_score > 21:
-            # Bet is doubled on win.
-            multiplier = 2
-            # Blackjack pays out 1.5 times + original bet.
-            if hand_score == 21:
-                multiplier = 2.5
-                            
-        # No one bust
-        # Tie. Return the bet amount.
-        elif hand_score == dealer_score:
-            multiplier = 1
-
-        # Player's score beats dealers.
-        elif hand_score > dealer_score:
-            # Bet is doubled on win.
-            multiplier = 2
-            # Blackjack has 1.5x payout + original bet.
-            if hand_score == 21:
-                multiplier = 2.5
-        
-        return multiplier
-        
\ No newline at end of file
+        if self.surrendered:
+            return 0.5
+        # Every other case, busts and naturals included, is precompiled in the rules.
+        return self.rules.payouts[self.outcome_state() * N_STATES + dealer_state]
@@ -3,21 +3,37 @@ Alex Kaplan
 1/13/18
 
 Representation of a Blackjack player
+
+Methods that ask the player something are generators of steps (see ask),
+so a Game can be played from the terminal or from an asyncio server
+without a thread waiting on each player. Call them with yield from.
 """
 
-from Game.Hand import Hand
+from Game.Hand import Hand, HIT, STAND, DOUBLE, SPLIT, SURRENDER
+from Game.Renderer import Renderer
+from Game.Rules import DEFAULT_RULES, LATE, NATURAL
 
 class Player:
-    def __init__(self, name):
+    def __init__(self, name, input_source=input, rules=DEFAULT_RULES, renderer=None):
         """
         Initialize a blackjack player
         Args:
          :String name: Player's name
+         :Function input_source: Called like input() to read the player's
+            answers (see Game.play). Defaults to the terminal.
+         :Rules rules: House rules at the player's table.
+         :Renderer renderer: Output for the player's table talk (Game
+            shares its own with every player).
         """
         self.name = name
+        self.input = input_source
+        self.rules = rules
+        self.out = renderer if renderer is not None else Renderer()
         self.money = 1000           # All players start with $1000.
         self.hands = []             # Cards the player holds (could have multiple hands).
         self.initial_bet = 0        # Amount the player is betting on their hand.
+        self.insurance = 0          # Insurance bet against a dealer blackjack.
+        self.is_human = True        # Decisions are made through self.ask().
 
     def reset(self):
         """
@@ -25,22 +41,41 @@ class Player:
         """
         self.hands = []
 
-    def first_deal(self, card):
+    def first_deal(self, card, hidden=False):
         """
         Called when initially dealing to a player. Places all cards in a
-        single (first hand)
+        single (first hand). The table is drawn once the deal is done.
         Args:
          :Card card: Card object added to the player's hand.
+         :Bool hidden: Deal the card face down (the dealer's hole card).
+        """
+        self.receive_card(card, hidden)
+
+    def receive_card(self, card, hidden=False):
+        """
+        Place a card in the player's first hand without any output.
+        Creates the first hand if this is the first card dealt to the player.
+        Args:
+         :Card card: Card object added to the player's hand.
+         :Bool hidden: Deal the card face down.
         """
         # This is the first card delt to the player
         if len(self.hands) == 0:
-            hand = Hand(self.initial_bet)
+            hand = Hand(self.initial_bet, self.rules)
             self.hands.append(hand)
         else:
             hand = self.hands[0]
-        self.deal_card(card, hand)
-        self.print_hands()
+        self.deal_card(card, hand, hidden)
         
+    def mark_natural(self):
+        """
+        Record whether the player's first two cards are a natural blackjack.
+        Called once, right after the initial deal, so hands made by
+        splitting are never naturals.
+        """
+        hand = self.hands[0]
+        hand.natural = hand.is_natural()
+
     def show_hand(self, h_idx):
         """
         Show all of the cards in a hand.
@@ -57,65 +92,194 @@ class Player:
         """
         return self.hands[0].score_hand()
 
-    def deal_card(self, card, hand):
+    def deal_card(self, card, hand, hidden=False):
         """
         Deal a card to one of the player's hands.
         Args:
          :Card card: Card object added to the player's hand.
          :Hand hand: The Hand to deal the card to.
+         :Bool hidden: Deal the card face down.
         """        
-        hand.add_card(card)
+        hand.add_card(card, hidden)
 
     def print_hands(self):
         """
         Print the player's hand.
         """
-        print(self.name + "\'s Hand:")
         if len(self.hands) > 1:
+            self.out.print(self.name + "\'s Hand:")
             for i in range(len(self.hands)):
-                print('Hand ' + str(i) + ':')
-                self.hands[i].print_hand()
+                self.draw_hand(self.hands[i], 'Hand ' + str(i) + ':\n')
         else:
-            self.hands[0].print_hand()
+            self.draw_hand(self.hands[0], self.name + "\'s Hand:\n")
+
+    def draw_hand(self, hand, title=''):
+        """
+        Add a hand to the output frame (see Renderer.show).
+        Args:
+         :Hand hand: The hand to draw.
+         :String title: Line(s) written before the hand.
+        """
+        self.out.show(hand, hand.render(), title)
+
+    def ask(self, prompt):
+        """
+        Send the table talk so far, then yield (player, prompt) for the
+        driver to answer from the player's input source (see Game.play).
+        Return the answer it sends back.
+        """
+        self.out.flush()
+        return (yield self, prompt)
     
     def prompt_initial_bet(self):
         """
         Prompt the user to make a bet at the start of the round
         """
+        self.confirm_bet((yield from self.choose_bet()))
+
+    def choose_bet(self):
+        """
+        Prompt the user until they enter and confirm a valid bet.
+        Only reads input, so every player can be asked at once.
+        Return the bet amount.
+        """
         # Iterate until the player places and confirms a valid bet.
         confirmed = False
         while not confirmed:
             bet_str = self.name + " what is your initial bet? You have $" + str(self.money)
             bet_str += " (Enter an integer value): "
-            bet_amount = input(bet_str)
+            bet_amount = yield from self.ask(bet_str)
             
             # Ensure the player's bet is valid and meets the minimum bet amount ($0)
             while not bet_amount.isdigit() or int(bet_amount) < 0:
-                print("ERROR: Invalid Input") 
-                print("You must bet a non-negative integer value")
-                bet_amount = input(bet_str)
+                self.out.print("ERROR: Invalid Input") 
+                self.out.print("You must bet a non-negative integer value")
+                bet_amount = yield from self.ask(bet_str)
             bet_amount = int(bet_amount)
 
             # Ensure the player has enough money to make the bet
             if bet_amount > self.money:
-                print("You don't have enough money to make that bet. You have $" + str(self.money))
+                self.out.print("You don't have enough money to make that bet. You have $" + str(self.money))
                 continue
 
             # Confirm the bet
             confirm_str = ''
             while confirm_str.lower() != 'y' and confirm_str.lower() != 'n':
-                confirm_str = input("Bet $" + str(bet_amount) + "? (Y to confirm, N to cancel): ")
+                confirm_str = yield from self.ask("Bet $" + str(bet_amount) + "? (Y to confirm, N to cancel): ")
             
             if confirm_str.lower() == 'y':
                 confirmed = True
             else:
-                print("Bet cancelled")
-        
-        # Place the bet
+                self.out.print("Bet cancelled")
+        return bet_amount
+
+    def confirm_bet(self, bet_amount):
+        """
+        Place a bet chosen with choose_bet and announce it.
+        Args:
+         :Int bet_amount: Validated bet amount
+        """
+        self.place_bet(bet_amount)
+        self.out.print(self.name + " bet $" + str(self.initial_bet) + '.\n')
+
+
+    def prompt_continue(self):
+        """
+        Ask the player if they want to keep playing after a round.
+        Return True to stay at the table, False to leave.
+        """
+        keep_playing = ''
+        while keep_playing.lower() != 'y' and keep_playing.lower() != 'n':
+            continue_msg = str(self.name) + ", would you like to keep playing?"
+            continue_msg += " You have $" + str(self.get_money()) + ". (Y to play again, N to leave): "
+            keep_playing = yield from self.ask(continue_msg)
+        return keep_playing.lower() == 'y'
+
+    def place_bet(self, bet_amount):
+        """
+        Remove the bet from the player's money and record it as the
+        bet for the hand that is about to be dealt.
+        Args:
+         :Int bet_amount: Validated bet amount (0 <= bet_amount <= money)
+        """
         self.money -= bet_amount
         self.initial_bet = bet_amount
-        print(self.name + " bet $" + str(self.initial_bet) + '.\n')
 
+    def can_insure(self):
+        """
+        Check if the player can take insurance: the rules offer it and the
+        player can cover half their bet.
+        """
+        insurance = self.initial_bet // 2
+        return self.rules.insurance and 0 < insurance <= self.money
+
+    def prompt_insurance(self):
+        """
+        Ask the player whether to insure their hand against a dealer blackjack.
+        Return True to take insurance.
+        """
+        insure_str = ''
+        while insure_str.lower() != 'y' and insure_str.lower() != 'n':
+            insure_str = yield from self.ask(self.name + ", the dealer shows an Ace. Take insurance for $"
+                                             + str(self.initial_bet // 2) + "? (Y to insure, N to decline): ")
+        return insure_str.lower() == 'y'
+
+    def place_insurance(self):
+        """
+        Bet half the initial bet on the dealer having blackjack.
+        """
+        self.insurance = self.initial_bet // 2
+        self.money -= self.insurance
+
+    def settle_insurance(self, dealer_natural):
+        """
+        Pay out the insurance bet, 2:1 if the dealer has blackjack.
+        Return the amount returned to the player.
+        """
+        winnings = 3 * self.insurance if dealer_natural else 0
+        self.money += winnings
+        self.insurance = 0
+        return winnings
+
+    def can_surrender(self, hand):
+        """
+        Check if a hand may be surrendered: the rules offer surrender and it
+        is the player's first hand, before any decision. A natural is paid,
+        never surrendered.
+        Args:
+         :Hand hand: The hand to check.
+        """
+        return (self.rules.surrender is not None and len(self.hands) == 1
+                and len(hand.cards) == 2 and not hand.actions and not hand.natural)
+
+    def choose_surrender(self, hand):
+        """
+        Ask the player whether to surrender a hand.
+        Return True to surrender.
+        """
+        surrender_str = yield from self.ask("Press (R) to surrender (give up the hand and get back half "
+                                            "your bet of $" + str(hand.get_bet()) + ").\n"
+                                            "Press any other key to continue: ")
+        return surrender_str.lower() == 'r'
+
+    def surrender_hand(self, hand):
+        """
+        Give up a hand. Half of its bet is returned when the round is settled.
+        """
+        hand.surrendered = True
+        hand.actions += SURRENDER
+        self.out.print(self.name, 'surrendered their hand.\n')
+
+    def manage_surrender(self, hand):
+        """
+        Offer late surrender on a hand.
+        Return True if the hand was surrendered.
+        """
+        if (self.rules.surrender == LATE and self.can_surrender(hand)
+                and (yield from self.choose_surrender(hand))):
+            self.surrender_hand(hand)
+            return True
+        return False
 
     def start_turn(self, game_deck):
         """
@@ -124,7 +288,7 @@ class Player:
          :Deck game_deck: Deck used in the blackjack game 
             used to draw additional cards. 
         """
-        print(str(self.name) + "\'s turn")
+        self.out.print(str(self.name) + "\'s turn")
         
         # Play through all hands as they are generated
         h_idx = 0
@@ -132,7 +296,7 @@ class Player:
             # play_hand returns True if a hand is split. 
             # This replaces the hand at h_idx. 
             # Replay this index until it isn't split.
-            while self.play_hand(game_deck, h_idx):
+            while (yield from self.play_hand(game_deck, h_idx)):
                 continue
             
             # Move on to the next hand
@@ -151,48 +315,117 @@ class Player:
         """
         hand = self.hands[h_idx]
         # Each hand starts with two cards. If they are equal, the player can split them and double their bet.
-        if hand.get_bet() <= self.money:
-            if hand.get_first().int_value() == hand.get_second().int_value():
-                print('Both cards in this hand have equal value, would you like to split?')
-                print('You must place your original bet amount on the second hand.')
+        if self.can_split(hand):
+            self.out.print('Both cards in this hand have equal value, would you like to split?')
+            self.out.print('You must place your original bet amount on the second hand.')
+            
+            # Prompt to split their hand.
+            split_str = ''
+            while split_str.lower() != 'y' and split_str.lower() != 'n':
+                split_str = yield from self.ask('Press Y to split and N to continue: ')
+
+            # Confirm the split.
+            if split_str.lower() == 'y':
+                confirm_str = ''
+                while confirm_str.lower() != 'y' and confirm_str.lower() != 'n':
+                    confirm_str = yield from self.ask('Are you sure you want to split (Y to split, N to cancel): ')
                 
-                # Prompt to split their hand.
-                split_str = ''
-                while split_str.lower() != 'y' and split_str.lower() != 'n':
-                    split_str = input('Press Y to split and N to continue: ')
-
-                # Confirm the split.
-                if split_str.lower() == 'y':
-                    confirm_str = ''
-                    while confirm_str.lower() != 'y' and confirm_str.lower() != 'n':
-                        confirm_str = input('Are you sure you want to split (Y to split, N to cancel): ')
+                # Split the hand
+                if confirm_str.lower() == 'y':
+                    self.out.print(self.name, 'bet another $', hand.get_bet(),'and split their hand!\n')
+                    self.split_hand(game_deck, h_idx)
+
+                    # Print the new hands
+                    self.print_hands()
+                    
+                    return True
                     
-                    # Split the hand
-                    if confirm_str.lower() == 'y':
-                        self.money -= hand.get_bet()
-                        print(self.name, 'bet another $', hand.get_bet(),'and split their hand!\n')
-                        
-                        # Create a new hand from the first card
-                        first_card = hand.get_first()
-                        first_new = Hand(hand.get_bet())
-                        first_new.add_card(first_card)
-                        first_new.add_card(game_deck.draw())
-                        self.hands[h_idx] = first_new
-
-                        # Create a second hand from the second card
-                        second_card = hand.get_second()
-                        second_new = Hand(hand.get_bet())
-                        second_new.add_card(second_card)
-                        second_new.add_card(game_deck.draw())
-                        self.hands.insert(h_idx+1, second_new)
-
-                        # Print the new hands
-                        self.print_hands()
-                        
-                        return True
-                        
         return False
 
+    def can_split(self, hand):
+        """
+        Check if a hand may be split. The hand must consist of two cards
+        of equal value (the same rank, unless the rules allow splitting
+        unlike tens), the player must be able to match the bet, and the
+        rules' split limits must allow another hand.
+        Args:
+         :Hand hand: The hand to check.
+
+        Return:
+            Bool - True if the hand can be split
+        """
+        if hand.get_bet() > self.money or len(hand.cards) != 2:
+            return False
+        first = hand.get_first()
+        second = hand.get_second()
+        if first.int_value() != second.int_value():
+            return False
+        rules = self.rules
+        if len(self.hands) >= rules.max_split_hands:
+            return False
+        if not rules.split_unlike_tens and first.value != second.value:
+            return False
+        if not rules.resplit_aces and first.value == 'Ace' and SPLIT in hand.actions:
+            return False
+        return True
+
+    def split_hand(self, game_deck, h_idx):
+        """
+        Split a hand into two hands, each with one of the original cards
+        and one new card. The second hand is inserted after the first and
+        carries the same bet, which is taken from the player's money.
+        Args:
+         :Deck game_deck: Deck used to draw the second card of each hand.
+         :Int h_idx: Index of the hand to split.
+        """
+        hand = self.hands[h_idx]
+        self.money -= hand.get_bet()
+
+        # Create a new hand from the first card
+        first_new = Hand(hand.get_bet(), self.rules)
+        first_new.actions = hand.actions + SPLIT
+        first_new.add_card(hand.get_first())
+        first_new.add_card(game_deck.draw())
+        self.hands[h_idx] = first_new
+
+        # Create a second hand from the second card
+        second_new = Hand(hand.get_bet(), self.rules)
+        second_new.actions = hand.actions + SPLIT
+        second_new.add_card(hand.get_second())
+        second_new.add_card(game_deck.draw())
+        self.hands.insert(h_idx+1, second_new)
+
+    def can_double(self, hand):
+        """
+        Check if the player has enough money to double down on a hand,
+        and the rules allow doubling on it.
+        Args:
+         :Hand hand: The hand to check.
+        """
+        return self.money >= hand.get_bet() and self.rules_allow_double(hand)
+
+    def rules_allow_double(self, hand):
+        """
+        Check if the rules allow doubling on a hand's total (and after a split).
+        Args:
+         :Hand hand: The hand to check.
+        """
+        rules = self.rules
+        return (rules.double_table[hand.score_hand()] == 1
+                and (rules.double_after_split or SPLIT not in hand.actions))
+
+    def double_down(self, game_deck, hand):
+        """
+        Double the bet on a hand and deal it exactly one more card.
+        Args:
+         :Deck game_deck: Deck used to draw the card.
+         :Hand hand: The hand to double down on.
+        """
+        self.money -= hand.get_bet()
+        hand.double_bet()
+        hand.actions += DOUBLE
+        self.deal_card(game_deck.draw(), hand)
+
     def manage_double_down(self, game_deck, hand):
         """
         Manage presentation of double down option to the user
@@ -205,42 +438,40 @@ class Player:
         """
         # Allow the player to double down at the start of their turn with this hand if 
         # they have enough money.
-        if self.money >= hand.get_bet():
+        if self.can_double(hand):
             dd_string = "Press (D) to double down (double your initial bet and receive " 
             dd_string += "only one additional card).\nPress any other key to continue: "
-            double_decision = input(dd_string)
+            double_decision = yield from self.ask(dd_string)
             
             # Double down!
             if double_decision.lower() == 'd':
                 confirm_str = ''
                 while confirm_str.lower() != 'y' and confirm_str.lower() !=  'n':
-                    confirm_str = input('Are you sure you want to double down (Y to confirm, N to Cancel): ')
+                    confirm_str = yield from self.ask('Are you sure you want to double down (Y to confirm, N to Cancel): ')
 
                 # If they double down, they double their bet and get one more card.
                 if confirm_str.lower() == 'y':
-                    self.money -= hand.get_bet()
-                    hand.double_bet()
-
-                    print(self.name, 'doubled their bet to $' + str(hand.get_bet()) + '!\n')
-                    self.deal_card(game_deck.draw(), hand)
+                    self.double_down(game_deck, hand)
+                    self.out.print(self.name, 'doubled their bet to $' + str(hand.get_bet()) + '!\n')
                     
                     # Display the hand with the new card.
-                    print('New hand:')
-                    hand.print_hand()
+                    self.draw_hand(hand, 'New hand:\n')
 
                     # Inform user of interesting events.
                     dd_score = hand.score_hand()
                     if dd_score == 21:
-                        print(self.name, 'got Blackjack!\n')
+                        self.out.print(self.name, 'got 21!\n')
                     elif dd_score > 21:
-                        print(self.name, 'busted...\n')
+                        self.out.print(self.name, 'busted...\n')
                     
                     # Turn ends after 1 additional card.
                     return True
                 else:
-                    print(self.name, 'cancelled their decision to double down.')
+                    self.out.print(self.name, 'cancelled their decision to double down.')
+        elif not self.rules_allow_double(hand):
+            self.out.print('The table rules do not allow doubling down on this hand.')
         else:
-            print(self.name, 'does not have enough money to double down.')
+            self.out.print(self.name, 'does not have enough money to double down.')
         
         # Player did not double down.
         return False
@@ -257,74 +488,93 @@ class Player:
         """
         # Output for multiple hands
         if len(self.hands) > 1:
-            print("\nContinuing", str(self.name) + '\'s', "turn")
-            print("Playing hand", str(h_idx) + ":")
+            self.out.print("\nContinuing", str(self.name) + '\'s', "turn")
+            self.out.print("Playing hand", str(h_idx) + ":")
         
         hand = self.hands[h_idx]
         hand_score = hand.score_hand()
-        print('\nCurrent hand:')
-        hand.print_hand()
+        # The hand was given up before the dealer checked for blackjack.
+        if hand.surrendered:
+            return False
+
+        self.draw_hand(hand, '\nCurrent hand:\n')
 
-        # The hand is complete if it reached blackjack.
+        # The hand is complete if it reached 21 (only a dealt 21 is blackjack).
         if hand_score == 21:
-            print(self.name, 'got Blackjack! \n')
+            self.out.print(self.name, 'got Blackjack! \n' if hand.natural else 'got 21!\n')
+            return False
+
+        # Allow the player to give up the hand for half their bet.
+        if (yield from self.manage_surrender(hand)):
             return False
 
         # Allow the player to split their hand if they have two cards of the same
         # value and enough money to double their bet.
-        if self.manage_split(game_deck, h_idx):
+        if (yield from self.manage_split(game_deck, h_idx)):
             # Return to playthrough the new hand which replaced self.hands[h_idx]
             return True
         
         # # Allow the player to double down at the start of their turn with this hand if 
         # # they have enough money.
-        if self.manage_double_down(game_deck, hand):
+        if (yield from self.manage_double_down(game_deck, hand)):
             # The player chose to double down. Their turn is over.
             return False
         
         # Loop until the player gets blackjack, busts, or chooses to stay
         while True:
-            decision = input("Would you like to stay (S) or hit (H)?: ")
+            decision = yield from self.ask("Would you like to stay (S) or hit (H)?: ")
             while decision.lower() != 's' and decision.lower() != 'h':
-                print("ERROR: Invalid input")
-                print("Please enter an \"s\" to stay and a \"h\" to hit (take a card)")
-                decision = input("Would you like to stay (S) or hit (H)?: ")
+                self.out.print("ERROR: Invalid input")
+                self.out.print("Please enter an \"s\" to stay and a \"h\" to hit (take a card)")
+                decision = yield from self.ask("Would you like to stay (S) or hit (H)?: ")
 
             # Chose to stay.
             if decision.lower() == 's':
-                print("")
-                print(self.name, "chose to stay.\n")
+                hand.actions += STAND
+                self.out.print("")
+                self.out.print(self.name, "chose to stay.\n")
                 return False
 
             # Chose to hit.
             if decision.lower() == 'h':
-                print("")
+                self.out.print("")
                 if (len(self.hands) > 1):
-                    print(self.name, "continues playing hand", str(h_idx))
+                    self.out.print(self.name, "continues playing hand", str(h_idx))
                 
                 # Take another card and show the updated hand
+                hand.actions += HIT
                 self.deal_card(game_deck.draw(), hand)
-                print('Current Hand:')
-                hand.print_hand()
+                self.draw_hand(hand, 'Current Hand:\n')
             
             # Their turn is over if they have blackjack.
             new_score = hand.score_hand()
             if new_score == 21:
-                print(self.name, 'got Blackjack!\n')
+                self.out.print(self.name, 'got 21!\n')
                 return False
     
             # or if they bust.
             elif new_score > 21:
-                print(self.name, "busted...\n")
+                self.out.print(self.name, "busted...\n")
                 return False
 
-    def reward(self, dealer_score):
+    def reward(self, dealer_score, dealer_natural=False):
         """
         Determine if the player won the hand and update the amount of money
         they have to reflect this outcome.
+        Args:
+         :Int dealer_score: The score of the dealer's hand.
+         :Bool dealer_natural: The dealer has blackjack.
         """
+        if self.insurance:
+            insurance = self.insurance
+            if self.settle_insurance(dealer_natural):
+                self.out.print(self.name, 'won $' + str(2 * insurance), 'on their insurance bet.')
+            else:
+                self.out.print(self.name, 'lost their insurance bet of $' + str(insurance) + '.')
+
         if len(self.hands) > 1:
-            print(self.name, 'split their hand and ended up with', len(self.hands), 'hands!')
+            self.out.print(self.name, 'split their hand and ended up with', len(self.hands), 'hands!')
+        dealer_state = NATURAL if dealer_natural else dealer_score
 
         self.print_hands()
 
@@ -333,33 +583,50 @@ class Player:
             hand = self.hands[h_idx]
             # When multiple hands exist, inform the player's which hand is being scored.
             if len(self.hands) > 1:
-                print('Scoring', str(self.name) + '\'s hand ' + str(h_idx) + '.')
-                hand.print_hand()
+                self.draw_hand(hand, 'Scoring ' + str(self.name) + '\'s hand ' + str(h_idx) + '.\n')
             
-            multiplier = hand.compute_reward(dealer_score)
-            winnings = int(multiplier*(hand.get_bet()))
-            self.money += winnings
+            multiplier, winnings = self.settle_hand(hand, dealer_state)
 
             # Print win message
             if multiplier:
+                # Surrender.
+                if hand.surrendered:
+                    self.out.print(self.name, 'surrendered, $' + str(winnings) + ' of their bet was returned.')
                 # Tie.
-                if multiplier == 1:
-                    print(self.name, 'tied the dealer, their bet of $' + str(hand.get_bet()) + ' was returned.')
+                elif multiplier == 1:
+                    self.out.print(self.name, 'tied the dealer, their bet of $' + str(hand.get_bet()) + ' was returned.')
                 # Win
                 else:
-                    print(self.name, 'beat the dealer! They made $' + str(winnings - hand.get_bet()), 'from a bet of $' + str(hand.get_bet()))
+                    self.out.print(self.name, 'beat the dealer! They made $' + str(winnings - hand.get_bet()), 'from a bet of $' + str(hand.get_bet()))
                     # Blackjack
-                    if multiplier == 2.5:
-                        print('Blackjack has a 1.5x payout!')
+                    if hand.natural:
+                        self.out.print('Blackjack has a ' + str(self.rules.blackjack_pays) + 'x payout!')
             
             # Print loss message
             else:
-                print(self.name, 'lost a bet of $' + str(hand.get_bet()))
-            print(self.name, 'now has $' + str(self.money) + '.\n')
+                self.out.print(self.name, 'lost a bet of $' + str(hand.get_bet()))
+            self.out.print(self.name, 'now has $' + str(self.money) + '.\n')
 
         # Delete the bet amount
         self.initial_bet = 0
 
+    def settle_hand(self, hand, dealer_state):
+        """
+        Pay out a single hand against the dealer's outcome.
+        Args:
+         :Hand hand: The hand to settle.
+         :Int dealer_state: The dealer's score, or Rules.NATURAL if the
+            dealer has blackjack.
+
+        Return:
+         (multiplier, winnings) - The multiplier from Hand.compute_reward
+            and the amount returned to the player.
+        """
+        multiplier = hand.compute_reward(dealer_state)
+        winnings = int(multiplier*(hand.get_bet()))
+        self.money += winnings
+        return multiplier, winnings
+
     def get_money(self):
         """
         Return the amount of money the player has
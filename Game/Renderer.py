@@ -0,0 +1,113 @@
+"""
+Buffered output for a table's game talk.
+
+Game, Player and StrategyPlayer write through a Renderer instead of calling
+print. Everything written is collected into a frame, and the frame is sent
+to the renderer's output in a single write when it is flushed: before a
+player is asked for input, at the end of every round and when the game
+ends. The default output is sys.stdout, looked up at every flush so
+redirect_stdout still applies. Server.TableServer passes a function that
+sends each frame to the players at the table.
+
+Levels:
+ QUIET   Nothing is written (for simulations and replays).
+ NORMAL  All table talk is written.
+
+Hands are drawn with show. In diff mode a hand that hasn't changed since
+it was last drawn is left out of the frame, so only what changed is sent
+(messages are always written).
+
+min_interval rate-limits the end of round frames: one that comes less
+than min_interval seconds after the last write is held back and sent with
+the next. Frames flushed before a prompt are always written at once.
+"""
+# _thread rather than threading, which would add a few milliseconds to
+# the interactive game's startup.
+from _thread import allocate_lock
+import sys
+import time
+
+# Output levels
+QUIET = 0
+NORMAL = 1
+
+
+class Renderer:
+    def __init__(self, level=NORMAL, diff=False, min_interval=0.0, write=None):
+        """
+        Initialize a renderer with an empty frame.
+        Args:
+         :Int level: QUIET or NORMAL.
+         :Bool diff: Leave out hands that haven't changed since they were
+            last drawn.
+         :Float min_interval: Fewest seconds between frames that aren't
+            forced (see flush).
+         :Function write: Called with the text of every frame. None writes
+            to sys.stdout.
+        """
+        self.level = level
+        self.diff = diff
+        self.min_interval = min_interval
+        self.write = write
+        self.frame = []
+        self.shown = {}             # Last text drawn for each key (diff mode)
+        self.last_write = 0.0
+        # Players may be prompted on several threads at once (see Game.ask_players).
+        self.lock = allocate_lock()
+
+    def print(self, *args, sep=' ', end='\n'):
+        """
+        Add a line to the frame, formatted like the built in print.
+        """
+        if self.level == QUIET:
+            return
+        text = sep.join(str(arg) for arg in args) + end
+        with self.lock:
+            self.frame.append(text)
+
+    def show(self, key, text, title=''):
+        """
+        Add a drawing of a piece of table state (e.g. a hand) to the frame.
+        Args:
+         :Object key: Identifies what is drawn, e.g. the Hand.
+         :String text: The drawing.
+         :String title: Written before the drawing. In diff mode it is left
+            out along with an unchanged drawing.
+        """
+        if self.level == QUIET:
+            return
+        with self.lock:
+            if self.diff:
+                if self.shown.get(key) == text:
+                    return
+                self.shown[key] = text
+            self.frame.append(title + text)
+
+    def clear_shown(self):
+        """
+        Forget what has been drawn, so the next frame draws everything.
+        """
+        with self.lock:
+            self.shown = {}
+
+    def flush(self, force=True):
+        """
+        Write the frame to the renderer's output.
+        Args:
+         :Bool force: Write even if the last write was less than
+            min_interval seconds ago.
+        """
+        with self.lock:
+            if not self.frame:
+                return
+            now = time.monotonic()
+            if not force and now - self.last_write < self.min_interval:
+                return
+            text = ''.join(self.frame)
+            self.frame = []
+            self.last_write = now
+            if self.write is not None:
+                self.write(text)
+                return
+            sys.stdout.write(text)
+            sys.stdout.flush()
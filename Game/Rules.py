@@ -0,0 +1,182 @@
+"""
+House rules for a blackjack table.
+
+A Rules object describes one table variant. When it is created it compiles
+the rules into flat lookup tables, so the game checks a rule with a single
+index instead of branching on every option:
+ dealer_table  1 if the dealer hits, indexed score * 2 + soft
+ payouts       Bet multiplier, indexed player state * N_STATES + dealer state
+ double_table  1 if a two card hand may double, indexed by score
+Scores past 21 are valid indices (the largest possible hand is 30).
+
+A hand's outcome state is its score, or NATURAL for a blackjack dealt as
+the first two cards (see Hand.outcome_state). A natural beats any other
+21, and a split hand that makes 21 is never a natural.
+"""
+
+MAX_SCORE = 32
+NATURAL = MAX_SCORE         # Outcome state of a natural blackjack
+N_STATES = MAX_SCORE + 1
+
+# Surrender options
+LATE = 'late'       # After the dealer checks for blackjack.
+EARLY = 'early'     # Before the dealer checks, so it also saves half against a blackjack.
+
+
+class Rules:
+    def __init__(self, hit_soft_17=False, blackjack_pays=1.5, double_after_split=True,
+                 double_totals=None, max_split_hands=4, resplit_aces=True,
+                 split_unlike_tens=True, surrender=None, insurance=True):
+        """
+        Initialize a rule set. The defaults are the game's original rules,
+        with splitting capped at four hands.
+        Args:
+         :Bool hit_soft_17: The dealer hits soft 17 (H17) instead of
+            standing on every 17 (S17).
+         :Float blackjack_pays: Winnings per unit bet on a blackjack
+            (1.5 for 3:2, 1.2 for 6:5).
+         :Bool double_after_split: Hands made by splitting may double down.
+         :Tuple double_totals: Scores a two card hand may double on
+            (e.g. (9, 10, 11)). None allows any two cards.
+         :Int max_split_hands: Most hands a player can hold after splitting
+            (1 disables splitting).
+         :Bool resplit_aces: Hands made by splitting Aces may be split again.
+         :Bool split_unlike_tens: Any two ten valued cards may be split
+            (e.g. King and 10). Otherwise only cards of the same rank.
+         :String surrender: LATE or EARLY to let players give up their
+            first two cards for half their bet. None disables surrender.
+         :Bool insurance: Players may insure against a dealer blackjack
+            when the upcard is an Ace (pays 2:1).
+        """
+        self.hit_soft_17 = hit_soft_17
+        self.blackjack_pays = blackjack_pays
+        self.double_after_split = double_after_split
+        self.double_totals = tuple(double_totals) if double_totals is not None else None
+        self.max_split_hands = max_split_hands
+        self.resplit_aces = resplit_aces
+        self.split_unlike_tens = split_unlike_tens
+        if surrender is True:
+            surrender = LATE
+        self.surrender = surrender or None
+        self.insurance = insurance
+        self.compile()
+
+    def compile(self):
+        """
+        Build the lookup tables from the rule options.
+        """
+        dealer_table = bytearray(MAX_SCORE * 2)
+        for score in range(MAX_SCORE):
+            dealer_table[score * 2] = score < 17
+            dealer_table[score * 2 + 1] = score < 17 or (score == 17 and self.hit_soft_17)
+        self.dealer_table = bytes(dealer_table)
+
+        # Only naturals pay the blackjack bonus (see Hand.compute_reward).
+        self.blackjack_multiplier = 1 + self.blackjack_pays
+        payouts = []
+        for player_state in range(N_STATES):
+            for dealer_state in range(N_STATES):
+                if player_state == NATURAL:
+                    multiplier = 1 if dealer_state == NATURAL else self.blackjack_multiplier
+                elif player_state > 21 or dealer_state == NATURAL:
+                    multiplier = 0
+                elif dealer_state > 21 or player_state > dealer_state:
+                    multiplier = 2
+                elif player_state == dealer_state:
+                    multiplier = 1
+                else:
+                    multiplier = 0
+                payouts.append(multiplier)
+        self.payouts = tuple(payouts)
+
+        self.double_table = bytes(self.double_totals is None or score in self.double_totals
+                                  for score in range(MAX_SCORE))
+
+    def dealer_hits(self, score, soft):
+        """
+        Return True if the dealer must take another card.
+        Args:
+         :Int score: Score of the dealer's hand.
+         :Bool soft: The hand counts an Ace as 11.
+        """
+        return self.dealer_table[score * 2 + soft] == 1
+
+    def payout(self, player_state, dealer_state):
+        """
+        Multiplier paid on a hand's bet (0 loss, 1 push, 2 win, more for
+        a natural) given the player's and dealer's outcome states.
+        """
+        return self.payouts[player_state * N_STATES + dealer_state]
+
+    def key(self):
+        """
+        Short name of the rule set, e.g. 's17-das-rsa-sp4-bj3:2'.
+        """
+        parts = ['h17' if self.hit_soft_17 else 's17',
+                 'das' if self.double_after_split else 'ndas']
+        if self.double_totals is not None:
+            parts.append('d' + ','.join(str(total) for total in self.double_totals))
+        parts.append('rsa' if self.resplit_aces else 'nrsa')
+        parts.append('sp' + str(self.max_split_hands))
+        if not self.split_unlike_tens:
+            parts.append('srank')
+        if self.surrender == LATE:
+            parts.append('ls')
+        elif self.surrender == EARLY:
+            parts.append('es')
+        if not self.insurance:
+            parts.append('noins')
+        if self.blackjack_pays == 1.5:
+            parts.append('bj3:2')
+        elif self.blackjack_pays == 1.2:
+            parts.append('bj6:5')
+        else:
+            parts.append('bj' + str(self.blackjack_pays))
+        return '-'.join(parts)
+
+    def __eq__(self, other):
+        return isinstance(other, Rules) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+
+def add_rule_arguments(parser):
+    """
+    Add options choosing a rule set to an argparse parser. The defaults
+    give DEFAULT_RULES (see rules_from_arguments).
+    """
+    parser.add_argument('--h17', action='store_true', help='Dealer hits soft 17.')
+    parser.add_argument('--blackjack-pays', type=float, default=1.5,
+                        help='Winnings per unit bet on a blackjack (1.2 for 6:5).')
+    parser.add_argument('--no-das', action='store_true', help='No doubling after a split.')
+    parser.add_argument('--double-totals',
+                        help='Comma separated scores a two card hand may double on (e.g. 9,10,11).')
+    parser.add_argument('--max-split-hands', type=int, default=4,
+                        help='Most hands after splitting (1 disables splitting).')
+    parser.add_argument('--no-resplit-aces', action='store_true')
+    parser.add_argument('--no-split-unlike-tens', action='store_true',
+                        help='Only split ten valued cards of the same rank (e.g. K,K but not K,Q).')
+    parser.add_argument('--surrender', choices=[LATE, EARLY], help='Offer surrender.')
+    parser.add_argument('--no-insurance', action='store_true')
+
+
+def rules_from_arguments(args):
+    """
+    Build the Rules chosen with the options from add_rule_arguments.
+    Args:
+     :Namespace args: Parsed arguments.
+    """
+    double_totals = None
+    if args.double_totals:
+        double_totals = [int(total) for total in args.double_totals.split(',')]
+    return Rules(hit_soft_17=args.h17, blackjack_pays=args.blackjack_pays,
+                 double_after_split=not args.no_das, double_totals=double_totals,
+                 max_split_hands=args.max_split_hands, resplit_aces=not args.no_resplit_aces,
+                 split_unlike_tens=not args.no_split_unlike_tens, surrender=args.surrender,
+                 insurance=not args.no_insurance)
+
+
+DEFAULT_RULES = Rules()
+H17_RULES = Rules(hit_soft_17=True)
+SIX_TO_FIVE_RULES = Rules(hit_soft_17=True, blackjack_pays=1.2)
@@ -0,0 +1,145 @@
+"""
+Computer controlled blackjack player.
+
+Makes every decision from a basic strategy table instead of prompting,
+while printing the same table talk as a human Player. The decisions are
+still steps like Player's (see Player.ask) that simply never yield.
+"""
+import functools
+
+from Game.Hand import HIT, STAND
+from Game.Player import Player
+from Game.Rules import DEFAULT_RULES
+
+
+def _without_prompts(method):
+    """
+    Make a decision that asks nothing into steps that return its result
+    without yielding.
+    """
+    @functools.wraps(method)
+    def steps(*args, **kwargs):
+        return method(*args, **kwargs)
+        yield
+    return steps
+
+
+class StrategyPlayer(Player):
+    def __init__(self, name, strategy, dealer, bet_amount=10, rules=DEFAULT_RULES,
+                 renderer=None):
+        """
+        Initialize a computer player
+        Args:
+         :String name: Player's name
+         :BasicStrategy strategy: Table the player follows.
+         :Player dealer: The dealer, whose second card is the upcard.
+         :Int bet_amount: Amount bet every round.
+         :Rules rules: House rules at the player's table.
+         :Renderer renderer: Output for the player's table talk.
+        """
+        Player.__init__(self, name, rules=rules, renderer=renderer)
+        self.strategy = strategy
+        self.dealer = dealer
+        self.bet_amount = bet_amount
+        self.is_human = False
+
+    def upcard(self):
+        """
+        Return the dealer's visible card.
+        """
+        return self.dealer.hands[0].get_second()
+
+    @_without_prompts
+    def choose_bet(self):
+        """
+        Bet the same amount every round (or everything that's left).
+        """
+        return min(self.bet_amount, self.money)
+
+    @_without_prompts
+    def prompt_insurance(self):
+        """
+        Basic strategy never takes insurance.
+        """
+        return False
+
+    @_without_prompts
+    def choose_surrender(self, hand):
+        """
+        Surrender if the strategy says so.
+        """
+        return self.strategy.surrender(hand, self.upcard(), self.rules.surrender)
+
+    @_without_prompts
+    def prompt_continue(self):
+        """
+        Computer players keep playing while they have money.
+        """
+        return True
+
+    @_without_prompts
+    def manage_split(self, game_deck, h_idx):
+        """
+        Split the hand if the strategy says so.
+        Return True if the hand was split.
+        """
+        hand = self.hands[h_idx]
+        if self.can_split(hand) and self.strategy.split(hand, self.upcard()):
+            self.out.print(self.name, 'bet another $', hand.get_bet(), 'and split their hand!\n')
+            self.split_hand(game_deck, h_idx)
+            self.print_hands()
+            return True
+        return False
+
+    @_without_prompts
+    def manage_double_down(self, game_deck, hand):
+        """
+        Double down if the strategy says so.
+        Return True on double down.
+        """
+        if self.can_double(hand) and self.strategy.double(hand, self.upcard()):
+            self.double_down(game_deck, hand)
+            self.out.print(self.name, 'doubled their bet to $' + str(hand.get_bet()) + '!\n')
+            self.draw_hand(hand, 'New hand:\n')
+            if hand.score_hand() > 21:
+                self.out.print(self.name, 'busted...\n')
+            return True
+        return False
+
+    def play_hand(self, game_deck, h_idx):
+        """
+        Play through a hand following the strategy.
+        Returns True on a hand split. False otherwise.
+        """
+        hand = self.hands[h_idx]
+        if hand.surrendered:
+            return False
+        self.draw_hand(hand, '\nCurrent hand:\n')
+
+        if hand.score_hand() == 21:
+            self.out.print(self.name, 'got Blackjack! \n' if hand.natural else 'got 21!\n')
+            return False
+
+        if (yield from self.manage_surrender(hand)):
+            return False
+
+        if (yield from self.manage_split(game_deck, h_idx)):
+            return True
+
+        if (yield from self.manage_double_down(game_deck, hand)):
+            return False
+
+        while self.strategy.hit(hand, self.upcard()):
+            hand.actions += HIT
+            self.deal_card(game_deck.draw(), hand)
+            self.draw_hand(hand, self.name + ' takes a card.\n')
+            if hand.score_hand() > 21:
+                self.out.print(self.name, "busted...\n")
+                return False
+            if hand.score_hand() == 21:
+                break
+        else:
+            hand.actions += STAND
+
+        self.out.print(self.name, "stays.\n")
+        return False
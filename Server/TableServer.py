@@ -0,0 +1,345 @@
+"""
+Multi-table blackjack server.
+
+Players connect over TCP or a Unix socket, send their name, and are seated
+at the next table with a free seat. A table is dealt as soon as it is full,
+or lobby_wait seconds after its first player arrived.
+
+Everything runs on one asyncio event loop, without threads. Each table is
+a task playing the normal Game round steps (see Game.play) with
+play_steps. Every player's input source is a coroutine that asks on their
+connection, and the table's Renderer writes its frames to everyone at the
+table, so a slow player only holds up their own table. Bets and continue
+answers are collected from everyone at a table at once. A player who
+doesn't answer within the decision timeout (or who disconnects) gets
+timeout_answer: they stand, decline splits, doubles and confirmations,
+and leave after the round.
+
+The protocol is plain lines of text. Table talk is sent to everyone at the
+table. A line starting with PROMPT is a question for that player, e.g.
+"? #4 Would you like to stay (S) or hit (H)?: ", and the next line they
+send is their answer. Lines sent while no question is open are dropped
+when the next one is asked. An answer may start with its question's id
+("#4 s"); one tagged with an earlier id is dropped, so a late answer to a
+question that timed out is never taken as the answer to the next one.
+
+Run from the project directory:
+ python3 -m Server.TableServer --port 8000
+ python3 -m Server.TableServer --unix /tmp/blackjack.sock
+"""
+import argparse
+import asyncio
+import sys
+import traceback
+
+from Game.Game import Game
+from Game.Renderer import Renderer
+from Game.Rules import DEFAULT_RULES, add_rule_arguments, rules_from_arguments
+
+PROMPT = '? '
+
+
+async def play_steps(steps):
+    """
+    Run a game's steps (see Game.play) on the event loop, awaiting each
+    answer from the player's input source, a coroutine function here.
+    Steps yielded together in a list run at once.
+    Return the steps' result.
+    """
+    answer = None
+    while True:
+        try:
+            request = steps.send(answer)
+        except StopIteration as stop:
+            return stop.value
+        if isinstance(request, list):
+            answer = list(await asyncio.gather(*[play_steps(each) for each in request]))
+        else:
+            player, prompt = request
+            answer = await player.input(prompt)
+
+
+def timeout_answer(prompt):
+    """
+    Answer given for a player who didn't respond to a prompt in time:
+    bet nothing, stand, decline every other option and leave the table.
+    """
+    if 'initial bet' in prompt:
+        return '0'
+    if prompt.startswith('Bet $'):
+        return 'y'
+    if 'stay (S) or hit (H)' in prompt:
+        return 's'
+    return 'n'
+
+
+class Connection:
+    def __init__(self, reader, writer):
+        """
+        Wrap a client's streams.
+        Args:
+         :StreamReader reader: Lines sent by the client.
+         :StreamWriter writer: Stream to the client.
+        """
+        self.reader = reader
+        self.writer = writer
+        self.name = None
+        self.answers = asyncio.Queue()
+        self.prompt_id = 0          # Id of the last question asked
+        self.closed = False
+        self.finished = asyncio.Event()
+
+    async def read_answers(self):
+        """
+        Queue every line the client sends until it disconnects.
+        """
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                self.answers.put_nowait(line.decode(errors='replace').strip())
+        except ConnectionError:
+            pass
+        self.closed = True
+        self.answers.put_nowait(None)
+
+    async def ask(self, prompt, timeout):
+        """
+        Send a prompt and wait for the client's answer. Lines the client
+        sent before the prompt, and answers tagged with an earlier
+        question's id (e.g. a late answer to one that timed out), are
+        dropped.
+        Return None on timeout or once the client has disconnected.
+        """
+        while not self.answers.empty():
+            self.answers.get_nowait()
+        self.prompt_id += 1
+        tag = '#' + str(self.prompt_id)
+        self.send(PROMPT + tag + ' ' + prompt + '\n')
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not self.closed:
+            try:
+                line = await asyncio.wait_for(self.answers.get(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                return None
+            if line is None or not line.startswith('#'):
+                return line
+            line_tag, _, answer = line.partition(' ')
+            if line_tag == tag:
+                return answer
+        return None
+
+    def send(self, text):
+        """
+        Send text to the client.
+        """
+        if not self.closed and not self.writer.is_closing():
+            self.writer.write(text.encode())
+
+
+class TableServer:
+    def __init__(self, seats=7, n_decks=6, timeout=30.0, lobby_wait=1.0,
+                 n_strategy_players=0, penetration=0.75, rules=DEFAULT_RULES, diff=False):
+        """
+        Initialize a server with no tables.
+        Args:
+         :Int seats: Players seated at each table.
+         :Int n_decks: Decks in each table's shoe.
+         :Float timeout: Seconds a player has to answer each prompt.
+         :Float lobby_wait: Seconds a table waits for more players before
+            dealing with the players it has.
+         :Int n_strategy_players: Computer players added to each table.
+         :Float penetration: Shoe penetration (see BlackjackDeck).
+         :Rules rules: House rules at every table.
+         :Bool diff: Only send hands that changed since they were last
+            sent (see Renderer).
+        """
+        self.seats = seats
+        self.n_decks = n_decks
+        self.timeout = timeout
+        self.lobby_wait = lobby_wait
+        self.n_strategy_players = n_strategy_players
+        self.penetration = penetration
+        self.rules = rules
+        self.diff = diff
+        self.lobby = []             # Connections waiting for a table
+        self.lobby_timer = None
+        self.n_tables = 0
+        self.tables = set()         # Tasks of the tables being played
+        self.strategy = None        # BasicStrategy shared by the computer players
+        self.loop = None
+
+    async def prepare(self):
+        """
+        Load the computer players' strategy once, before any table opens.
+        A cold solve takes seconds, so it runs in a worker thread instead
+        of stalling the event loop.
+        """
+        self.loop = asyncio.get_running_loop()
+        if self.n_strategy_players and self.strategy is None:
+            self.strategy = await self.loop.run_in_executor(None, self._load_strategy)
+
+    def _load_strategy(self):
+        """
+        Load (or solve) the basic strategy, and its surrender table if the
+        rules offer surrender, for the server's decks and rules.
+        """
+        # Imported here so a server without computer players doesn't load the solver.
+        from Analysis.BasicStrategy import BasicStrategy
+        strategy = BasicStrategy(self.n_decks, rules=self.rules)
+        if self.rules.surrender:
+            strategy.surrender_table()
+        return strategy
+
+    async def start_tcp(self, host='127.0.0.1', port=8000):
+        """
+        Start accepting players on a TCP port. Return the asyncio server.
+        """
+        await self.prepare()
+        return await asyncio.start_server(self.handle_connection, host, port,
+                                          limit=1 << 16, backlog=4096)
+
+    async def start_unix(self, path):
+        """
+        Start accepting players on a Unix socket. Return the asyncio server.
+        """
+        await self.prepare()
+        return await asyncio.start_unix_server(self.handle_connection, path,
+                                               limit=1 << 16, backlog=4096)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Greet a new client, read their name and seat them.
+        """
+        conn = Connection(reader, writer)
+        reader_task = asyncio.ensure_future(conn.read_answers())
+        name = await conn.ask('Welcome to Blackjack! What is your name?', self.timeout)
+        if name:
+            conn.name = name
+            self.join(conn)
+            await conn.finished.wait()
+        reader_task.cancel()
+        writer.close()
+
+    def join(self, conn):
+        """
+        Add a player to the lobby, opening a table once it is full.
+        """
+        self.lobby.append(conn)
+        if len(self.lobby) >= self.seats:
+            self.open_table()
+        elif self.lobby_timer is None:
+            self.lobby_timer = self.loop.call_later(self.lobby_wait, self.open_table)
+
+    def open_table(self):
+        """
+        Seat the first players in the lobby at a new table and start
+        dealing in a new task.
+        """
+        if self.lobby_timer is not None:
+            self.lobby_timer.cancel()
+            self.lobby_timer = None
+        conns = [conn for conn in self.lobby[:self.seats] if not conn.closed]
+        self.lobby = self.lobby[self.seats:]
+        if self.lobby:
+            self.lobby_timer = self.loop.call_later(self.lobby_wait, self.open_table)
+        if not conns:
+            return
+
+        def broadcast(text):
+            for conn in conns:
+                conn.send(text)
+
+        game = Game([conn.name for conn in conns], self.n_decks,
+                    n_strategy_players=self.n_strategy_players,
+                    penetration=self.penetration, start=False, rules=self.rules,
+                    renderer=Renderer(diff=self.diff, write=broadcast), strategy=self.strategy)
+        for player, conn in zip(game.players, conns):
+            player.input = self._input_source(conn)
+        self.n_tables += 1
+        table = self.loop.create_task(self._run_table(game, conns))
+        self.tables.add(table)
+        table.add_done_callback(self._table_done)
+
+    def _table_done(self, table):
+        """
+        Forget a finished table, reporting the error if it crashed.
+        """
+        self.tables.discard(table)
+        if not table.cancelled() and table.exception() is not None:
+            error = table.exception()
+            print('Table failed:', file=sys.stderr)
+            traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
+
+    def _input_source(self, conn):
+        """
+        Input source for a seated player: asks on their connection and
+        waits until they answer or time out.
+        """
+        async def ask(prompt=''):
+            answer = await conn.ask(prompt, self.timeout)
+            if answer is None:
+                answer = timeout_answer(prompt)
+                conn.send('No answer, playing ' + answer + '\n')
+            return answer
+        return ask
+
+    async def _run_table(self, game, conns):
+        """
+        Play a table's game until every player has left.
+        """
+        try:
+            await play_steps(game.game_steps())
+        finally:
+            for conn in conns:
+                conn.finished.set()
+
+
+async def serve(args):
+    server = TableServer(seats=args.seats, n_decks=args.decks, timeout=args.timeout,
+                         lobby_wait=args.lobby_wait, n_strategy_players=args.computers,
+                         penetration=args.penetration, diff=args.diff,
+                         rules=rules_from_arguments(args))
+    if args.profile:
+        # Imported here so the profiler is only loaded when it is used.
+        from Simulation.Profiler import Profiler
+        profiler = Profiler()
+        profiler.install()
+        profiler.start_export(args.profile, args.profile_interval, args.profile_format)
+    if args.unix:
+        listener = await server.start_unix(args.unix)
+    else:
+        listener = await server.start_tcp(args.host, args.port)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve blackjack tables to many players.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--unix', help='Listen on a Unix socket instead of TCP.')
+    parser.add_argument('--seats', type=int, default=7)
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help='Seconds to answer a prompt before standing.')
+    parser.add_argument('--lobby-wait', type=float, default=1.0)
+    parser.add_argument('--computers', type=int, default=0)
+    parser.add_argument('--penetration', type=float, default=0.75)
+    add_rule_arguments(parser)
+    parser.add_argument('--diff', action='store_true',
+                        help='Only send hands that changed since they were last sent.')
+    parser.add_argument('--profile', help='Periodically write method timings to this file.')
+    parser.add_argument('--profile-format', choices=['json', 'prometheus'], default='json')
+    parser.add_argument('--profile-interval', type=float, default=10.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
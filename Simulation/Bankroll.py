@@ -0,0 +1,341 @@
+"""
+Bankroll and risk of ruin simulation.
+
+Plays many independent bankroll trajectories with the headless Engine: one
+seat starts with a bankroll, plays basic strategy with a betting strategy,
+and stops after n_rounds rounds, once it can no longer cover the minimum
+bet (ruin), or once its money reaches a target. The seat's money is the
+ordinary Player.money, so every trajectory follows the game's settlement.
+
+Betting strategies are called with the seat's money and the shoe's true
+count and return the amount to bet:
+ FlatBet       the same bet every round
+ SpreadRamp    a bet spread that rises with the true count
+ KellyBet      a fraction of the Kelly bet for the edge at the true count
+
+Trajectories are split into chunks of CHUNK_SIZE. Each chunk is played on
+its own shoe seeded from (seed, chunk index), so results don't depend on
+the number of workers. Workers return a BankrollSummary per chunk (totals
+and a fixed size drawdown histogram, no per-trajectory data) which are
+merged as they arrive, so memory stays fixed however many trajectories
+and rounds are played.
+
+Run from the project directory:
+ python3 -m Simulation.Bankroll n_trajectories n_rounds [--bankroll B] [--strategy flat|ramp|kelly]
+    [rule options, see Rules.add_rule_arguments]
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+
+from Analysis.BasicStrategy import BasicStrategy
+from Deck.CompactShoe import CompactShoe
+from Game.Rules import DEFAULT_RULES, add_rule_arguments, rules_from_arguments
+from Simulation.Engine import Engine, never
+from Simulation.Runner import worker_rng
+from Simulation.Statistics import Statistics
+
+CHUNK_SIZE = 100            # Trajectories played per task
+DRAWDOWN_BINS = 1000        # Histogram bins, each 1% of the starting bankroll
+
+
+class FlatBet:
+    def __init__(self, unit=10):
+        """
+        Bet unit every round.
+        """
+        self.unit = unit
+        self.min_bet = unit
+
+    def __call__(self, money, true_count):
+        return self.unit
+
+
+class SpreadRamp:
+    def __init__(self, unit=10, ramp=((2, 2), (3, 4), (4, 6), (5, 8))):
+        """
+        Bet a multiple of unit that rises with the true count.
+        Args:
+         :Int unit: Bet at or below the lowest true count in ramp.
+         :Tuple ramp: (true count, units) pairs in increasing true count.
+            The bet is unit times the units of the highest true count
+            reached.
+        """
+        self.unit = unit
+        self.ramp = tuple(ramp)
+        self.min_bet = unit
+
+    def __call__(self, money, true_count):
+        units = 1
+        for count, ramp_units in self.ramp:
+            if true_count < count:
+                break
+            units = ramp_units
+        return self.unit * units
+
+
+class KellyBet:
+    def __init__(self, min_bet=10, max_bet=1000, fraction=0.5, base_edge=-0.005,
+                 edge_per_count=0.005, variance=1.3):
+        """
+        Bet a fraction of the Kelly bet, money * edge / variance, using an
+        edge estimated from the true count (the Hi-Lo rule of thumb is
+        about half a percent per true count).
+        Args:
+         :Int min_bet: Bet when the edge is negative, and the table minimum.
+         :Int max_bet: Table maximum.
+         :Float fraction: Fraction of full Kelly to bet.
+         :Float base_edge: Player's edge at a true count of 0.
+         :Float edge_per_count: Edge gained per true count.
+         :Float variance: Variance of a round per unit bet.
+        """
+        self.min_bet = min_bet
+        self.max_bet = max_bet
+        self.fraction = fraction
+        self.base_edge = base_edge
+        self.edge_per_count = edge_per_count
+        self.variance = variance
+
+    def __call__(self, money, true_count):
+        edge = self.base_edge + self.edge_per_count * true_count
+        if edge <= 0:
+            return self.min_bet
+        bet = int(self.fraction * money * edge / self.variance)
+        return max(self.min_bet, min(bet, self.max_bet))
+
+
+STRATEGIES = {'flat': FlatBet, 'ramp': SpreadRamp, 'kelly': KellyBet}
+
+
+class BankrollSummary:
+    def __init__(self, bankroll):
+        """
+        Initialize empty totals for trajectories started with bankroll.
+        """
+        self.bankroll = bankroll
+        self.trajectories = 0
+        self.ruined = 0             # Trajectories that couldn't cover the minimum bet.
+        self.reached_target = 0
+        self.rounds_to_ruin = 0     # Sum of rounds played by ruined trajectories.
+        self.final_money = 0        # Sum of money at the end of every trajectory.
+        self.stats = Statistics()   # Every round of every trajectory.
+        # Bin i counts trajectories whose largest drop from a peak was
+        # below (i + 1)% of the starting bankroll. The last bin is unbounded.
+        self.drawdowns = [0] * DRAWDOWN_BINS
+
+    def record(self, final_money, max_drawdown, rounds, ruined, reached_target):
+        """
+        Record one finished trajectory.
+        """
+        self.trajectories += 1
+        self.final_money += final_money
+        if ruined:
+            self.ruined += 1
+            self.rounds_to_ruin += rounds
+        if reached_target:
+            self.reached_target += 1
+        bin_width = self.bankroll / 100
+        self.drawdowns[min(int(max_drawdown / bin_width), DRAWDOWN_BINS - 1)] += 1
+
+    def merge(self, other):
+        """
+        Add the totals from another BankrollSummary to this one.
+        """
+        self.trajectories += other.trajectories
+        self.ruined += other.ruined
+        self.reached_target += other.reached_target
+        self.rounds_to_ruin += other.rounds_to_ruin
+        self.final_money += other.final_money
+        self.stats.merge(other.stats)
+        for i, n in enumerate(other.drawdowns):
+            self.drawdowns[i] += n
+
+    def risk_of_ruin(self):
+        """
+        Fraction of trajectories that went broke.
+        """
+        if self.trajectories == 0:
+            return 0.0
+        return self.ruined / self.trajectories
+
+    def hourly_ev(self, rounds_per_hour):
+        """
+        Expected win per hour.
+        """
+        return self.stats.mean_round() * rounds_per_hour
+
+    def hourly_sd(self, rounds_per_hour):
+        """
+        Standard deviation of the result of an hour's play.
+        """
+        return (self.stats.variance_round() * rounds_per_hour) ** 0.5
+
+    def n0(self):
+        """
+        N0: rounds needed for the expected win to equal one standard
+        deviation. Infinite without a positive expectation.
+        """
+        mean = self.stats.mean_round()
+        if mean <= 0:
+            return float('inf')
+        return self.stats.variance_round() / (mean * mean)
+
+    def drawdown_percentile(self, q):
+        """
+        Largest drop from a peak (in money) that a fraction q of the
+        trajectories stayed under, to the histogram's 1% resolution.
+        """
+        target = q * self.trajectories
+        seen = 0
+        for i, n in enumerate(self.drawdowns):
+            seen += n
+            if n and seen >= target:
+                return (i + 1) * self.bankroll / 100
+        return 0.0
+
+    def summary(self, rounds_per_hour=100):
+        """
+        Return a multi-line, human readable summary.
+        """
+        mean_final = self.final_money / self.trajectories if self.trajectories else 0.0
+        n0 = self.n0()
+        lines = [
+            "Trajectories: %d  Rounds: %d" % (self.trajectories, self.stats.rounds),
+            "Risk of ruin: %.4f  Reached target: %.4f" % (
+                self.risk_of_ruin(), self.reached_target / max(1, self.trajectories)),
+            "Mean final bankroll: %.2f (started with %d)" % (mean_final, self.bankroll),
+            "EV per unit wagered: %.5f" % self.stats.ev(),
+            "Hourly EV: %.2f  Hourly SD: %.2f (%d rounds per hour)" % (
+                self.hourly_ev(rounds_per_hour), self.hourly_sd(rounds_per_hour), rounds_per_hour),
+            "N0: %.0f rounds (%.1f hours)" % (n0, n0 / rounds_per_hour),
+            "Max drawdown p50: %.0f  p90: %.0f  p99: %.0f" % (
+                self.drawdown_percentile(0.5), self.drawdown_percentile(0.9),
+                self.drawdown_percentile(0.99)),
+        ]
+        return "\n".join(lines)
+
+
+def run_chunk(n_trajectories, n_rounds, bankroll, bet_strategy, target, seed, chunk,
+              n_decks, penetration, rules):
+    """
+    Play n_trajectories trajectories on one shoe and return their
+    BankrollSummary.
+    """
+    deck = CompactShoe(n_decks, rng=worker_rng(seed, chunk), penetration=penetration)
+    strategy = BasicStrategy(n_decks, rules=rules)
+    engine = Engine(1, n_decks, bet=lambda seat, money: bet_strategy(money, deck.true_count()),
+                    split=strategy.split, double=strategy.double, hit=strategy.hit,
+                    surrender=strategy.surrender if rules.surrender else never,
+                    deck=deck, rules=rules)
+    player = engine.players[0]
+    min_bet = bet_strategy.min_bet
+    play_round = engine.play_round
+
+    summary = BankrollSummary(bankroll)
+    summary.stats = engine.stats
+    for t in range(n_trajectories):
+        # Every trajectory starts from a fresh shoe.
+        deck.reset_deck()
+        player.money = bankroll
+        peak = bankroll
+        max_drawdown = 0
+        ruined = reached_target = False
+        rounds = 0
+        while rounds < n_rounds:
+            if player.money < min_bet:
+                ruined = True
+                break
+            if target is not None and player.money >= target:
+                reached_target = True
+                break
+            play_round()
+            rounds += 1
+            money = player.money
+            if money > peak:
+                peak = money
+            elif peak - money > max_drawdown:
+                max_drawdown = peak - money
+        summary.record(player.money, max_drawdown, rounds, ruined, reached_target)
+    return summary
+
+
+def run_bankroll(n_trajectories, n_rounds, bankroll=10000, bet_strategy=None, target=None,
+                 n_workers=None, seed=0, n_decks=6, penetration=0.75, rules=DEFAULT_RULES,
+                 on_chunk=None):
+    """
+    Play n_trajectories bankroll trajectories split across processes.
+    Args:
+     :Int n_trajectories: Number of independent trajectories.
+     :Int n_rounds: Most rounds played by each trajectory.
+     :Int bankroll: Money every trajectory starts with.
+     :Object bet_strategy: FlatBet, SpreadRamp, KellyBet or any picklable
+        callable taking (money, true count) with a min_bet attribute.
+     :Int target: Stop a trajectory once its money reaches this.
+     :Int n_workers: Number of processes. Defaults to the number of CPUs.
+     :Int seed: Seed for the run. Each chunk derives its own stream from it.
+     :Int n_decks: Number of decks in each shoe.
+     :Float penetration: Shoe penetration (see CompactShoe).
+     :Rules rules: House rules. The seat plays basic strategy for them.
+     :Function on_chunk: Called with the merged BankrollSummary each time
+        a chunk finishes.
+
+    Return:
+     :BankrollSummary: Totals merged across every trajectory.
+    """
+    if bet_strategy is None:
+        bet_strategy = FlatBet()
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    sizes = [CHUNK_SIZE] * (n_trajectories // CHUNK_SIZE)
+    if n_trajectories % CHUNK_SIZE:
+        sizes.append(n_trajectories % CHUNK_SIZE)
+    args = [(size, n_rounds, bankroll, bet_strategy, target, seed, chunk, n_decks,
+             penetration, rules) for chunk, size in enumerate(sizes)]
+
+    total = BankrollSummary(bankroll)
+    if n_workers == 1:
+        for chunk_args in args:
+            total.merge(run_chunk(*chunk_args))
+            if on_chunk is not None:
+                on_chunk(total)
+        return total
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        # Every total is a sum of integers, so merge order doesn't matter.
+        for future in as_completed([executor.submit(run_chunk, *chunk_args) for chunk_args in args]):
+            total.merge(future.result())
+            if on_chunk is not None:
+                on_chunk(total)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate bankroll trajectories.")
+    parser.add_argument("n_trajectories", type=int)
+    parser.add_argument("n_rounds", type=int)
+    parser.add_argument("--bankroll", type=int, default=10000)
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default='flat')
+    parser.add_argument("--unit", type=int, default=10, help="Minimum bet.")
+    parser.add_argument("--target", type=int, help="Stop a trajectory once it reaches this.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--decks", type=int, default=6)
+    parser.add_argument("--penetration", type=float, default=0.75)
+    parser.add_argument("--rounds-per-hour", type=int, default=100)
+    add_rule_arguments(parser)
+    args = parser.parse_args()
+
+    bet_strategy = STRATEGIES[args.strategy](args.unit)
+
+    def progress(summary):
+        print("%d/%d trajectories, risk of ruin so far %.4f" % (
+            summary.trajectories, args.n_trajectories, summary.risk_of_ruin()))
+
+    summary = run_bankroll(args.n_trajectories, args.n_rounds, args.bankroll, bet_strategy,
+                           args.target, args.workers, args.seed, args.decks, args.penetration,
+                           rules_from_arguments(args), on_chunk=progress)
+    print(summary.summary(args.rounds_per_hour))
+
+
+if __name__ == '__main__':
+    main()
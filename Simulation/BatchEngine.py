@@ -0,0 +1,389 @@
+"""
+Vectorized simulation of many independent tables at once (requires NumPy).
+
+Every table has one seat playing a BasicStrategy table with a flat bet, and
+all tables play their rounds in lockstep. Shoes are rows of a 2-D array of
+Card.rank_index codes. A hand is a single key (2 * hard total + has Ace),
+so its score, the strategy's action against each upcard, the dealer's hit
+rule and the key after drawing each rank are precomputed lookups, and each
+step of player or dealer play gathers from them for the tables still
+acting (an index array that shrinks as hands finish). Splits are tracked in
+one hand slot per hand Rules.max_split_hands allows.
+
+The table's Rules are followed as by the scalar Engine: the dealer's hit
+rule and checking for blackjack before anyone plays, the blackjack payout,
+double_totals and doubling after splits, max_split_hands, resplit_aces,
+and late or early surrender with the BasicStrategy surrender table. Like
+basic strategy, the seat never takes insurance. Two differences remain:
+ - Ten valued cards are all one rank index, so any two of them are a pair
+   even without split_unlike_tens (basic strategy never splits them).
+ - Hands made by splitting are played after the seat's other hands rather
+   than right after the hand they were split from.
+
+Shoes are reshuffled at the start of a round once fewer than RESHUFFLE_AT
+cards remain. A round that still runs its shoe out reshuffles the discards
+and deals on from them (as Deck.draw does), and the whole shoe is
+reshuffled at the start of the next round.
+
+Run from the project directory to compare with the scalar Engine:
+ python3 -m Simulation.BatchEngine [n_tables] [n_rounds] [n_decks]
+    [rule options, see Rules.add_rule_arguments]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from Analysis.BasicStrategy import DOUBLE, HIT, PAIR, SOFT, N_ROWS, load_table
+from Analysis.DealerOutcome import full_shoe
+from Game.Rules import DEFAULT_RULES, EARLY, MAX_SCORE, NATURAL, N_STATES, add_rule_arguments, \
+    rules_from_arguments
+from Simulation.Statistics import Statistics
+
+RESHUFFLE_AT = 52
+# Hard totals a hand key can hold. Nobody draws to a score of 21 or more,
+# so 30 is the largest reachable total (larger ones are capped, still bust).
+N_HARD = 31
+
+
+def payout_matrix(rules=DEFAULT_RULES):
+    """
+    Multiplier from Hand.compute_reward for every (player state, dealer
+    state), where a state is a score or Rules.NATURAL.
+    """
+    return np.array(rules.payouts, dtype=float).reshape(N_STATES, N_STATES)
+
+
+def _hand_tables(table, surrender_table, rules):
+    """
+    Precompute the lookups play_round gathers from, indexed by hand key
+    (2 * hard total + has Ace), upcard and drawn card.
+    Args:
+     :array table: Basic strategy table, shape (N_ROWS, 10).
+     :array surrender_table: Surrender table of the same shape, or None.
+     :Rules rules: House rules.
+
+    Return:
+     :Dict: Arrays of the lookups, flattened so they take a single index.
+    """
+    keys = np.arange(2 * N_HARD)
+    hard = keys // 2
+    ace = (keys % 2).astype(bool)
+    soft = ace & (hard <= 11)
+    scores = np.where(soft, hard + 10, hard)
+    states = np.minimum(scores, MAX_SCORE - 1)
+
+    # Strategy row of each key: soft scores have their own rows.
+    rows = np.minimum(np.where(soft, SOFT + scores, scores), N_ROWS - 1)
+    actions = table[rows]                           # (key, upcard)
+    playing = (scores < 21)[:, None]
+    hits = playing & ((actions == HIT) | (actions == DOUBLE))
+    double_allowed = np.frombuffer(rules.double_table, dtype=np.uint8)[states].astype(bool)
+    doubles = playing & (actions >= DOUBLE) & double_allowed[:, None]
+
+    dealer_table = np.frombuffer(rules.dealer_table, dtype=np.uint8).astype(bool)
+    dealer_hits = dealer_table[states * 2 + soft]
+
+    # Key after drawing each rank, and the key of every two card hand.
+    ranks = np.arange(10)
+    next_hard = np.minimum(hard[:, None] + ranks + 1, N_HARD - 1)
+    next_keys = 2 * next_hard + (ace[:, None] | (ranks == 0))
+    two_card_keys = next_keys[2 * (ranks + 1) + (ranks == 0)]     # (first, second)
+
+    # Split decisions by pair rank + 1 (row 0 is "not a pair").
+    splits = np.zeros((11, 10), dtype=bool)
+    splits[1:] = table[PAIR:PAIR + 10] == 1
+
+    # Surrender decisions by (first, second, upcard): pairs use their own
+    # rows, soft hands never surrender.
+    surrenders = np.zeros((10, 10, 10), dtype=bool)
+    if surrender_table is not None:
+        pair_rows = PAIR + ranks
+        two_card_scores = scores[two_card_keys]
+        for first in range(10):
+            for second in range(10):
+                if first == second:
+                    row = pair_rows[first]
+                elif first == 0 or second == 0:
+                    continue
+                else:
+                    row = two_card_scores[first, second]
+                surrenders[first, second] = surrender_table[row] == 1
+
+    return {
+        'scores': scores,
+        'states': states,
+        'hits': hits.ravel(),
+        'doubles': doubles.ravel(),
+        'dealer_hits': dealer_hits,
+        'next_keys': next_keys.ravel(),
+        'two_card_keys': two_card_keys.ravel(),
+        'splits': splits.ravel(),
+        'surrenders': surrenders.ravel(),
+    }
+
+
+class BatchEngine:
+    def __init__(self, n_tables, n_decks, bet=10, table=None, seed=None,
+                 rules=DEFAULT_RULES):
+        """
+        Initialize n_tables tables, each with its own shuffled shoe.
+        Args:
+         :Int n_tables: Number of independent tables.
+         :Int n_decks: Number of decks in each shoe.
+         :Int bet: Flat bet placed every round.
+         :array table: Basic strategy table (see Analysis.BasicStrategy).
+            Defaults to the table solved for the rules.
+         :Int seed: Seed for the NumPy random generator.
+         :Rules rules: House rules (see the module docstring for how
+            closely they are followed).
+        """
+        self.n_tables = n_tables
+        self.n_decks = n_decks
+        self.bet = bet
+        self.rules = rules
+        self.rng = np.random.default_rng(seed)
+
+        if table is None:
+            table = load_table(n_decks, rules=rules)
+        self.table = np.frombuffer(bytes(table), dtype=np.uint8).reshape(N_ROWS, 10)
+        surrender_table = None
+        if rules.surrender:
+            surrender_table = np.frombuffer(bytes(load_table(n_decks, rules.surrender, rules)),
+                                            dtype=np.uint8).reshape(N_ROWS, 10)
+        self.lookups = _hand_tables(self.table, surrender_table, rules)
+        self.payouts = payout_matrix(rules).ravel()
+        self.max_hands = max(1, rules.max_split_hands)
+
+        # One shoe per row, as rank indices. flat is a view of the same cards.
+        composition = full_shoe(n_decks)
+        base = np.repeat(np.arange(10, dtype=np.intp), composition)
+        self.n_cards = len(base)
+        self.shoes = np.tile(base, (n_tables, 1))
+        self.flat = self.shoes.reshape(-1)
+        self.offsets = np.arange(n_tables) * self.n_cards
+        self.pos = np.zeros(n_tables, dtype=np.intp)
+        # Cards that can be dealt before the next reshuffle (fewer than
+        # n_cards after a round ran its shoe out), and the position each
+        # table's round started at (the cards before it are discards).
+        self.limit = np.full(n_tables, self.n_cards, dtype=np.intp)
+        self.round_start = np.zeros(n_tables, dtype=np.intp)
+        self._reshuffle(np.ones(n_tables, dtype=bool))
+
+        self.stats = Statistics()
+
+    def _reshuffle(self, mask):
+        """
+        Reshuffle the whole shoes of the masked tables.
+        """
+        idx = np.nonzero(mask)[0]
+        if len(idx):
+            self.shoes[idx] = self.rng.permuted(self.shoes[idx], axis=1)
+            self.pos[idx] = 0
+            self.limit[idx] = self.n_cards
+
+    def _reshuffle_discards(self, idx):
+        """
+        Reshuffle the discards of tables whose shoe ran out mid-round and
+        deal on from them, leaving the cards in play out. A table without
+        discards gets a whole new shoe, as in BlackjackDeck.reset_deck.
+        """
+        for table in idx:
+            n_discards = self.round_start[table]
+            if n_discards == 0:
+                n_discards = self.n_cards
+            shoe = self.shoes[table]
+            shoe[:n_discards] = self.rng.permutation(shoe[:n_discards])
+            self.pos[table] = 0
+            self.limit[table] = n_discards
+            self.round_start[table] = 0
+
+    def _draw(self, idx):
+        """
+        Draw one card for each table in idx.
+        Return an array of their rank indices.
+        """
+        pos = self.pos[idx]
+        if (pos >= self.limit[idx]).any():
+            self._reshuffle_discards(idx[pos >= self.limit[idx]])
+            pos = self.pos[idx]
+        self.pos[idx] = pos + 1
+        return self.flat[self.offsets[idx] + pos]
+
+    def run(self, n_rounds):
+        """
+        Play n_rounds rounds at every table.
+        Return the house edge over everything played so far.
+        """
+        for i in range(n_rounds):
+            self.play_round()
+        return self.stats.house_edge()
+
+    def play_round(self):
+        """
+        Play one round at every table in lockstep.
+        """
+        n = self.n_tables
+        rules = self.rules
+        lookups = self.lookups
+        scores = lookups['scores']
+        next_keys = lookups['next_keys']
+        two_card_keys = lookups['two_card_keys']
+        self._reshuffle((self.limit - self.pos < RESHUFFLE_AT) | (self.limit < self.n_cards))
+        self.round_start[:] = self.pos
+
+        # Deal in Game order: player, dealer (hole), player, dealer (upcard).
+        # Every shoe has at least RESHUFFLE_AT cards left.
+        at = self.offsets + self.pos
+        first = self.flat[at]
+        hole = self.flat[at + 1]
+        second = self.flat[at + 2]
+        upcard = self.flat[at + 3]
+        self.pos += 4
+
+        # Hand slots: (hand, table). units is the bet in flat bets, 0 for
+        # slots not in play; pairs is the rank of a pair + 1, else 0.
+        slots = self.max_hands
+        keys = np.zeros((slots, n), dtype=np.intp)
+        units = np.zeros((slots, n), dtype=np.intp)
+        pairs = np.zeros((slots, n), dtype=np.intp)
+        n_hands = np.ones(n, dtype=np.intp)
+
+        two_cards = first * 10 + second
+        keys[0] = two_card_keys[two_cards]
+        units[0] = 1
+        pairs[0] = np.where(first == second, first + 1, 0)
+        naturals = scores[keys[0]] == 21
+        dealer_keys = two_card_keys[hole * 10 + upcard]
+        dealer_naturals = scores[dealer_keys] == 21
+
+        # Early surrender comes before the dealer checks for blackjack, late
+        # surrender after. Nobody plays against a dealer blackjack.
+        surrendered = np.zeros(n, dtype=bool)
+        if rules.surrender:
+            surrendered = lookups['surrenders'][two_cards * 10 + upcard]
+            if rules.surrender != EARLY:
+                surrendered &= ~dealer_naturals
+        active = np.nonzero(~dealer_naturals & ~surrendered)[0]
+
+        for h in range(slots):
+            if h:
+                active = active[n_hands[active] > h]
+            if not len(active):
+                break
+
+            # Split (and resplit) pairs while there are free hand slots.
+            while slots > 1:
+                pair = pairs[h, active]
+                split = (lookups['splits'][pair * 10 + upcard[active]]
+                         & (n_hands[active] < slots))
+                if not rules.resplit_aces:
+                    # Only hand 0 of a table with one hand wasn't made by splitting.
+                    split &= (pair != 1) | (n_hands[active] == 1)
+                idx = active[split]
+                if not len(idx):
+                    break
+                rank = pairs[h, idx] - 1
+                new = n_hands[idx]
+                # The current slot keeps the first card, the new slot gets the second.
+                for slot in (h, new):
+                    drawn = self._draw(idx)
+                    keys[slot, idx] = two_card_keys[rank * 10 + drawn]
+                    pairs[slot, idx] = np.where(drawn == rank, rank + 1, 0)
+                    units[slot, idx] = 1
+                n_hands[idx] += 1
+
+            # Double down: one card, double the bet. Every hand in the slot
+            # still has its first two cards.
+            key = keys[h, active]
+            up = upcard[active]
+            double = lookups['doubles'][key * 10 + up]
+            if not rules.double_after_split:
+                double &= n_hands[active] == 1
+            idx = active[double]
+            if len(idx):
+                keys[h, idx] = next_keys[key[double] * 10 + self._draw(idx)]
+                units[h, idx] = 2
+
+            # Hit until the strategy stays or the hand reaches 21.
+            stays = ~double
+            idx, key, up = active[stays], key[stays], up[stays]
+            hits = lookups['hits']
+            while True:
+                hit = hits[key * 10 + up]
+                idx, key, up = idx[hit], key[hit], up[hit]
+                if not len(idx):
+                    break
+                key = next_keys[key * 10 + self._draw(idx)]
+                keys[h, idx] = key
+
+        # Dealer plays out (the dealer always plays, as in Game.play_dealer).
+        dealer_hits = lookups['dealer_hits']
+        idx = np.nonzero(dealer_hits[dealer_keys])[0]
+        while len(idx):
+            key = next_keys[dealer_keys[idx] * 10 + self._draw(idx)]
+            dealer_keys[idx] = key
+            idx = idx[dealer_hits[key]]
+
+        # Settle every hand slot with a lookup.
+        states = lookups['states'][keys]
+        states[0, naturals] = NATURAL
+        dealer_states = np.where(dealer_naturals, NATURAL, lookups['states'][dealer_keys])
+        multipliers = self.payouts[states * N_STATES + dealer_states]
+        multipliers[0, surrendered] = 0.5
+        bets = units * self.bet
+        # Truncated like Player.settle_hand.
+        winnings = (multipliers * bets).astype(np.int64)
+        net = (winnings - bets).sum(axis=0)
+        in_play = units > 0
+
+        stats = self.stats
+        stats.rounds += n
+        stats.hands += int(n_hands.sum())
+        stats.wins += int((in_play & (multipliers > 1)).sum())
+        stats.pushes += int((in_play & (multipliers == 1)).sum())
+        stats.losses += int((in_play & (multipliers < 1)).sum())
+        stats.blackjacks += int(naturals.sum())
+        stats.total_wagered += int(bets.sum())
+        stats.total_net += int(net.sum())
+        stats.sum_sq_net += int((net * net).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the batch and scalar engines.")
+    parser.add_argument("n_tables", type=int, nargs='?', default=10000)
+    parser.add_argument("n_rounds", type=int, nargs='?', default=100)
+    parser.add_argument("n_decks", type=int, nargs='?', default=8)
+    add_rule_arguments(parser)
+    args = parser.parse_args()
+    n_tables, n_rounds, n_decks = args.n_tables, args.n_rounds, args.n_decks
+    rules = rules_from_arguments(args)
+
+    from Analysis.BasicStrategy import BasicStrategy
+    from Deck.CompactShoe import CompactShoe
+    from Simulation.Engine import Engine, never
+    import random
+
+    batch = BatchEngine(n_tables, n_decks, seed=0, rules=rules)
+    start = time.perf_counter()
+    batch.run(n_rounds)
+    batch_rate = n_tables * n_rounds / (time.perf_counter() - start)
+
+    strategy = BasicStrategy(n_decks, rules=rules)
+    deck = CompactShoe(n_decks, rng=random.Random(0))
+    deck.shuffle()
+    engine = Engine(1, n_decks, split=strategy.split, double=strategy.double,
+                    hit=strategy.hit, bankroll=float('inf'), deck=deck, rules=rules,
+                    surrender=strategy.surrender if rules.surrender else never)
+    scalar_rounds = min(n_tables * n_rounds, 200000)
+    start = time.perf_counter()
+    engine.run(scalar_rounds)
+    scalar_rate = scalar_rounds / (time.perf_counter() - start)
+
+    print("Batch:  %.0f rounds/s  house edge %.4f" % (batch_rate, batch.stats.house_edge()))
+    print("Scalar: %.0f rounds/s  house edge %.4f" % (scalar_rate, engine.stats.house_edge()))
+    print("Speedup: %.1fx" % (batch_rate / scalar_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""
+Headless blackjack engine for batch simulation.
+
+Plays rounds under the same rules as Game (the dealer's hit rule and
+payouts from a Rules object, scoring from Hand.score_hand), but every
+player decision comes from a callback and nothing is read from or
+written to the terminal.
+
+Decision callbacks:
+ bet(seat, money) -> Int amount to bet (clamped to [0, money])
+ split(hand, upcard) -> Bool split the pair
+ double(hand, upcard) -> Bool double down
+ hit(hand, upcard) -> Bool take another card (False stays)
+ surrender(hand, upcard) -> Bool give up the first two cards for half the
+    bet (only asked when the rules offer surrender)
+ insure(seat, deck) -> Bool take insurance against an Ace upcard
+
+upcard is the dealer's visible Card. While insurance (and early surrender)
+is decided the dealer's hole card is still counted as part of the shoe, so
+deck.get_composition and deck.true_count don't reveal it.
+"""
+
+from Deck.CompactShoe import CompactShoe
+from Game.Hand import HIT, STAND, SURRENDER
+from Game.Player import Player
+from Game.Rules import DEFAULT_RULES, EARLY, LATE
+from Simulation.Statistics import Statistics
+
+
+def flat_bet(seat, money):
+    """
+    Default bet callback. Bet 10 every round.
+    """
+    return 10
+
+
+def never(hand, upcard):
+    """
+    Default split/double callback. Always decline.
+    """
+    return False
+
+
+def never_insure(seat, deck):
+    """
+    Default insurance callback. Always decline.
+    """
+    return False
+
+
+def insure_at_true_count(threshold):
+    """
+    Return an insurance callback that insures once the shoe's true count
+    reaches threshold (3 is the usual Hi-Lo index).
+    """
+    def insure(seat, deck):
+        return deck.true_count() >= threshold
+    return insure
+
+
+def hit_below_17(hand, upcard):
+    """
+    Default hit callback. Mimic the dealer and hit below 17.
+    """
+    return hand.score_hand() < 17
+
+
+class Engine:
+    def __init__(self, n_seats, n_decks, bet=flat_bet, split=never,
+                 double=never, hit=hit_below_17, bankroll=1000, deck=None, log=None,
+                 rules=DEFAULT_RULES, surrender=never, insure=never_insure):
+        """
+        Initialize a headless table.
+        Args:
+         :Int n_seats: Number of players seated at the table.
+         :Int n_decks: Number of decks in the shoe.
+         :Function bet: Bet callback.
+         :Function split: Split callback.
+         :Function double: Double down callback.
+         :Function hit: Hit/stay callback.
+         :Int bankroll: Money each seat starts with.
+         :Deck deck: Shoe to draw from. Defaults to a shuffled CompactShoe.
+         :RoundLogWriter log: Optional log every settled hand is written to.
+         :Rules rules: House rules for the table.
+         :Function surrender: Surrender callback.
+         :Function insure: Insurance callback.
+        """
+        self.bet = bet
+        self.split = split
+        self.double = double
+        self.hit = hit
+        self.surrender = surrender
+        self.insure = insure
+
+        self.rules = rules
+        self.players = [Player("Seat " + str(i), rules=rules) for i in range(n_seats)]
+        for player in self.players:
+            player.money = bankroll
+        self.dealer = Player("Dealer", rules=rules)
+
+        if deck is None:
+            deck = CompactShoe(n_decks)
+            deck.shuffle()
+        self.deck = deck
+
+        # Totals across all rounds played.
+        self.stats = Statistics()
+        self.round_number = 0
+        self.log = log
+
+    def run(self, n_rounds):
+        """
+        Play n_rounds rounds.
+        Return the house edge observed so far (see house_edge).
+        """
+        play_round = self.play_round
+        for i in range(n_rounds):
+            play_round()
+        return self.house_edge()
+
+    def play_round(self):
+        """
+        Play a single round: bets, initial deal, insurance and the dealer's
+        peek, player decisions, dealer play and settlement.
+        Return the net amount won (negative if lost) by all seats combined.
+        """
+        deck = self.deck
+        dealer = self.dealer
+
+        # Reshuffle at the round boundary if the shoe policy says so.
+        deck.start_round()
+
+        # Bets
+        for seat, player in enumerate(self.players):
+            amount = self.bet(seat, player.money)
+            amount = max(0, min(amount, player.money))
+            player.place_bet(amount)
+            player.reset()
+        dealer.reset()
+
+        # Two cards each. The dealer's second card is the upcard.
+        for i in range(2):
+            for player in self.players:
+                player.receive_card(deck.draw())
+            dealer.receive_card(deck.draw())
+        upcard = dealer.hands[0].get_second()
+        stats = self.stats
+        for player in self.players:
+            player.mark_natural()
+            if player.hands[0].natural:
+                stats.blackjacks += 1
+        dealer.mark_natural()
+
+        dealer_hand = dealer.hands[0]
+        rules = self.rules
+        if (upcard.int_value() == 11 and rules.insurance) or rules.surrender == EARLY:
+            self.offer_insurance_and_surrender(dealer_hand, upcard)
+
+        # Players act, unless the dealer peeked and found blackjack
+        dealer_natural = dealer_hand.natural
+        if not dealer_natural:
+            for player in self.players:
+                self.play_player(player, upcard)
+
+        # Dealer plays out (the dealer always plays, as in Game.play_dealer)
+        dealer_table = self.rules.dealer_table
+        while dealer_table[dealer_hand.score_hand() * 2 + dealer_hand.is_soft()]:
+            dealer_hand.add_card(deck.draw())
+        dealer_state = dealer_hand.outcome_state()
+
+        if self.log is not None:
+            self.log.write_round(self.round_number, self.players, dealer_hand,
+                                 [player.initial_bet for player in self.players])
+        self.round_number += 1
+
+        # Settle
+        round_net = 0
+        for player in self.players:
+            seat_net = 0
+            if player.insurance:
+                insurance = player.insurance
+                seat_net += player.settle_insurance(dealer_natural) - insurance
+            for hand in player.hands:
+                multiplier, winnings = player.settle_hand(hand, dealer_state)
+                stats.record_hand(hand.get_bet(), multiplier)
+                seat_net += winnings - hand.get_bet()
+            stats.record_round(seat_net)
+            player.initial_bet = 0
+            round_net += seat_net
+            for hand in player.hands:
+                deck.discard(hand.cards)
+        deck.discard(dealer_hand.cards)
+        return round_net
+
+    def offer_insurance_and_surrender(self, dealer_hand, upcard):
+        """
+        Ask every seat about insurance (against an Ace) and early surrender,
+        before the dealer checks for blackjack.
+        Args:
+         :Hand dealer_hand: The dealer's hand.
+         :Card upcard: The dealer's visible card.
+        """
+        deck = self.deck
+        # Put the face down hole card back in the shoe's counts for now.
+        hole = dealer_hand.get_first().rank_index()
+        hole_tag = deck.counting_system.tags[hole]
+        deck.remaining[hole] += 1
+        deck.running -= hole_tag
+        try:
+            if upcard.int_value() == 11:
+                for seat, player in enumerate(self.players):
+                    if player.can_insure() and self.insure(seat, deck):
+                        player.place_insurance()
+            if self.rules.surrender == EARLY:
+                for player in self.players:
+                    hand = player.hands[0]
+                    if player.can_surrender(hand) and self.surrender(hand, upcard):
+                        hand.surrendered = True
+                        hand.actions += SURRENDER
+        finally:
+            deck.remaining[hole] -= 1
+            deck.running += hole_tag
+
+    def play_player(self, player, upcard):
+        """
+        Play through all of a player's hands, following the same
+        hand replay loop as Player.start_turn.
+        Args:
+         :Player player: The seat to play.
+         :Card upcard: The dealer's visible card.
+        """
+        deck = self.deck
+        hands = player.hands
+        if hands[0].surrendered:
+            return
+        h_idx = 0
+        while h_idx < len(hands):
+            hand = hands[h_idx]
+
+            # The hand is complete if it reached 21.
+            if hand.score_hand() == 21:
+                h_idx += 1
+                continue
+
+            # Late surrender ends the hand before any other decision.
+            if (self.rules.surrender == LATE and player.can_surrender(hand)
+                    and self.surrender(hand, upcard)):
+                hand.surrendered = True
+                hand.actions += SURRENDER
+                h_idx += 1
+                continue
+
+            # Splitting replaces the hand at h_idx, so replay this index.
+            if player.can_split(hand) and self.split(hand, upcard):
+                player.split_hand(deck, h_idx)
+                continue
+
+            # Doubling down ends the hand after one card.
+            if player.can_double(hand) and self.double(hand, upcard):
+                player.double_down(deck, hand)
+                h_idx += 1
+                continue
+
+            # Hit until the callback stays, or the hand reaches 21 or busts.
+            while self.hit(hand, upcard):
+                hand.actions += HIT
+                hand.add_card(deck.draw())
+                if hand.score_hand() >= 21:
+                    break
+            else:
+                hand.actions += STAND
+            h_idx += 1
+
+    def house_edge(self):
+        """
+        Return the house edge as a fraction of the total amount wagered
+        (positive numbers favour the house).
+        """
+        return self.stats.house_edge()
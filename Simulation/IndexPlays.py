@@ -0,0 +1,578 @@
+"""
+Count based strategy deviations (index plays) found by simulation.
+
+A cell is one decision from Player.play_hand, manage_double_down or
+manage_split: a hand total (a BasicStrategy row) against a dealer upcard,
+and the deviation being tested:
+ STAND   stand instead of hitting
+ DOUBLE  double down instead of playing on without doubling
+ SPLIT   split the pair instead of playing it as a total
+Every other decision follows BasicStrategy for the rules. A STAND cell
+never doubles its hand, so it compares hitting with standing even where
+basic strategy would double.
+
+Each sample deals a shuffled shoe to some depth, takes the cell's cards
+and the dealer's cards from the rest, and plays the hand both ways on the
+same cards with Engine.play_player (common random numbers): the dealer's
+hand is drawn first, so it finishes the same way for both actions, and
+both actions draw the same cards after it. The difference in result is
+recorded under the true count the player sees (rounded to the nearest
+integer). The index is where a weighted line through the mean difference
+at every true count crosses 0. Samples where the dealer peeks and finds
+blackjack are skipped, as the decision never comes up.
+
+Cells are simulated in chunks of CHUNK_SHOES shoes, each seeded from
+(seed, chunk index) and spread over a ProcessPoolExecutor. Chunks are
+merged in chunk order, and a cell stops as soon as the standard error of
+its index is within the tolerance, so results don't depend on the number
+of workers. Finished cells are saved to a cache file keyed by the rules
+they were simulated under, so a rerun only simulates cells whose rules
+changed.
+
+Run from the project directory:
+ python3 -m Simulation.IndexPlays [--decks D] [--workers W] [--tolerance T] [--all]
+    [rule options, see Rules.add_rule_arguments]
+"""
+import argparse
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import json
+import math
+import os
+
+from Analysis.BasicStrategy import (ACTION_NAMES, PAIR, SOFT, TABLE_DIR, BasicStrategy,
+                                    representative, rules_key)
+from Deck.BlackjackDeck import shoe_template
+from Deck.CountingSystem import HI_LO, SYSTEMS
+from Game.Rules import DEFAULT_RULES, add_rule_arguments, rules_from_arguments
+from Simulation.Engine import Engine
+from Simulation.Runner import worker_rng
+
+# Deviations
+STAND = 'stand'
+DOUBLE = 'double'
+SPLIT = 'split'
+
+TC_LIMIT = 10           # Samples are recorded at true counts -TC_LIMIT to TC_LIMIT.
+CHUNK_SHOES = 100       # Shoes shuffled per task
+DEPTH_STEP = 13         # Cards between the samples taken from one shoe
+MIN_SAMPLES = 20000     # Samples before a cell may stop
+MAX_SAMPLES = 2000000   # Samples after which a cell stops anyway
+FIT_WINDOW = 4          # The index is refit on true counts this close to it.
+
+# Bump when the simulation changes, so cached cells are simulated again.
+INDEX_VERSION = 2
+CACHE_PATH = os.path.join(TABLE_DIR, 'index-plays.v%d.json' % INDEX_VERSION)
+
+UPCARD_NAMES = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10']
+
+# Well known index plays (the "Illustrious 18" without insurance), as
+# (deviation, row, upcard rank index).
+DEFAULT_CELLS = [
+    (STAND, 16, 9), (STAND, 15, 9), (SPLIT, PAIR + 9, 4), (SPLIT, PAIR + 9, 5),
+    (DOUBLE, 10, 9), (STAND, 12, 2), (STAND, 12, 1), (DOUBLE, 11, 0),
+    (DOUBLE, 9, 1), (DOUBLE, 10, 0), (DOUBLE, 9, 6), (STAND, 16, 8),
+    (STAND, 13, 1), (STAND, 12, 3), (STAND, 12, 4), (STAND, 12, 5), (STAND, 13, 2),
+]
+
+
+def all_cells(rules=DEFAULT_RULES):
+    """
+    Every cell the game has a decision for: stand on hard 12-17 and soft
+    13-18, double on two card hard 8-11 and soft 13-20 the rules allow,
+    and split every pair, against every upcard.
+    """
+    rows = ([(STAND, row) for row in range(12, 18)]
+            + [(STAND, SOFT + score) for score in range(13, 19)]
+            + [(DOUBLE, row) for row in range(8, 12) if rules.double_table[row]]
+            + [(DOUBLE, SOFT + score) for score in range(13, 21) if rules.double_table[score]])
+    if rules.max_split_hands > 1:
+        rows += [(SPLIT, PAIR + rank) for rank in range(10)]
+    return [(kind, row, upcard) for kind, row in rows for upcard in range(10)]
+
+
+def cell_label(cell):
+    """
+    Name of a cell, e.g. 'stand hard 16 v 10' or 'split 8,8 v 6'.
+    """
+    kind, row, upcard = cell
+    if row >= PAIR:
+        hand = ','.join([UPCARD_NAMES[row - PAIR]] * 2)
+    elif row >= SOFT + 12:
+        hand = 'soft ' + str(row - SOFT)
+    else:
+        hand = 'hard ' + str(row)
+    return '%s %s v %s' % (kind, hand, UPCARD_NAMES[upcard])
+
+
+def cell_key(cell, n_decks, rules, counting_system, penetration, tolerance):
+    """
+    Cache key of a cell: everything its result depends on.
+    """
+    return '|'.join([rules_key(n_decks, rules), counting_system.name,
+                     'pen%g' % penetration, 'tol%g' % tolerance, cell_label(cell)])
+
+
+class CellStats:
+    def __init__(self):
+        """
+        Initialize empty totals of the result difference (deviation minus
+        the other action, in units of the initial bet) at every true count.
+        """
+        size = 2 * TC_LIMIT + 1
+        self.counts = [0] * size        # Index i holds true count i - TC_LIMIT.
+        self.sums = [0] * size
+        self.sums_sq = [0] * size
+
+    def record(self, true_count, difference):
+        """
+        Record one sample.
+        """
+        i = true_count + TC_LIMIT
+        self.counts[i] += 1
+        self.sums[i] += difference
+        self.sums_sq[i] += difference * difference
+
+    def merge(self, other):
+        """
+        Add the totals from another CellStats to this one.
+        """
+        for i in range(len(self.counts)):
+            self.counts[i] += other.counts[i]
+            self.sums[i] += other.sums[i]
+            self.sums_sq[i] += other.sums_sq[i]
+
+    def samples(self):
+        """
+        Return the number of samples recorded.
+        """
+        return sum(self.counts)
+
+    def mean(self, true_count):
+        """
+        Mean difference at a true count (0.0 without samples).
+        """
+        i = true_count + TC_LIMIT
+        return self.sums[i] / self.counts[i] if self.counts[i] else 0.0
+
+    def _line(self, low, high):
+        """
+        Weighted least squares line through the mean difference at true
+        counts low to high, weighted by samples and using the pooled
+        variance. Return (x_mean, y_mean, slope, variance of y_mean,
+        variance of slope), or None if there are fewer than three true
+        counts with samples.
+        """
+        points = [(tc, self.counts[tc + TC_LIMIT], self.mean(tc))
+                  for tc in range(low, high + 1) if self.counts[tc + TC_LIMIT]]
+        if len(points) < 3:
+            return None
+        n = sum(count for tc, count, mean in points)
+        x_mean = sum(count * tc for tc, count, mean in points) / n
+        y_mean = sum(count * mean for tc, count, mean in points) / n
+        sxx = sum(count * (tc - x_mean) ** 2 for tc, count, mean in points)
+        sxy = sum(count * (tc - x_mean) * (mean - y_mean) for tc, count, mean in points)
+        # Pooled variance of a single sample around the bucket means.
+        variance = sum(self.sums_sq[tc + TC_LIMIT] - count * mean * mean
+                       for tc, count, mean in points) / max(1, n - len(points))
+        return x_mean, y_mean, sxy / sxx, variance / n, variance / sxx
+
+    def _fit(self, low, high):
+        """
+        Fit a line (see _line) at true counts low to high and return
+        (index, standard error, slope), or None if there are too few true
+        counts with samples or the line is flat.
+        """
+        line = self._line(low, high)
+        if line is None:
+            return None
+        x_mean, y_mean, slope, var_y_mean, var_slope = line
+        if slope == 0:
+            return None
+        index = x_mean - y_mean / slope
+        # Delta method: index = x_mean - y_mean / slope.
+        se = math.sqrt(var_y_mean / slope ** 2 + y_mean ** 2 * var_slope / slope ** 4)
+        return index, se, slope
+
+    def one_sided(self):
+        """
+        Return True if the line through every true count is clearly above
+        0, or clearly below it, across the whole range simulated (more
+        than two standard errors at both ends), so one action is better
+        at every true count. Its crossing can be too far out to estimate.
+        """
+        line = self._line(-TC_LIMIT, TC_LIMIT)
+        if line is None:
+            return False
+        x_mean, y_mean, slope, var_y_mean, var_slope = line
+        signs = set()
+        for tc in (-TC_LIMIT, TC_LIMIT):
+            value = y_mean + slope * (tc - x_mean)
+            se = math.sqrt(var_y_mean + (tc - x_mean) ** 2 * var_slope)
+            if abs(value) <= 2 * se:
+                return False
+            signs.add(value > 0)
+        return len(signs) == 1
+
+    def fit(self):
+        """
+        Return (index, standard error, slope) of the true count where the
+        deviation starts to pay, or None if it can't be estimated yet. The
+        slope is positive when the deviation is better above the index.
+        """
+        fit = self._fit(-TC_LIMIT, TC_LIMIT)
+        if fit is None or self.one_sided():
+            # A one sided line crosses 0 outside the range, so keep the
+            # fit through every true count.
+            return fit
+        # Refit close to the crossing, where the line fits best.
+        center = min(TC_LIMIT, max(-TC_LIMIT, int(round(fit[0]))))
+        local = self._fit(max(-TC_LIMIT, center - FIT_WINDOW), min(TC_LIMIT, center + FIT_WINDOW))
+        return local if local is not None else fit
+
+    def finished(self, tolerance, min_samples=MIN_SAMPLES, max_samples=MAX_SAMPLES):
+        """
+        Return True once the index is known to within tolerance (or is
+        clearly outside the true counts simulated), or after max_samples.
+        """
+        samples = self.samples()
+        if samples >= max_samples:
+            return True
+        if samples < min_samples:
+            return False
+        if self.one_sided():
+            return True
+        fit = self.fit()
+        if fit is None:
+            return False
+        index, se, slope = fit
+        return se <= tolerance or abs(index) - TC_LIMIT > 2 * se
+
+
+class _Continuation:
+    """
+    Engine deck that deals a shoe from a position, skipping the cards
+    already taken for the decision.
+    """
+    def __init__(self, shoe):
+        self.shoe = shoe
+        self.position = 0
+        self.taken = ()
+
+    def draw(self):
+        i = self.position
+        while i in self.taken:
+            i += 1
+        self.position = i + 1
+        return self.shoe[i]
+
+
+class _Decisions:
+    """
+    Engine callbacks that force the tested decision on the cell's hand
+    and follow basic strategy everywhere else.
+    """
+    def __init__(self, strategy, kind):
+        self.strategy = strategy
+        self.kind = kind
+        self.hand = None        # The cell's hand
+        self.deviate = False    # Take the deviation on it
+
+    def split(self, hand, upcard):
+        if hand is self.hand and self.kind == SPLIT:
+            return self.deviate
+        return self.strategy.split(hand, upcard)
+
+    def double(self, hand, upcard):
+        if hand is self.hand:
+            if self.kind == DOUBLE:
+                return self.deviate
+            if self.kind == STAND:
+                # Compare hitting with standing, even where basic strategy doubles.
+                return False
+        return self.strategy.double(hand, upcard)
+
+    def hit(self, hand, upcard):
+        if hand is self.hand and self.kind == STAND and len(hand.cards) == 2:
+            return not self.deviate
+        return self.strategy.hit(hand, upcard)
+
+
+def run_chunk(cell, seed, chunk, n_decks, penetration, rules, counting_system):
+    """
+    Simulate one cell on CHUNK_SHOES shoes and return its CellStats.
+    """
+    kind, row, upcard_rank = cell
+    ranks = representative(row) + [upcard_rank]
+    rng = worker_rng(seed, chunk)
+    strategy = BasicStrategy(n_decks, rules=rules)
+    decisions = _Decisions(strategy, kind)
+    engine = Engine(1, n_decks, split=decisions.split, double=decisions.double,
+                    hit=decisions.hit, bankroll=float('inf'), rules=rules)
+    player = engine.players[0]
+    player.initial_bet = 1
+    dealer = engine.dealer
+    dealer_table = rules.dealer_table
+    tags = counting_system.tags
+    initial_count = counting_system.initial_count(n_decks)
+
+    shoe = list(shoe_template(n_decks))
+    n_cards = len(shoe)
+    continuation = engine.deck = _Continuation(shoe)
+    last_depth = int(n_cards * penetration)
+    stats = CellStats()
+
+    randrange = rng.randrange
+    for s in range(CHUNK_SHOES):
+        rng.shuffle(shoe)
+        shoe_ranks = [card.rank_index() for card in shoe]
+        # Where each rank is in the shoe, in order.
+        positions = [[] for rank in range(10)]
+        for i, rank in enumerate(shoe_ranks):
+            positions[rank].append(i)
+        running = initial_count
+        dealt = 0
+        for depth in range(0, last_depth + 1, DEPTH_STEP):
+            for i in range(dealt, depth):
+                running += tags[shoe_ranks[i]]
+            dealt = depth
+
+            # Take a random card of each rank the cell needs from the rest of
+            # the shoe. (Taking the first one would bias the cards before it.)
+            taken = []
+            for k, rank in enumerate(ranks):
+                rank_positions = positions[rank]
+                first = bisect_left(rank_positions, depth)
+                if len(rank_positions) - first <= ranks[:k].count(rank):
+                    break
+                i = rank_positions[randrange(first, len(rank_positions))]
+                while i in taken:
+                    i = rank_positions[randrange(first, len(rank_positions))]
+                taken.append(i)
+            else:
+                seen = running + sum(tags[rank] for rank in ranks)
+                true_count = seen / ((n_cards - depth - 3) / 52)
+                true_count = int(math.floor(true_count + 0.5))
+                if abs(true_count) > TC_LIMIT:
+                    continue
+                continuation.taken = taken
+                continuation.position = depth
+                upcard = shoe[taken[2]]
+                try:
+                    # The dealer's hand is drawn first, so both actions face it.
+                    dealer.reset()
+                    dealer.receive_card(upcard)
+                    dealer.receive_card(continuation.draw())
+                    dealer_hand = dealer.hands[0]
+                    if dealer_hand.is_natural():
+                        continue
+                    while dealer_table[dealer_hand.score_hand() * 2 + dealer_hand.is_soft()]:
+                        dealer_hand.add_card(continuation.draw())
+                    dealer_state = dealer_hand.outcome_state()
+
+                    start = continuation.position
+                    results = []
+                    for deviate in (True, False):
+                        continuation.position = start
+                        player.reset()
+                        player.receive_card(shoe[taken[0]])
+                        player.receive_card(shoe[taken[1]])
+                        decisions.hand = player.hands[0]
+                        decisions.deviate = deviate
+                        engine.play_player(player, upcard)
+                        results.append(sum(hand.compute_reward(dealer_state) * hand.get_bet()
+                                           - hand.get_bet() for hand in player.hands))
+                except IndexError:
+                    # Ran out of cards (only possible with very few decks).
+                    continue
+                stats.record(true_count, results[0] - results[1])
+    return stats
+
+
+def _result(cell, stats, n_decks, rules, seed):
+    """
+    Summarize a finished cell as a dict (saved in the cache).
+    """
+    kind, row, upcard = cell
+    strategy = BasicStrategy(n_decks, rules=rules)
+    fit = stats.fit()
+    result = {
+        'cell': cell_label(cell),
+        'kind': kind,
+        'row': row,
+        'upcard': upcard,
+        'basic': ACTION_NAMES[strategy.table[row * 10 + upcard]] if row < PAIR
+                 else ('P' if strategy.table[row * 10 + upcard] else '-'),
+        'samples': stats.samples(),
+        'seed': seed,
+        'index': None,
+        'se': None,
+        'above': None,
+    }
+    if fit is not None:
+        index, se, slope = fit
+        result['index'] = index
+        result['se'] = se
+        result['above'] = slope > 0
+    return result
+
+
+def describe(result):
+    """
+    Return a result as text, e.g. 'stand hard 16 v 10  stand at TC >= 0'.
+    """
+    index = result['index']
+    if index is None:
+        play = 'no index found'
+    elif index > TC_LIMIT or index < -TC_LIMIT:
+        better = (index < -TC_LIMIT) == result['above']
+        play = (result['kind'] if better else 'never ' + result['kind']) + ' at any TC'
+    elif result['above']:
+        play = '%s at TC >= %+d' % (result['kind'], math.ceil(index))
+    else:
+        play = '%s at TC <= %+d' % (result['kind'], math.floor(index))
+    estimate = '' if index is None else ' (%.2f +/- %.2f)' % (index, result['se'])
+    return '%-24s basic %-2s  %-26s%s  %d samples' % (
+        result['cell'], result['basic'], play, estimate, result['samples'])
+
+
+def load_cache(path=CACHE_PATH):
+    """
+    Return the cached cell results by cell_key ({} without a cache file).
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_cache(cache, path=CACHE_PATH):
+    """
+    Write the cache, replacing the old file only once the new one is
+    complete.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def generate_indices(cells=None, n_decks=6, rules=DEFAULT_RULES, counting_system=HI_LO,
+                     penetration=0.75, tolerance=0.25, n_workers=None, seed=0,
+                     min_samples=MIN_SAMPLES, max_samples=MAX_SAMPLES, cache_path=CACHE_PATH,
+                     on_cell=None):
+    """
+    Find the index of every cell, simulating the ones not in the cache.
+    Args:
+     :List cells: (deviation, row, upcard) cells. Defaults to DEFAULT_CELLS.
+     :Int n_decks: Number of decks in the shoe.
+     :Rules rules: House rules.
+     :CountingSystem counting_system: System the true count is taken from.
+     :Float penetration: Deepest fraction of the shoe a sample is dealt at.
+     :Float tolerance: Standard error (in true counts) a cell's index is
+        simulated to.
+     :Int n_workers: Number of processes. Defaults to the number of CPUs.
+     :Int seed: Seed for the run. Each chunk derives its own stream from it.
+     :Int min_samples, max_samples: Bounds on the samples per cell.
+     :String cache_path: Cache file. None simulates every cell.
+     :Function on_cell: Called with each result as its cell finishes
+        (cached results first).
+
+    Return:
+     :List: A result dict (see describe) per cell, in the order of cells.
+    """
+    if cells is None:
+        cells = DEFAULT_CELLS
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    cache = load_cache(cache_path) if cache_path else {}
+    keys = {cell: cell_key(cell, n_decks, rules, counting_system, penetration, tolerance)
+            for cell in cells}
+    results = {cell: cache[keys[cell]] for cell in cells if keys[cell] in cache}
+    todo = [cell for cell in cells if cell not in results]
+    if on_cell is not None:
+        for cell in cells:
+            if cell in results:
+                on_cell(results[cell])
+
+    def finish(cell, stats):
+        results[cell] = _result(cell, stats, n_decks, rules, seed)
+        if cache_path:
+            cache[keys[cell]] = results[cell]
+            save_cache(cache, cache_path)
+        if on_cell is not None:
+            on_cell(results[cell])
+
+    def args(cell, chunk):
+        return (cell, seed, chunk, n_decks, penetration, rules, counting_system)
+
+    if n_workers == 1:
+        for cell in todo:
+            stats = CellStats()
+            chunk = 0
+            while not stats.finished(tolerance, min_samples, max_samples):
+                stats.merge(run_chunk(*args(cell, chunk)))
+                chunk += 1
+            finish(cell, stats)
+        return [results[cell] for cell in cells]
+
+    stats = {cell: CellStats() for cell in todo}
+    next_chunk = {cell: 0 for cell in todo}     # Next chunk to submit
+    merged = {cell: 0 for cell in todo}         # Next chunk to merge
+    waiting = {cell: {} for cell in todo}       # Finished chunks not merged yet
+    active = list(todo)
+    pending = {}
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        turn = 0
+        while active or pending:
+            # Keep every worker busy, taking turns between the active cells.
+            while active and len(pending) < 2 * n_workers:
+                cell = active[turn % len(active)]
+                turn += 1
+                future = executor.submit(run_chunk, *args(cell, next_chunk[cell]))
+                pending[future] = (cell, next_chunk[cell])
+                next_chunk[cell] += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                cell, chunk = pending.pop(future)
+                if cell not in active:
+                    continue
+                waiting[cell][chunk] = future.result()
+                # Merge in chunk order, so the stopping point doesn't depend
+                # on which worker finished first.
+                while merged[cell] in waiting[cell]:
+                    stats[cell].merge(waiting[cell].pop(merged[cell]))
+                    merged[cell] += 1
+                    if stats[cell].finished(tolerance, min_samples, max_samples):
+                        active.remove(cell)
+                        finish(cell, stats[cell])
+                        break
+    return [results[cell] for cell in cells]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find true count indices by simulation.")
+    parser.add_argument("--decks", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--penetration", type=float, default=0.75)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Standard error of each index, in true counts.")
+    parser.add_argument("--system", choices=sorted(SYSTEMS), default=HI_LO.name)
+    parser.add_argument("--all", action="store_true", help="Every cell instead of the common indices.")
+    parser.add_argument("--no-cache", action="store_true")
+    add_rule_arguments(parser)
+    args = parser.parse_args()
+
+    rules = rules_from_arguments(args)
+    cells = all_cells(rules) if args.all else DEFAULT_CELLS
+    print("Index plays for", rules_key(args.decks, rules), args.system)
+    generate_indices(cells, args.decks, rules, SYSTEMS[args.system], args.penetration,
+                     args.tolerance, args.workers, args.seed,
+                     cache_path=None if args.no_cache else CACHE_PATH,
+                     on_cell=lambda result: print(describe(result), flush=True))
+
+
+if __name__ == '__main__':
+    main()
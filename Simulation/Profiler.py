@@ -0,0 +1,301 @@
+"""
+Optional timing instrumentation for the game's hot paths.
+
+Profiler.install() replaces each target method (the round phases of Game,
+drawing and reshuffling on every shoe class, and Hand.score_hand) with a
+wrapper that counts calls and records their latency in a histogram.
+Round phases that ask players something are generators of steps (see
+Game.play); for those, the time spent running the steps is recorded, not
+the time spent waiting for answers. uninstall() puts the original methods
+back, so a profiler that isn't installed costs nothing and can stay wired
+into production tables.
+
+Histograms have power of two nanosecond buckets. Snapshots can be written
+as JSON or in the Prometheus text format, once or periodically from a
+background thread. Counts are updated without locking, so with many
+threads they are approximate.
+
+Run from the project directory to profile scripted rounds:
+ python3 -m Simulation.Profiler [n_seats] [n_rounds]
+"""
+from contextlib import redirect_stdout
+import functools
+import inspect
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+from Deck.BlackjackDeck import BlackjackDeck
+from Deck.CompactShoe import CompactShoe
+from Deck.Deck import Deck
+from Game.Game import Game
+from Game.Hand import Hand
+
+N_BUCKETS = 40      # Bucket i holds calls shorter than 2**i ns (the last is unbounded)
+
+# Methods instrumented by default
+TARGETS = [
+    (Game, 'start_round'), (Game, 'play_hands'), (Game, 'play_dealer'),
+    (Game, 'reward'), (Game, 'prompt_continue'),
+    (Deck, 'draw'), (Deck, 'reset_deck'),
+    (BlackjackDeck, 'draw'), (BlackjackDeck, 'reset_deck'),
+    (CompactShoe, 'draw'), (CompactShoe, 'reset_deck'),
+    (Hand, 'score_hand'),
+]
+
+
+class Histogram:
+    def __init__(self):
+        """
+        Initialize an empty latency histogram.
+        """
+        self.clear()
+
+    def clear(self):
+        """
+        Forget every recorded call.
+        """
+        self.count = 0
+        self.total_ns = 0
+        self.buckets = [0] * N_BUCKETS
+
+    def record(self, elapsed_ns):
+        """
+        Record one call that took elapsed_ns nanoseconds.
+        """
+        self.count += 1
+        self.total_ns += elapsed_ns
+        self.buckets[min(elapsed_ns.bit_length(), N_BUCKETS - 1)] += 1
+
+    def quantile(self, q):
+        """
+        Upper bound (in ns) of the bucket holding the q quantile.
+        """
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return 2 ** i
+        return 0
+
+    def snapshot(self):
+        """
+        Return the histogram as a dict.
+        """
+        return {'count': self.count, 'total_ns': self.total_ns,
+                'mean_ns': self.total_ns / self.count if self.count else 0.0,
+                'p50_ns': self.quantile(0.5), 'p99_ns': self.quantile(0.99),
+                'buckets': list(self.buckets)}
+
+
+class Profiler:
+    def __init__(self, targets=TARGETS):
+        """
+        Initialize a profiler for a list of (class, method name) targets.
+        Nothing is instrumented until install() is called.
+        """
+        self.targets = list(targets)
+        self.histograms = {}
+        self.originals = []
+        self.exporter = None
+        self.stop_export = threading.Event()
+
+    def install(self):
+        """
+        Wrap every target method.
+        """
+        if self.originals:
+            return
+        for cls, name in self.targets:
+            original = cls.__dict__[name]
+            histogram = self.histograms.setdefault(cls.__name__ + '.' + name, Histogram())
+            self.originals.append((cls, name, original))
+            timed = _timed_steps if inspect.isgeneratorfunction(original) else _timed
+            setattr(cls, name, timed(original, histogram))
+
+    def uninstall(self):
+        """
+        Restore the original methods. Recorded timings are kept.
+        """
+        for cls, name, original in reversed(self.originals):
+            setattr(cls, name, original)
+        self.originals = []
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def reset(self):
+        """
+        Clear every histogram.
+        """
+        for histogram in self.histograms.values():
+            histogram.clear()
+
+    def snapshot(self):
+        """
+        Return every histogram as a dict keyed by 'Class.method'.
+        """
+        return {name: histogram.snapshot() for name, histogram in self.histograms.items()}
+
+    def to_json(self):
+        """
+        Return the current snapshot and the time it was taken as JSON.
+        """
+        return json.dumps({'time': time.time(), 'methods': self.snapshot()}, indent=1)
+
+    def to_prometheus(self):
+        """
+        Return the histograms in the Prometheus text exposition format.
+        """
+        metric = 'blackjack_call_duration_seconds'
+        lines = ['# HELP ' + metric + ' Latency of instrumented game methods.',
+                 '# TYPE ' + metric + ' histogram']
+        for name, histogram in self.histograms.items():
+            label = 'method="' + name + '"'
+            seen = 0
+            for i, n in enumerate(histogram.buckets[:-1]):
+                seen += n
+                lines.append('%s_bucket{%s,le="%.9g"} %d' % (metric, label, 2 ** i / 1e9, seen))
+            lines.append('%s_bucket{%s,le="+Inf"} %d' % (metric, label, histogram.count))
+            lines.append('%s_sum{%s} %.9f' % (metric, label, histogram.total_ns / 1e9))
+            lines.append('%s_count{%s} %d' % (metric, label, histogram.count))
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path, format='json'):
+        """
+        Write a snapshot to path (replaced atomically).
+        Args:
+         :String path: Output file.
+         :String format: 'json' or 'prometheus'.
+        """
+        text = self.to_prometheus() if format == 'prometheus' else self.to_json()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def start_export(self, path, interval=10.0, format='json'):
+        """
+        Export a snapshot every interval seconds from a background thread.
+        """
+        def run():
+            while not self.stop_export.wait(interval):
+                self.export(path, format)
+        self.stop_export.clear()
+        self.exporter = threading.Thread(target=run, name='profiler-export', daemon=True)
+        self.exporter.start()
+
+    def stop(self, path=None, format='json'):
+        """
+        Stop periodic exports, writing a final snapshot to path if given.
+        """
+        if self.exporter is not None:
+            self.stop_export.set()
+            self.exporter.join()
+            self.exporter = None
+        if path is not None:
+            self.export(path, format)
+
+    def print_report(self):
+        """
+        Print calls and latency for every instrumented method.
+        """
+        print("%-26s %10s %10s %10s %10s" % ("Method", "calls", "mean ns", "p50 ns", "p99 ns"))
+        for name, histogram in self.histograms.items():
+            stats = histogram.snapshot()
+            print("%-26s %10d %10.0f %10d %10d" % (name, stats['count'], stats['mean_ns'],
+                                                   stats['p50_ns'], stats['p99_ns']))
+
+
+def _timed(method, histogram):
+    """
+    Wrap a method so every call is recorded in histogram.
+    """
+    clock = time.perf_counter_ns
+    record = histogram.record
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record(clock() - start)
+    timed.__wrapped__ = method
+    return timed
+
+
+def _timed_steps(method, histogram):
+    """
+    Wrap a method returning steps (see Game.play) so the time each call's
+    steps spend running, between the prompts they yield, is recorded in
+    histogram.
+    """
+    clock = time.perf_counter_ns
+    record = histogram.record
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        elapsed = 0
+        start = clock()
+        steps = method(*args, **kwargs)
+        answer = None
+        while True:
+            try:
+                request = steps.send(answer)
+            except StopIteration as stop:
+                record(elapsed + clock() - start)
+                return stop.value
+            elapsed += clock() - start
+            answer = yield request
+            start = clock()
+    timed.__wrapped__ = method
+    return timed
+
+
+def _scripted_answers(n_rounds):
+    """
+    Input source that bets $10 (or whatever is left), stands and leaves
+    after n_rounds rounds.
+    """
+    rounds = [0]
+
+    def answer(prompt=''):
+        if 'what is your initial bet' in prompt:
+            money = int(prompt.split('$')[1].split()[0])
+            return str(min(10, money))
+        if 'keep playing' in prompt:
+            rounds[0] += 1
+            return 'y' if rounds[0] < n_rounds else 'n'
+        if prompt.startswith('Bet $'):
+            return 'y'
+        if 'stay (S) or hit (H)' in prompt:
+            return 's'
+        return 'n'
+    return answer
+
+
+def main():
+    n_seats = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    n_rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    game = Game(['Player ' + str(i + 1) for i in range(n_seats)], 6, penetration=0.75,
+                seed=0, start=False)
+    for player in game.players:
+        player.input = _scripted_answers(n_rounds)
+    with Profiler() as profiler:
+        with redirect_stdout(io.StringIO()):
+            game.run_game()
+    profiler.print_report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Compact binary log of played rounds.
+
+Every settled hand is written as one fixed-width little-endian record:
+ round       uint32   Round number
+ seat        uint8    Seat index at the table
+ hand        uint8    Hand index for the seat (more than one after splits)
+ bet         int32    The seat's initial bet for the round
+ final_bet   int32    Bet on this hand after splits and doubles
+ cards       12 x uint8  Card codes dealt to the hand (EMPTY if unused)
+ actions     12 bytes Hand.actions codes (H hit, S stand, D double, P split,
+                      R surrender), NUL padded
+ dealer      12 x uint8  Card codes of the dealer's final hand
+ multiplier  float32  Multiplier from Hand.compute_reward
+ delta       int32    Change in the seat's bankroll from this hand
+ insurance   int32    The seat's insurance bet (on hand 0 only, else 0)
+ insurance_delta int32  Change in the seat's bankroll from the insurance
+                      bet (on hand 0 only, else 0)
+Card codes are positions in Deck.fill_deck order (see Deck.CompactShoe).
+A seat's net for a round, and so its change in bankroll, is the sum of
+delta and insurance_delta over its records.
+
+The file starts with a HEADER_SIZE byte header. RoundLogWriter appends
+through a large write buffer. RoundLogReader memory maps the file and
+exposes every field as a NumPy view (requires NumPy), so logs much larger
+than memory can be aggregated in place.
+"""
+import os
+import struct
+
+from Deck.Deck import card_code
+
+MAGIC = b'BJLOG'
+VERSION = 2
+HEADER = struct.Struct('<5sBH8x')
+HEADER_SIZE = HEADER.size
+MAX_CARDS = 12
+EMPTY = 255
+
+RECORD = struct.Struct('<IBBii12B12s12Bfiii')
+FIELDS = ['round', 'seat', 'hand', 'bet', 'final_bet', 'cards', 'actions',
+          'dealer', 'multiplier', 'delta', 'insurance', 'insurance_delta']
+
+
+def _codes(cards):
+    """
+    Card codes of up to MAX_CARDS cards, padded with EMPTY.
+    """
+    codes = [card_code(card) for card in cards[:MAX_CARDS]]
+    return codes + [EMPTY] * (MAX_CARDS - len(codes))
+
+
+class RoundLogWriter:
+    def __init__(self, path, buffer_size=1 << 20):
+        """
+        Open a log for appending, writing the header if the file is new.
+        Args:
+         :String path: Log file path.
+         :Int buffer_size: Bytes buffered before each write to disk.
+        """
+        self.path = path
+        self.file = open(path, 'ab', buffering=buffer_size)
+        if self.file.tell() == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+    def write_hand(self, round_number, seat, h_idx, bet, hand, dealer_hand, multiplier,
+                   insurance=0):
+        """
+        Append the record for one settled hand.
+        Args:
+         :Int round_number: Round the hand was played in.
+         :Int seat: Seat index.
+         :Int h_idx: Index of the hand in the seat's hands.
+         :Int bet: The seat's initial bet for the round.
+         :Hand hand: The settled hand.
+         :Hand dealer_hand: The dealer's final hand.
+         :Float multiplier: Multiplier the hand was paid.
+         :Int insurance: Insurance bet to record with the hand (pays 2:1
+            if the dealer has a natural).
+        """
+        final_bet = hand.get_bet()
+        delta = int(multiplier * final_bet) - final_bet
+        insurance_delta = 2 * insurance if dealer_hand.natural else -insurance
+        self.file.write(RECORD.pack(round_number, seat, h_idx, bet, final_bet,
+                                    *_codes(hand.cards),
+                                    hand.actions[:MAX_CARDS].encode('ascii'),
+                                    *_codes(dealer_hand.cards),
+                                    multiplier, delta, insurance, insurance_delta))
+
+    def write_round(self, round_number, players, dealer_hand, bets):
+        """
+        Append a record for every hand of every player. Called once the
+        dealer has finished, before the hands and insurance are paid out.
+        Args:
+         :Int round_number: Round number.
+         :List players: Players at the table, in seat order.
+         :Hand dealer_hand: The dealer's final hand.
+         :List bets: Each player's initial bet for the round.
+        """
+        dealer_state = dealer_hand.outcome_state()
+        for seat, player in enumerate(players):
+            for h_idx, hand in enumerate(player.hands):
+                self.write_hand(round_number, seat, h_idx, bets[seat], hand, dealer_hand,
+                                hand.compute_reward(dealer_state),
+                                player.insurance if h_idx == 0 else 0)
+
+    def flush(self):
+        """
+        Write any buffered records to disk.
+        """
+        self.file.flush()
+
+    def close(self):
+        """
+        Flush and close the log.
+        """
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RoundLogReader:
+    def __init__(self, path):
+        """
+        Memory map a log written by RoundLogWriter.
+        Args:
+         :String path: Log file path.
+        """
+        import numpy as np
+
+        with open(path, 'rb') as f:
+            magic, version, record_size = HEADER.unpack(f.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(path + ' is not a round log (version ' + str(VERSION) + ')')
+
+        self.dtype = np.dtype([
+            ('round', '<u4'), ('seat', 'u1'), ('hand', 'u1'),
+            ('bet', '<i4'), ('final_bet', '<i4'),
+            ('cards', 'u1', (MAX_CARDS,)), ('actions', 'S12'),
+            ('dealer', 'u1', (MAX_CARDS,)),
+            ('multiplier', '<f4'), ('delta', '<i4'),
+            ('insurance', '<i4'), ('insurance_delta', '<i4'),
+        ])
+        n_records = (os.path.getsize(path) - HEADER_SIZE) // RECORD.size
+        if n_records == 0:
+            self.records = np.zeros(0, dtype=self.dtype)
+        else:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r',
+                                     offset=HEADER_SIZE, shape=(n_records,))
+
+    def __len__(self):
+        return len(self.records)
+
+    def column(self, name):
+        """
+        Return a view of one field across every record.
+        """
+        return self.records[name]
+
+    def summary(self, chunk_size=1 << 22):
+        """
+        Totals over the whole log, computed chunk by chunk so memory use
+        stays bounded regardless of log size.
+
+        Return:
+         :Dict: hands, total_wagered (hand bets), insurance_net, total_net
+            (hands and insurance, as in Statistics) and house_edge.
+        """
+        hands = len(self.records)
+        wagered = 0
+        net = 0
+        insurance_net = 0
+        for start in range(0, hands, chunk_size):
+            chunk = self.records[start:start + chunk_size]
+            wagered += int(chunk['final_bet'].sum(dtype='i8'))
+            net += int(chunk['delta'].sum(dtype='i8'))
+            insurance_net += int(chunk['insurance_delta'].sum(dtype='i8'))
+        net += insurance_net
+        edge = -net / wagered if wagered else 0.0
+        return {'hands': hands, 'total_wagered': wagered, 'insurance_net': insurance_net,
+                'total_net': net, 'house_edge': edge}
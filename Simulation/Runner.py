@@ -0,0 +1,116 @@
+"""
+Multiprocess Monte Carlo runner for the headless Engine.
+
+Splits a number of rounds across a ProcessPoolExecutor. Each worker owns
+its own shoe with a random.Random seeded from (seed, worker index), so
+workers draw from independent streams and the same seed and worker count
+always give the same results. Workers only return their Statistics totals,
+which are merged in worker order.
+
+Callbacks must be picklable (module level functions).
+
+Run from the project directory:
+ python3 -m Simulation.Runner n_rounds [--workers W] [--seed S] [--decks D] [--seats N]
+    [rule options, see Rules.add_rule_arguments]
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+import random
+
+from Deck.CompactShoe import CompactShoe
+from Game.Rules import DEFAULT_RULES, add_rule_arguments, rules_from_arguments
+from Simulation.Engine import Engine, flat_bet, never, never_insure, hit_below_17
+from Simulation.Statistics import Statistics
+
+
+def worker_rng(seed, worker):
+    """
+    Return the random number generator for one worker.
+    String seeds are hashed (SHA-512) by random.Random, so the stream is the
+    same on every platform and run.
+    """
+    return random.Random(str(seed) + ":" + str(worker))
+
+
+def split_rounds(n_rounds, n_workers):
+    """
+    Return the number of rounds played by each worker.
+    """
+    base, extra = divmod(n_rounds, n_workers)
+    return [base + (1 if i < extra else 0) for i in range(n_workers)]
+
+
+def run_worker(n_rounds, seed, worker, n_decks, n_seats, bet, split, double, hit,
+               rules=DEFAULT_RULES, surrender=never, insure=never_insure):
+    """
+    Play n_rounds rounds on a private shoe and return the Statistics.
+    """
+    deck = CompactShoe(n_decks, rng=worker_rng(seed, worker))
+    deck.shuffle()
+    # Unlimited bankroll so seats never run out of money mid-simulation.
+    engine = Engine(n_seats, n_decks, bet=bet, split=split, double=double,
+                    hit=hit, bankroll=float('inf'), deck=deck, rules=rules,
+                    surrender=surrender, insure=insure)
+    engine.run(n_rounds)
+    return engine.stats
+
+
+def run_simulation(n_rounds, n_workers=None, seed=0, n_decks=8, n_seats=1,
+                   bet=flat_bet, split=never, double=never, hit=hit_below_17,
+                   rules=DEFAULT_RULES, surrender=never, insure=never_insure):
+    """
+    Play n_rounds rounds split across n_workers processes.
+    Args:
+     :Int n_rounds: Total number of rounds to play.
+     :Int n_workers: Number of processes. Defaults to the number of CPUs.
+     :Int seed: Seed for the run. Each worker derives its own stream from it.
+     :Int n_decks: Number of decks in each worker's shoe.
+     :Int n_seats: Number of seats at each worker's table.
+     :Function bet, split, double, hit: Engine decision callbacks.
+     :Rules rules: House rules at every worker's table.
+     :Function surrender, insure: Engine surrender and insurance callbacks.
+
+    Return:
+     :Statistics: Totals merged across all workers.
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    counts = split_rounds(n_rounds, n_workers)
+
+    results = []
+    if n_workers == 1:
+        results.append(run_worker(counts[0], seed, 0, n_decks, n_seats,
+                                  bet, split, double, hit, rules, surrender, insure))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(run_worker, counts[i], seed, i, n_decks,
+                                       n_seats, bet, split, double, hit, rules,
+                                       surrender, insure)
+                       for i in range(n_workers)]
+            # Merge in worker order so the result is deterministic.
+            results = [future.result() for future in futures]
+
+    total = Statistics()
+    for stats in results:
+        total.merge(stats)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a multiprocess blackjack simulation.")
+    parser.add_argument("n_rounds", type=int)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--decks", type=int, default=8)
+    parser.add_argument("--seats", type=int, default=1)
+    add_rule_arguments(parser)
+    args = parser.parse_args()
+
+    stats = run_simulation(args.n_rounds, args.workers, args.seed, args.decks, args.seats,
+                           rules=rules_from_arguments(args))
+    print(stats.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Shoe composition series for every round of whole shoes at once (requires
+NumPy).
+
+shoe_series takes shoes as arrays of Card.rank_index codes in the order
+they are dealt, and the number of cards dealt by the end of each round,
+and returns the BlackjackDeck queries (cards left of each rank, dealt
+fraction, running and true count, serial correlation and removal effects)
+as they stood after every round. Each series is a cumulative sum over the
+shoe gathered at the round boundaries, so many shoes of the same size are
+handled in the same few vector operations. BatchEngine's shoes can be
+passed in directly, with its pos recorded after each round as the cursors.
+
+record_shoe plays one shoe with an Engine and returns its order and round
+boundaries.
+
+Run from the project directory to print the series of a simulated shoe:
+ python3 -m Simulation.ShoeSeries [n_decks] [n_seats] [penetration] [seed]
+"""
+import random
+import sys
+
+import numpy as np
+
+from Analysis.DealerOutcome import full_shoe
+from Analysis.EffectOfRemoval import load_effects
+from Deck.BlackjackDeck import BlackjackDeck
+from Deck.CountingSystem import HI_LO
+from Simulation.Engine import Engine
+
+
+def _cumulative(values):
+    """
+    Cumulative sums along the last axis with a leading 0, so index k is the
+    sum of the first k values.
+    """
+    result = np.zeros(values.shape[:-1] + (values.shape[-1] + 1,), dtype=np.int64)
+    np.cumsum(values, axis=-1, out=result[..., 1:])
+    return result
+
+
+def shoe_series(shoes, cursors, counting_system=HI_LO, effects=None):
+    """
+    Compute the shoe analytics after every round of one or more shoes.
+    Args:
+     :array shoes: Rank indices in deal order, shape (n_cards,) or
+        (n_shoes, n_cards). Every shoe holds whole decks.
+     :array cursors: Cards dealt by the end of each round, shape
+        (n_rounds,) or (n_shoes, n_rounds).
+     :CountingSystem counting_system: System used for the running count.
+     :Tuple effects: Single deck effect of removal of each rank (see
+        Analysis.EffectOfRemoval). Defaults to the EORs for the default
+        rules.
+
+    Return:
+     :Dict: Arrays with leading shape (n_shoes, n_rounds), or (n_rounds,)
+        for a single shoe:
+         'remaining'           Cards left of each rank (trailing axis of 10)
+         'dealt_fraction'      Fraction of the shoe dealt
+         'running_count'       Running count
+         'true_count'          Running count per deck left
+         'serial_correlation'  Correlation of consecutive dealt tags
+         'removal_effects'     Each rank's change in expectation (axis of 10)
+         'advantage_shift'     Total change in expectation
+    """
+    shoes = np.asarray(shoes)
+    cursors = np.asarray(cursors, dtype=np.int64)
+    single = shoes.ndim == 1
+    shoes = np.atleast_2d(shoes)
+    cursors = np.atleast_2d(cursors)
+    if effects is None:
+        effects = load_effects()
+    n_shoes, n_cards = shoes.shape
+    n_decks = n_cards // 52
+    full = np.array(full_shoe(n_decks))
+    rows = np.arange(n_shoes)[:, None]
+
+    # Cards of each rank dealt by the end of every round.
+    dealt = np.empty(cursors.shape + (10,), dtype=np.int64)
+    for rank in range(10):
+        dealt[..., rank] = _cumulative(shoes == rank)[rows, cursors]
+    remaining = full - dealt
+    n_left = n_cards - cursors
+
+    tags = np.array(counting_system.tags, dtype=np.int64)[shoes]
+    tag_sums = _cumulative(tags)[rows, cursors]
+    square_sums = _cumulative(tags * tags)[rows, cursors]
+    # Products of consecutive tags: index k covers the first k cards.
+    pair_sums = np.zeros((n_shoes, n_cards + 1), dtype=np.int64)
+    np.cumsum(tags[:, 1:] * tags[:, :-1], axis=1, out=pair_sums[:, 2:])
+    pair_sums = pair_sums[rows, cursors]
+
+    running = counting_system.initial_count(n_decks) + tag_sums
+    decks_left = n_left / 52
+    with np.errstate(divide='ignore', invalid='ignore'):
+        true_count = np.where(n_left > 0, running / decks_left, running)
+
+        # serial_correlation, from the same sums BlackjackDeck keeps.
+        mean = tag_sums / np.maximum(cursors, 1)
+        variance = square_sums / np.maximum(cursors, 1) - mean * mean
+        correlation = (pair_sums / np.maximum(cursors - 1, 1) - mean * mean) / variance
+        correlation = np.where((cursors >= 3) & (variance > 0), correlation, 0.0)
+
+        densities = np.where(n_left[..., None] > 0, remaining / n_left[..., None], full / n_cards)
+    effects_by_rank = 51 * np.asarray(effects) * (full / n_cards - densities)
+
+    series = {
+        'remaining': remaining,
+        'dealt_fraction': cursors / n_cards,
+        'running_count': running,
+        'true_count': true_count,
+        'serial_correlation': correlation,
+        'removal_effects': effects_by_rank,
+        'advantage_shift': effects_by_rank.sum(axis=-1),
+    }
+    if single:
+        series = {name: values[0] for name, values in series.items()}
+    return series
+
+
+def record_shoe(engine):
+    """
+    Shuffle an Engine's shoe and play rounds until the cut card comes out.
+    The shoe must have a penetration, so it is never reshuffled mid-round.
+    Return (rank indices in deal order, cards dealt by the end of each round).
+    """
+    deck = engine.deck
+    n_cards = 52 * deck.n_decks
+    if deck.get_num_cards() == n_cards:
+        # Nothing dealt yet (resetting would add another shoe of cards).
+        deck.shuffle()
+    else:
+        deck.reset_deck()
+    # The last card in deck.cards is dealt first.
+    order = [card.rank_index() for card in reversed(deck.cards)]
+    cursors = []
+    while True:
+        engine.play_round()
+        cursors.append(n_cards - deck.get_num_cards())
+        if deck.needs_shuffle():
+            return order, cursors
+
+
+def main():
+    n_decks = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    n_seats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    penetration = float(sys.argv[3]) if len(sys.argv) > 3 else 0.75
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+
+    deck = BlackjackDeck(n_decks, rng=random.Random(seed), penetration=penetration)
+    engine = Engine(n_seats, n_decks, deck=deck)
+    order, cursors = record_shoe(engine)
+    series = shoe_series(order, cursors)
+
+    print("Round  Dealt   RC     TC   Serial  Shift(%)  Left A..10")
+    for i in range(len(cursors)):
+        print("%5d  %4.0f%%  %4d  %+5.1f  %+6.3f  %+7.3f   %s" % (
+            i + 1, 100 * series['dealt_fraction'][i], series['running_count'][i],
+            series['true_count'][i], series['serial_correlation'][i],
+            100 * series['advantage_shift'][i],
+            ' '.join('%3d' % count for count in series['remaining'][i])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Running totals for simulated rounds.
+
+Only sums are kept (no per-round data), so statistics from separate
+workers can be merged exactly. All totals are integers when bets are
+integers, so merged results don't depend on floating point summation order.
+"""
+
+
+class Statistics:
+    def __init__(self):
+        """
+        Initialize empty totals.
+        """
+        self.rounds = 0             # Seat-rounds played.
+        self.hands = 0              # Hands settled (splits add hands).
+        self.wins = 0
+        self.pushes = 0
+        self.losses = 0
+        self.blackjacks = 0         # Two card 21s on the initial deal.
+        self.total_wagered = 0      # Sum of bets, including splits and doubles.
+        self.total_net = 0          # Sum of seat-round net results.
+        self.sum_sq_net = 0         # Sum of squared seat-round net results.
+
+    def record_hand(self, bet, multiplier):
+        """
+        Record a settled hand.
+        Args:
+         :Int bet: Amount bet on the hand.
+         :Float multiplier: Multiplier from Hand.compute_reward.
+        """
+        self.hands += 1
+        self.total_wagered += bet
+        if multiplier > 1:
+            self.wins += 1
+        elif multiplier == 1:
+            self.pushes += 1
+        else:
+            self.losses += 1
+
+    def record_round(self, net):
+        """
+        Record the net result of one seat for one round.
+        Args:
+         :Int net: Amount won (negative if lost) across the seat's hands.
+        """
+        self.rounds += 1
+        self.total_net += net
+        self.sum_sq_net += net * net
+
+    def merge(self, other):
+        """
+        Add the totals from another Statistics object to this one.
+        """
+        self.rounds += other.rounds
+        self.hands += other.hands
+        self.wins += other.wins
+        self.pushes += other.pushes
+        self.losses += other.losses
+        self.blackjacks += other.blackjacks
+        self.total_wagered += other.total_wagered
+        self.total_net += other.total_net
+        self.sum_sq_net += other.sum_sq_net
+
+    def ev(self):
+        """
+        Player's expected return per unit wagered.
+        """
+        if self.total_wagered == 0:
+            return 0.0
+        return self.total_net / self.total_wagered
+
+    def house_edge(self):
+        """
+        House edge as a fraction of the amount wagered (positive favours the house).
+        """
+        return -self.ev()
+
+    def mean_round(self):
+        """
+        Mean net result per seat-round.
+        """
+        if self.rounds == 0:
+            return 0.0
+        return self.total_net / self.rounds
+
+    def variance_round(self):
+        """
+        Sample variance of the net result per seat-round.
+        """
+        if self.rounds < 2:
+            return 0.0
+        mean = self.total_net / self.rounds
+        return (self.sum_sq_net - self.rounds * mean * mean) / (self.rounds - 1)
+
+    def blackjack_frequency(self):
+        """
+        Fraction of seat-rounds dealt a natural blackjack.
+        """
+        if self.rounds == 0:
+            return 0.0
+        return self.blackjacks / self.rounds
+
+    def summary(self):
+        """
+        Return a multi-line, human readable summary.
+        """
+        lines = [
+            "Rounds: " + str(self.rounds) + "  Hands: " + str(self.hands),
+            "Wins: %d  Pushes: %d  Losses: %d" % (self.wins, self.pushes, self.losses),
+            "EV per unit wagered: %.5f" % self.ev(),
+            "Mean net per round: %.4f  Variance: %.4f" % (self.mean_round(), self.variance_round()),
+            "Blackjack frequency: %.5f" % self.blackjack_frequency(),
+        ]
+        return "\n".join(lines)
@@ -4,8 +4,6 @@ Alex Kaplan
 
 Driver for Blackjack program.
 """
-from Game.Game import Game
-
 def new_game_sequence():
     """
     Prompt the user with the input necessary to initialize a game.
@@ -45,7 +43,9 @@ def new_game_sequence():
     print("Starting a new game with", n_players, "players and", n_decks, "decks (" + str(n_decks*52) + " cards)")
     print(".\n.\n.\n.\n")
     
-    # Create a blackjack game with this information.
+    # Create a blackjack game with this information. The game is imported
+    # here so the first prompt appears without waiting for it to load.
+    from Game.Game import Game
     blackjack_game = Game(player_names, n_decks)
     
 if __name__ == '__main__':